@@ -1,320 +1,233 @@
-import smtplib
-import schedule
-import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import sys
 from datetime import datetime
-import feedparser
-import requests
-from bs4 import BeautifulSoup
-import re
+from digest_engine import Digest, ScoringProfile
+from digest_engine.cli import main
+from digest_engine.keyword_matcher import KeywordMatcher
+from digest_engine.batch_scoring import TermMatrix, weight_vector, weighted_sum
+from digest_engine.renderer import DigestTemplate, plain_text
+import settings
+import sources
 
 # ===== CONFIGURATION =====
-EMAIL_ADDRESS = "your.email@gmail.com"  # Your Gmail address
-EMAIL_PASSWORD = "your.gmail.app.password"    # Your Gmail app password 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-RECIPIENT_EMAIL = "your.email@gmail.com"
+# Shared settings (email, fetching, caches) are read from settings.py; a name set here overrides it
 MAX_ARTICLES = 10  # Limit to top 10 articles
+EXTRACT_TIMEOUT = 10  # Seconds per article download
+EXTRACT_DEADLINE = 60  # Seconds allowed for all article extractions per run
+RUN_BUDGET = 10 * 60  # Seconds the whole run may take; past it extraction, then slow feeds are skipped (None: no limit)
+CONTENT_SCORE_BOUND = None  # Highest content score assumed before extraction (None: exact bound, never skips a winner); a lower number skips more extractions but is approximate and can drop an article that would have ranked
+OUTBOX_DIR = ".cache/outbox/daily"  # Rendered messages are spooled here until delivered
+SCHEDULE = "daily at 08:00"  # Local run time: "daily at HH:MM" or "<weekday> at HH:MM"
 
-# ===== FUNCTIONS =====
-def extract_content_from_url(url):
-    """Extract content from a URL"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            element.decompose()
-        
-        # Get text and clean it up
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text[:250] + "..." if len(text) > 250 else text
-    except Exception as e:
-        print(f"Error extracting content from {url}: {e}")
-        return "Content not available"
+# ===== SCORING TERMS =====
+# High relevance keywords (GIS + AI combination)
+HIGH_RELEVANCE_TERMS = [
+    "ai gis", "gis ai", "ai and gis", "gis and ai",
+    "machine learning gis", "gis machine learning",
+    "deep learning geospatial", "geospatial deep learning",
+    "computer vision gis", "gis computer vision",
+    "ai remote sensing", "remote sensing ai",
+    "artificial intelligence gis", "gis artificial intelligence"
+]
+
+# Medium relevance keywords (specific applications)
+MEDIUM_RELEVANCE_TERMS = [
+    "spatial ai", "ai spatial", "geospatial ai", "ai geospatial",
+    "satellite imagery ai", "ai satellite imagery",
+    "drone mapping ai", "ai drone mapping",
+    "urban planning ai", "ai urban planning",
+    "environmental monitoring ai", "ai environmental monitoring"
+]
+
+# Individual keyword matches
+GIS_TERMS = ["gis", "geospatial", "spatial", "mapping", "cartography"]
+AI_TERMS = ["ai", "artificial intelligence", "machine learning", "deep learning", "computer vision"]
+
+# term: (weight when in title, weight when in content)
+RELEVANCE_WEIGHTS = {
+    **{term: (10, 5) for term in HIGH_RELEVANCE_TERMS},
+    **{term: (5, 2) for term in MEDIUM_RELEVANCE_TERMS},
+    **{term: (3, 1) for term in GIS_TERMS + AI_TERMS},
+}
+RELEVANCE_MATCHER = KeywordMatcher(RELEVANCE_WEIGHTS)
+TITLE_WEIGHT_VECTOR = weight_vector(RELEVANCE_MATCHER, field=0)
+CONTENT_WEIGHT_VECTOR = weight_vector(RELEVANCE_MATCHER, field=1)
+
+# Keywords an entry title must contain to be considered at all
+TITLE_KEYWORDS = [
+    "gis", "geospatial", "spatial", 
+    "ai", "artificial intelligence", "machine learning", "deep learning",
+    "remote sensing", "satellite", "imagery",
+    "computer vision", "neural network"
+]
+TITLE_MATCHER = KeywordMatcher(dict.fromkeys(TITLE_KEYWORDS, 1))
+
+# Content score if an article body contained every term
+MAX_CONTENT_SCORE = sum(CONTENT_WEIGHT_VECTOR)
+
+# ===== EMAIL TEMPLATES =====
+# Compiled once at import; ${name} placeholders are HTML-escaped, see renderer.py
+EMAIL_CSS = """\
+body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }
+.header { background-color: #f8f9fa; padding: 20px; text-align: center; border-bottom: 2px solid #4CAF50; }
+.article { margin-bottom: 25px; padding: 15px; border-left: 4px solid #4CAF50; background-color: #f9f9f9; }
+.article h3 { margin-top: 0; color: #2c3e50; }
+.article a { color: #3498db; text-decoration: none; }
+.article a:hover { text-decoration: underline; }
+.meta { font-size: 0.9em; color: #7f8c8d; margin-bottom: 10px; }
+.score { float: right; background-color: #4CAF50; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; }
+.footer { margin-top: 30px; padding: 15px; text-align: center; font-size: 0.9em; color: #7f8c8d; border-top: 1px solid #eee; }
+.source-badge { display: inline-block; padding: 3px 8px; border-radius: 4px; font-size: 0.8em; margin-right: 8px; }
+.source-arxiv { background-color: #b6e3ff; color: #005c9e; }
+.source-google { background-color: #fce8e6; color: #c5221f; }
+.source-esri { background-color: #e6f4ea; color: #137333; }
+.source-medium { background-color: #000; color: white; }"""
 
-def calculate_relevance_score(article_title, article_content, source):
+# (substrings of the feed URL, badge CSS class, badge label); first match wins
+SOURCE_BADGES = [
+    (("arxiv",), "source-arxiv", "arXiv"),
+    (("google",), "source-google", "Google News"),
+    (("esri",), "source-esri", "Esri"),
+    (("medium", "towardsdatascience"), "source-medium", "Blog"),
+]
+
+def email_item_values(index, article):
+    """Placeholder values for one article of the email"""
+    source_class, source_name = "", "Other"
+    for needles, badge_class, badge_name in SOURCE_BADGES:
+        if any(needle in article['source_url'] for needle in needles):
+            source_class, source_name = badge_class, badge_name
+            break
+    return {
+        "index": index,
+        "title": article['title'],
+        "score": article['score'],
+        "source_class": source_class,
+        "source_name": source_name,
+        "published": article['published'],
+        "summary": plain_text(article['summary']),
+        "link": article['link'],
+    }
+
+EMAIL_TEMPLATE = DigestTemplate(
+    css=EMAIL_CSS,
+    header="""\
+<div class="header">
+<h1>🌍 AI &amp; GIS Daily Digest</h1>
+<p>${date}</p>
+<p>Top ${count} most relevant articles curated for you</p>
+</div>
+""",
+    item="""\
+<div class="article">
+<span class="score">Relevance: ${score}</span>
+<h3>${index}. ${title}</h3>
+<div class="meta">
+<span class="source-badge ${source_class}">${source_name}</span>
+<strong>Published:</strong> ${published}
+</div>
+<p>${summary}</p>
+<p><a href="${link}">📖 Read full article</a></p>
+</div>
+""",
+    footer="""\
+<div class="footer">
+<p>Curated from ${count} most relevant articles found today</p>
+<p>This digest was automatically generated for ${recipient_name}</p>
+</div>
+""",
+    empty="<p>No relevant articles found today. Check back tomorrow!</p>",
+    text_header="AI & GIS Daily Digest\n${date}\nTop ${count} most relevant articles curated for you\n\n",
+    text_item="${index}. ${title}\n   ${source_name} | Published: ${published} | Relevance: ${score}\n"
+              "   ${summary}\n   ${link}\n\n",
+    text_footer="Curated from ${count} most relevant articles found today\n"
+                "This digest was automatically generated for ${recipient_name}\n",
+    text_empty="No relevant articles found today. Check back tomorrow!\n",
+    item_values=email_item_values,
+)
+
+# ===== FUNCTIONS =====
+def calculate_relevance_score(article_title, article_content, source, published=''):
     """Calculate a relevance score for the article"""
-    title = article_title.lower()
-    content = article_content.lower()
-    
     score = 0
     
-    # High relevance keywords (GIS + AI combination)
-    high_relevance_terms = [
-        "ai gis", "gis ai", "ai and gis", "gis and ai",
-        "machine learning gis", "gis machine learning",
-        "deep learning geospatial", "geospatial deep learning",
-        "computer vision gis", "gis computer vision",
-        "ai remote sensing", "remote sensing ai",
-        "artificial intelligence gis", "gis artificial intelligence"
-    ]
-    
-    # Medium relevance keywords (specific applications)
-    medium_relevance_terms = [
-        "spatial ai", "ai spatial", "geospatial ai", "ai geospatial",
-        "satellite imagery ai", "ai satellite imagery",
-        "drone mapping ai", "ai drone mapping",
-        "urban planning ai", "ai urban planning",
-        "environmental monitoring ai", "ai environmental monitoring"
-    ]
-    
-    # Check for high relevance terms
-    for term in high_relevance_terms:
-        if term in title:
-            score += 10
-        if term in content:
-            score += 5
+    # Keyword matches (see RELEVANCE_WEIGHTS), each term counted once per field
+    score += RELEVANCE_MATCHER.score(article_title, field=0)
+    score += RELEVANCE_MATCHER.score(article_content, field=1)
     
-    # Check for medium relevance terms
-    for term in medium_relevance_terms:
-        if term in title:
-            score += 5
-        if term in content:
-            score += 2
-    
-    # Individual keyword matches
-    gis_terms = ["gis", "geospatial", "spatial", "mapping", "cartography"]
-    ai_terms = ["ai", "artificial intelligence", "machine learning", "deep learning", "computer vision"]
-    
-    for term in gis_terms:
-        if term in title:
-            score += 3
-        if term in content:
-            score += 1
-    
-    for term in ai_terms:
-        if term in title:
-            score += 3
-        if term in content:
-            score += 1
-    
-    # Source weighting (prefer certain sources)
-    if "arxiv" in source:
-        score += 5  # Academic papers are highly relevant
-    elif "esri" in source:
-        score += 4  # Esri content is very GIS-focused
-    elif "nasa" in source:
-        score += 3  # NASA has quality geospatial content
-    
-    # Recency bonus (if we can parse the date)
-    try:
-        published_date = article.get('published', '')
-        if '2025' in published_date or '2024' in published_date:
-            score += 2
-    except:
-        pass
+    score += source_bonus(source)
+    score += recency_bonus(published)
     
     return score
 
-def get_news():
-    """Fetch news from various sources based on AI and GIS keywords"""
-    articles = []
-    
-    # Define RSS feeds - focused on highest quality sources
-    feeds = [
-        # Google News searches (more specific)
-        "https://news.google.com/rss/search?q=%22AI+GIS%22+OR+%22GIS+AI%22+OR+%22machine+learning+GIS%22&ceid=US:en&hl=en-US&gl=US",
-        "https://news.google.com/rss/search?q=geospatial+artificial+intelligence+OR+spatial+AI&ceid=US:en&hl=en-US&gl=US",
-        
-        # Academic sources
-        "https://arxiv.org/rss/cs.AI",  # AI papers
-        "https://arxiv.org/rss/cs.CV",  # Computer Vision papers
-        
-        # GIS blogs
-        "https://www.esri.com/arcgis-blog/feed/",
-        "https://blog.mapbox.com/rss",
-        
-        # Quality tech blogs
-        "https://towardsdatascience.com/feed/tagged/geospatial",
-    ]
-    
-    # Keywords to look for
-    keywords = [
-        "gis", "geospatial", "spatial", 
-        "ai", "artificial intelligence", "machine learning", "deep learning",
-        "remote sensing", "satellite", "imagery",
-        "computer vision", "neural network"
-    ]
-    
-    seen_links = set()
-    
-    # Process RSS feeds
-    for feed_url in feeds:
-        try:
-            print(f"Checking feed: {feed_url}")
-            feed = feedparser.parse(feed_url)
-            
-            if not feed.entries:
-                print(f"  No entries found in this feed")
-                continue
-                
-            for entry in feed.entries[:20]:  # Limit to first 20 entries per feed
-                # Check if we've seen this link before
-                if entry.link in seen_links:
-                    continue
-                
-                # Check if the title contains any of our keywords
-                title = entry.title.lower()
-                if any(keyword in title for keyword in keywords):
-                    # Get summary/content
-                    summary = entry.get('summary', '')
-                    if not summary or len(summary) < 50:
-                        content = extract_content_from_url(entry.link)
-                    else:
-                        content = summary
-                    
-                    # Calculate relevance score
-                    relevance_score = calculate_relevance_score(entry.title, content, feed_url)
-                    
-                    articles.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'summary': content[:250] + "..." if len(content) > 250 else content,
-                        'source': feed_url,
-                        'published': entry.get('published', datetime.now().strftime('%Y-%m-%d')),
-                        'score': relevance_score
-                    })
-                    seen_links.add(entry.link)
-                    print(f"  Added: {entry.title} (Score: {relevance_score})")
-        except Exception as e:
-            print(f"Error parsing feed {feed_url}: {e}")
-    
-    return articles
+def source_bonus(source):
+    """Source weighting (prefer certain sources), see the weights in sources.py"""
+    return source.weight
 
-def select_top_articles(articles, max_articles=MAX_ARTICLES):
-    """Select the top N most relevant articles"""
-    # Sort by relevance score (descending)
-    sorted_articles = sorted(articles, key=lambda x: x['score'], reverse=True)
-    
-    # Return top N articles
-    return sorted_articles[:max_articles]
+def recency_bonus(published):
+    """Recency bonus (if we can parse the date)"""
+    if '2025' in published or '2024' in published:
+        return 2
+    return 0
 
-def generate_email_content(articles):
-    """Generate HTML email content from articles"""
-    if not articles:
-        return "<p>No relevant articles found today. Check back tomorrow!</p>"
+def score_articles(articles):
+    """Score a whole candidate set at once.
     
-    html_content = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }}
-            .header {{ background-color: #f8f9fa; padding: 20px; text-align: center; border-bottom: 2px solid #4CAF50; }}
-            .article {{ margin-bottom: 25px; padding: 15px; border-left: 4px solid #4CAF50; background-color: #f9f9f9; }}
-            .article h3 {{ margin-top: 0; color: #2c3e50; }}
-            .article a {{ color: #3498db; text-decoration: none; }}
-            .article a:hover {{ text-decoration: underline; }}
-            .meta {{ font-size: 0.9em; color: #7f8c8d; margin-bottom: 10px; }}
-            .score {{ float: right; background-color: #4CAF50; color: white; padding: 2px 8px; border-radius: 12px; font-size: 0.8em; }}
-            .footer {{ margin-top: 30px; padding: 15px; text-align: center; font-size: 0.9em; color: #7f8c8d; border-top: 1px solid #eee; }}
-            .source-badge {{ display: inline-block; padding: 3px 8px; border-radius: 4px; font-size: 0.8em; margin-right: 8px; }}
-            .source-arxiv {{ background-color: #b6e3ff; color: #005c9e; }}
-            .source-google {{ background-color: #fce8e6; color: #c5221f; }}
-            .source-esri {{ background-color: #e6f4ea; color: #137333; }}
-            .source-medium {{ background-color: #000; color: white; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>🌍 AI & GIS Daily Digest</h1>
-            <p>{datetime.now().strftime('%A, %B %d, %Y')}</p>
-            <p>Top {len(articles)} most relevant articles curated for you</p>
-        </div>
+    Builds title and content term matrices and combines them with the
+    RELEVANCE_WEIGHTS vectors; gives the same scores as calling
+    calculate_relevance_score() on each article.
     """
-    
-    for i, article in enumerate(articles, 1):
-        # Determine source type for styling
-        source_class = ""
-        source_name = "Other"
-        
-        if "arxiv" in article['source']:
-            source_class = "source-arxiv"
-            source_name = "arXiv"
-        elif "google" in article['source']:
-            source_class = "source-google"
-            source_name = "Google News"
-        elif "esri" in article['source']:
-            source_class = "source-esri"
-            source_name = "Esri"
-        elif "medium" in article['source'] or "towardsdatascience" in article['source']:
-            source_class = "source-medium"
-            source_name = "Blog"
-            
-        html_content += f"""
-        <div class="article">
-            <span class="score">Relevance: {article['score']}</span>
-            <h3>{i}. {article['title']}</h3>
-            <div class="meta">
-                <span class="source-badge {source_class}">{source_name}</span>
-                <strong>Published:</strong> {article['published']}
-            </div>
-            <p>{article['summary']}</p>
-            <p><a href="{article['link']}">📖 Read full article</a></p>
-        </div>
-        """
-    
-    html_content += f"""
-        <div class="footer">
-            <p>Curated from {len(articles)} most relevant articles found today</p>
-            <p>This digest was automatically generated for Giovanni Bwayo</p>
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
+    titles = TermMatrix([a['title'] for a in articles], RELEVANCE_MATCHER)
+    contents = TermMatrix([a['content'] for a in articles], RELEVANCE_MATCHER)
+    offsets = [source_bonus(a['source']) + recency_bonus(a['published']) for a in articles]
+    return weighted_sum([titles.dot(TITLE_WEIGHT_VECTOR), contents.dot(CONTENT_WEIGHT_VECTOR)], offsets)
 
-def send_email_smtp(content):
-    """Send email using SMTP"""
-    msg = MIMEMultipart("alternative")
-    msg['Subject'] = f"AI & GIS Daily Digest - {datetime.now().strftime('%Y-%m-%d')}"
-    msg['From'] = EMAIL_ADDRESS
-    msg['To'] = RECIPIENT_EMAIL
-    
-    msg.attach(MIMEText(content, "html"))
-    
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.send_message(msg)
-        print(f"{datetime.now()}: Email sent successfully to {RECIPIENT_EMAIL}")
-        return True
-    except Exception as e:
-        print(f"{datetime.now()}: Error sending email: {e}")
-        return False
+def score_upper_bound(candidate):
+    """Highest score an entry could get once its body is extracted"""
+    content_bound = MAX_CONTENT_SCORE if CONTENT_SCORE_BOUND is None else CONTENT_SCORE_BOUND
+    return (RELEVANCE_MATCHER.score(candidate['title'], field=0) + content_bound
+            + source_bonus(candidate['source']) + recency_bonus(candidate['published']))
+
+# ===== DIGEST =====
+class DailyProfile(ScoringProfile):
+    """AI & GIS relevance: entries whose title names a GIS or AI keyword"""
+
+    entries_per_source = 20  # Limit to first 20 entries per feed
+    min_summary_chars = 50
+    extract_chars = 250
+    summary_chars = 250
+
+    @property
+    def max_items(self):
+        return MAX_ARTICLES
+
+    def accept(self, entry, source):
+        # Check if the title contains any of our keywords
+        return TITLE_MATCHER.contains_any(entry.title)
+
+    def published(self, entry):
+        return entry.get('published', datetime.now().strftime('%Y-%m-%d'))
+
+    def score(self, candidates):
+        return score_articles(candidates)
+
+    def upper_bound(self, candidate):
+        return score_upper_bound(candidate)
+
+def email_context(articles):
+    """Template values shared by every recipient"""
+    return {"date": datetime.now().strftime('%A, %B %d, %Y'), "count": len(articles)}
+
+DIGEST = Digest("daily", sys.modules[__name__], DailyProfile(), EMAIL_TEMPLATE,
+                "AI & GIS Daily Digest - {date}", email_context, noun="articles",
+                shared=(settings, sources))
+
+def get_news():
+    """Fetch news from various sources based on AI and GIS keywords"""
+    return DIGEST.collect()
 
 def send_daily_digest():
     """Main function to fetch news and send email"""
-    print(f"{datetime.now()}: Starting to fetch AI & GIS news...")
-    
-    # Get news articles
-    articles = get_news()
-    print(f"{datetime.now()}: Found {len(articles)} potential articles")
-    
-    # Select top articles
-    top_articles = select_top_articles(articles)
-    print(f"{datetime.now()}: Selected top {len(top_articles)} articles")
-    
-    # Generate email content
-    email_content = generate_email_content(top_articles)
-    
-    # Send email
-    success = send_email_smtp(email_content)
-    
-    if success:
-        print(f"{datetime.now()}: Digest sent with {len(top_articles)} articles")
-    else:
-        print(f"{datetime.now()}: Failed to send digest")
+    return DIGEST.run()
 
 def run_once():
     """Run the digest once (for testing)"""
@@ -322,20 +235,4 @@ def run_once():
 
 # ===== MAIN EXECUTION =====
 if __name__ == "__main__":
-    print("AI & GIS Daily Digest System")
-    print("============================")
-    
-    # Run once immediately for testing
-    print("Running initial test...")
-    run_once()
-    
-    # Schedule daily at 8:00 AM
-    schedule.every().day.at("08:00").do(send_daily_digest)
-    
-    print("Scheduler started. Will run daily at 8:00 AM.")
-    print("Press Ctrl+C to exit.")
-    
-    # Keep the script running
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+    main([DIGEST], "AI & GIS Daily Digest System")
@@ -0,0 +1,120 @@
+"""Micro-benchmark: compiled KeywordMatcher vs the original per-term loops.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_keywords
+"""
+import random
+import timeit
+
+import ai_gis_digest
+import weekly_trends_digest
+from digest_engine.keyword_matcher import KeywordMatcher
+
+# ===== SAMPLE TEXTS =====
+TITLES = [
+    "New deep learning model maps flood risk with satellite imagery AI",
+    "Esri releases ArcGIS Pro update with GeoAI tools for remote sensing",
+    "How machine learning GIS workflows maintain accuracy at scale",
+    "Urban planning AI: emerging trends in spatial analysis for 2025",
+    "Computer vision GIS pipeline detects buildings from drone mapping",
+]
+CONTENTS = [
+    ("Researchers said the geospatial deep learning pipeline maintains accuracy while mapping "
+     "urban areas. The AI remote sensing approach combines satellite imagery with spatial "
+     "statistics to forecast land use change and market growth across the industry. ") * 2,
+    ("The latest report on artificial intelligence GIS adoption shows a shift in how agencies "
+     "maintain cartography datasets; innovation and development of spatial AI tools continue "
+     "to transform environmental monitoring AI programs worldwide. ") * 2,
+]
+
+# ===== ORIGINAL IMPLEMENTATIONS =====
+def legacy_relevance(title, content):
+    title = title.lower()
+    content = content.lower()
+    score = 0
+    for term in ai_gis_digest.HIGH_RELEVANCE_TERMS:
+        if term in title:
+            score += 10
+        if term in content:
+            score += 5
+    for term in ai_gis_digest.MEDIUM_RELEVANCE_TERMS:
+        if term in title:
+            score += 5
+        if term in content:
+            score += 2
+    for term in ai_gis_digest.GIS_TERMS + ai_gis_digest.AI_TERMS:
+        if term in title:
+            score += 3
+        if term in content:
+            score += 1
+    return score
+
+def legacy_weighted(weights):
+    terms = list(weights.items())
+
+    def score(title, content):
+        title = title.lower()
+        content = content.lower()
+        total = 0
+        for term, (title_weight, content_weight) in terms:
+            if term in title:
+                total += title_weight
+            if term in content:
+                total += content_weight
+        return total
+
+    return score
+
+def compiled_weighted(matcher):
+    def score(title, content):
+        return matcher.score(title, field=0) + matcher.score(content, field=1)
+
+    return score
+
+# ===== BENCHMARK =====
+def synthetic_weights(base, size, seed=7):
+    """Grow a term table to `size` terms with plausible one- to three-word terms"""
+    rng = random.Random(seed)
+    words = ("raster vector lidar sensor tile index model network cloud edge spectral "
+             "hyperspectral segmentation detection forecasting climate transit routing "
+             "elevation terrain parcel census mobility agriculture wildfire").split()
+    weights = dict(base)
+    while len(weights) < size:
+        term = " ".join(rng.sample(words, rng.choice((1, 2, 2, 3))))
+        weights[term] = (rng.randint(1, 5), rng.randint(1, 3))
+    return weights
+
+def time_per_call(fn, pairs, number):
+    def run():
+        for title, content in pairs:
+            fn(title, content)
+    seconds = min(timeit.repeat(run, number=number, repeat=5))
+    return seconds / (number * len(pairs)) * 1e6
+
+def main():
+    pairs = [(title, content) for title in TITLES for content in CONTENTS]
+
+    cases = [
+        ("daily relevance (current tables)", legacy_relevance,
+         compiled_weighted(ai_gis_digest.RELEVANCE_MATCHER), len(ai_gis_digest.RELEVANCE_WEIGHTS)),
+        ("weekly trend score (current tables)",
+         legacy_weighted(weekly_trends_digest.TREND_SCORE_WEIGHTS),
+         compiled_weighted(weekly_trends_digest.TREND_SCORE_MATCHER),
+         len(weekly_trends_digest.TREND_SCORE_WEIGHTS)),
+    ]
+    for size in (100, 250, 500, 1000):
+        weights = synthetic_weights(ai_gis_digest.RELEVANCE_WEIGHTS, size)
+        cases.append((f"synthetic table, {size} terms", legacy_weighted(weights),
+                      compiled_weighted(KeywordMatcher(weights)), size))
+
+    print(f"{'case':40} {'terms':>6} {'loops us':>10} {'matcher us':>11} {'speedup':>8}")
+    for name, legacy, compiled, terms in cases:
+        number = 200 if terms <= 100 else 40
+        legacy_us = time_per_call(legacy, pairs, number)
+        compiled_us = time_per_call(compiled, pairs, number)
+        print(f"{name:40} {terms:>6} {legacy_us:>10.1f} {compiled_us:>11.1f} "
+              f"{legacy_us / compiled_us:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""End-to-end benchmark of both digests against an offline fixture corpus.
+
+Feeds and article pages are replayed from local fixtures (see
+benchmarks/fixtures.py) and email delivery is swapped for a transport that
+only serializes the message, so runs are repeatable and need no network.
+Each stage is timed separately and the results are written as JSON.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_pipeline --feeds 200
+    python -m benchmarks.bench_pipeline --corpus .cache/fixtures/1k --repeat 3 --output results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import smtplib
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import ai_gis_digest
+import weekly_trends_digest
+from benchmarks import fixtures
+from digest_engine import digest as engine, mailer
+
+# ===== CONFIGURATION =====
+# Engine function or Digest method: stage name
+ENGINE_STAGES = {
+    "fetch_feeds": "feed_parse",
+    "extract_all": "extraction",
+}
+DIGEST_STAGES = {
+    "score": "scoring",
+    "select": "top_k",
+    "render": "render",
+    "build_message": "mime",
+}
+DIGESTS = {
+    "daily": ai_gis_digest,
+    "weekly": weekly_trends_digest,
+}
+
+# ===== OFFLINE SMTP =====
+class NullSMTP:
+    """smtplib.SMTP stand-in that serializes messages instead of sending them"""
+
+    sent_bytes = 0
+
+    def __init__(self, host="", port=0, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self, *args, **kwargs):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def noop(self):
+        return 250, b"OK"
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_message(self, msg, *args, **kwargs):
+        NullSMTP.sent_bytes += len(msg.as_bytes())
+        return {}
+
+class _NullSmtplib:
+    """smtplib with SMTP swapped for NullSMTP; the exception classes stay real"""
+
+    SMTP = NullSMTP
+
+    def __getattr__(self, name):
+        return getattr(smtplib, name)
+
+# ===== BENCHMARK =====
+@contextlib.contextmanager
+def instrumented(digest, timings):
+    """Wrap the engine functions and methods of a digest so each stage is timed"""
+    originals = {name: getattr(engine, name) for name in ENGINE_STAGES}
+
+    def timed(stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                entry = timings.setdefault(stage, {"seconds": 0.0, "calls": 0})
+                entry["seconds"] += time.perf_counter() - start
+                entry["calls"] += 1
+        return wrapper
+
+    real_smtplib = mailer.smtplib
+    try:
+        for name, fn in originals.items():
+            setattr(engine, name, timed(ENGINE_STAGES[name], fn))
+        for name, stage in DIGEST_STAGES.items():
+            setattr(digest, name, timed(stage, getattr(digest, name)))  # shadows the method
+        mailer.smtplib = _NullSmtplib()
+        yield
+    finally:
+        for name, fn in originals.items():
+            setattr(engine, name, fn)
+        for name in DIGEST_STAGES:
+            delattr(digest, name)
+        mailer.smtplib = real_smtplib
+
+def configure(module, manifest, cache_dir):
+    """Point a digest module at the corpus feeds and a private cache directory"""
+    module.SOURCES = fixtures.feed_sources(manifest)
+    module.FEED_CACHE_PATH = os.path.join(cache_dir, "feeds.json")
+    module.CONTENT_CACHE_PATH = os.path.join(cache_dir, "content.sqlite")
+    module.REDIRECT_CACHE_PATH = os.path.join(cache_dir, "redirects.sqlite")
+    module.HOST_HEALTH_PATH = os.path.join(cache_dir, "hosts.json")
+    module.HOST_RATE = None  # a few stub listeners stand in for hundreds of real hosts
+    module.ARTICLE_STORE_PATH = os.path.join(cache_dir, "articles.sqlite")
+    module.SEEN_FILTER_DIR = os.path.join(cache_dir, "seen")
+    module.METRICS_DIR = os.path.join(cache_dir, "metrics")
+    # A fresh spool per run: the outbox would otherwise skip a digest it already sent
+    module.OUTBOX_DIR = tempfile.mkdtemp(prefix="outbox-", dir=cache_dir)
+
+def run_digest(name, corpus_dir, manifest, cache_dir, verbose=False):
+    """Run one digest end to end and return its timings"""
+    module = DIGESTS[name]
+    configure(module, manifest, cache_dir)
+    adapter = fixtures.install(corpus_dir, manifest)
+    timings = {}
+    output = io.StringIO()
+    NullSMTP.sent_bytes = 0
+    try:
+        with instrumented(module.DIGEST, timings), \
+                contextlib.redirect_stdout(sys.stdout if verbose else output):
+            start = time.perf_counter()
+            module.DIGEST.run()
+            total = time.perf_counter() - start
+    finally:
+        fixtures.uninstall()
+
+    return {
+        "digest": name,
+        "total_seconds": round(total, 6),
+        "stages": {stage: {"seconds": round(t["seconds"], 6), "calls": t["calls"]}
+                   for stage, t in timings.items()},
+        "http_requests": adapter.requests,
+        "http_bytes": adapter.bytes_served,
+        "email_bytes": NullSMTP.sent_bytes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="fixture corpus directory (default: generate one)")
+    parser.add_argument("--feeds", type=int, default=100, help="feeds in a generated corpus")
+    parser.add_argument("--entries", type=int, default=20, help="entries per generated feed")
+    parser.add_argument("--digest", choices=["daily", "weekly", "both"], default="both")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--warm", action="store_true",
+                        help="keep feed/content caches between repeats (default: every run is cold)")
+    parser.add_argument("--output", default="-", help="JSON results file (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="show the digests' own output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        corpus_dir = args.corpus
+        if corpus_dir is None:
+            corpus_dir = os.path.join(scratch, "corpus")
+            fixtures.generate_corpus(corpus_dir, args.feeds, args.entries)
+        manifest = fixtures.load_manifest(corpus_dir)
+
+        runs = []
+        digests = ["daily", "weekly"] if args.digest == "both" else [args.digest]
+        for repeat in range(args.repeat):
+            for name in digests:
+                cache_dir = os.path.join(scratch, "cache" if args.warm else f"cache-{name}-{repeat}")
+                os.makedirs(cache_dir, exist_ok=True)
+                result = run_digest(name, corpus_dir, manifest, cache_dir, args.verbose)
+                result["repeat"] = repeat
+                runs.append(result)
+                stages = ", ".join(f"{stage} {t['seconds']:.3f}s" for stage, t in result["stages"].items())
+                print(f"{name} #{repeat}: {result['total_seconds']:.3f}s ({stages})", file=sys.stderr)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "path": args.corpus or "generated",
+            "kind": manifest.get("kind"),
+            "feeds": len(manifest["feeds"]),
+            "responses": len(manifest["responses"]),
+        },
+        "warm": args.warm,
+        "runs": runs,
+    }
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Recorded and synthetic HTTP fixtures for offline benchmarks.
+
+A corpus is a directory holding a manifest.json and one file per
+response. FixtureAdapter replays it through the shared http_client
+session, so feed and article downloads never leave the machine.
+
+Generate a synthetic corpus, or record the live feeds the digests use:
+
+    python -m benchmarks.fixtures generate --feeds 1000 --entries 20 --out .cache/fixtures/1k
+    python -m benchmarks.fixtures record --out .cache/fixtures/live
+"""
+import argparse
+import hashlib
+import io
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from urllib.parse import urlparse
+
+import feedparser
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from digest_engine import SourceRegistry, http_client
+
+# ===== CONFIGURATION =====
+MANIFEST = "manifest.json"
+FEED_HOSTS = 50          # Synthetic feeds are spread over this many hosts
+ARTICLE_HOSTS = 200      # Synthetic articles are spread over this many hosts
+SHORT_SUMMARY_RATIO = 0.4  # Share of entries whose summary is too short and needs extraction
+OLD_ENTRY_RATIO = 0.1    # Share of entries dated 2023 (skipped by the weekly digest)
+DESCRIPTION_RATIO = 0.5  # Share of article pages with a <meta name="description">
+ARTICLE_KB = 40          # Approximate size of a synthetic article page
+SYNTHETIC_NOW = datetime(2025, 10, 6, 8, 0, tzinfo=timezone.utc)  # "Today" for synthetic dates
+RECORD_ARTICLES = 20     # Article pages recorded per live feed
+
+# ===== VOCABULARY =====
+TOPIC_WORDS = [
+    "AI", "GIS", "geospatial", "machine learning", "deep learning", "spatial",
+    "remote sensing", "satellite imagery", "computer vision", "mapping", "cartography",
+    "artificial intelligence", "drone mapping", "urban planning", "neural network",
+]
+TREND_WORDS = [
+    "trend", "development", "advance", "innovation", "emerging", "future", "2025",
+    "outlook", "breakthrough", "new", "latest", "report", "study", "forecast",
+    "transform", "growth", "market", "industry", "adoption", "shift",
+]
+FILLER_WORDS = (
+    "the a of for with across how why teams data cities models tools agencies "
+    "platform workflow accuracy scale open source cloud research project update "
+    "analysis field survey network global local region climate water energy"
+).split()
+
+# ===== CORPUS =====
+def _url_path(url):
+    """Return a stable file name for a URL"""
+    return hashlib.sha1(url.encode()).hexdigest()[:16]
+
+def _write(out_dir, manifest, url, body, content_type):
+    name = _url_path(url)
+    with open(os.path.join(out_dir, "responses", name), "wb") as f:
+        f.write(body)
+    manifest["responses"][url] = {
+        "path": name,
+        "content_type": content_type,
+        "etag": '"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+    }
+
+def _save_manifest(out_dir, manifest):
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f)
+
+def _sentence(rng, topic_share):
+    words = []
+    for _ in range(rng.randint(8, 16)):
+        pool = TOPIC_WORDS if rng.random() < topic_share else TREND_WORDS if rng.random() < 0.2 else FILLER_WORDS
+        words.append(rng.choice(pool))
+    return " ".join(words).capitalize() + "."
+
+def _title(rng):
+    topic = rng.random() < 0.7  # ~30% of titles fail the daily title filter
+    words = [rng.choice(TOPIC_WORDS)] if topic else []
+    words += rng.sample(TREND_WORDS, rng.randint(0, 2))
+    words += rng.sample(FILLER_WORDS, rng.randint(3, 7))
+    rng.shuffle(words)
+    return " ".join(words).capitalize()
+
+def paragraph_pool(rng, size=500):
+    """Article paragraphs shared by many pages, so generation stays fast"""
+    return ["<p>" + " ".join(_sentence(rng, 0.15) for _ in range(5)) + "</p>" for _ in range(size)]
+
+def synthetic_entry(rng, link, now=SYNTHETIC_NOW):
+    """Return a feed item dict (title, link, summary, published) for `link`"""
+    if rng.random() < SHORT_SUMMARY_RATIO:
+        summary = rng.choice(["", _sentence(rng, 0.3)[:40]])
+    else:
+        summary = " ".join(_sentence(rng, 0.3) for _ in range(rng.randint(2, 5)))
+    published = now - timedelta(hours=rng.randint(1, 24 * 14))
+    if rng.random() < OLD_ENTRY_RATIO:
+        published = published.replace(year=2023)
+    return {"title": _title(rng), "link": link, "summary": summary,
+            "published": format_datetime(published)}
+
+def synthetic_article(rng, title, size_kb, paragraphs):
+    """Return an article page of about `size_kb` with page chrome around the text"""
+    head = ["<!DOCTYPE html><html><head><meta charset=\"utf-8\">", f"<title>{title}</title>"]
+    if rng.random() < DESCRIPTION_RATIO:
+        head.append(f'<meta name="description" content="{_sentence(rng, 0.3)} {_sentence(rng, 0.3)}">')
+    head.append("<style>" + "body{margin:0} .nav a{color:#333} " * 40 + "</style>")
+    head.append("<script>" + "window.dataLayer=window.dataLayer||[];" * 60 + "</script></head>")
+    body = ["<body><header><nav class=\"nav\">" + "<a href=\"/\">Home</a> " * 30 + "</nav></header>",
+            f"<article><h1>{title}</h1>"]
+    size = sum(len(part) for part in head + body)
+    while size < size_kb * 1024:
+        paragraph = rng.choice(paragraphs)
+        body.append(paragraph)
+        size += len(paragraph)
+    body.append("</article><footer>" + "<a href=\"/about\">About</a> " * 20 + "</footer></body></html>")
+    return "".join(head + body).encode()
+
+def rss_document(title, link, items):
+    """Return an RSS 2.0 document for a list of feed item dicts"""
+    parts = [f"<?xml version=\"1.0\" encoding=\"utf-8\"?><rss version=\"2.0\"><channel>"
+             f"<title>{title}</title><link>{link}</link><description>{title}</description>"]
+    for item in items:
+        parts.append(
+            f"<item><title>{item['title']}</title><link>{item['link']}</link>"
+            f"<description>{item['summary']}</description><pubDate>{item['published']}</pubDate>"
+            f"<guid>{item['link']}</guid></item>"
+        )
+    parts.append("</channel></rss>")
+    return "".join(parts).encode()
+
+def generate_corpus(out_dir, feeds=100, entries=20, article_kb=ARTICLE_KB, seed=1):
+    """Write a synthetic corpus of `feeds` RSS feeds with `entries` items each"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(out_dir, "responses"), exist_ok=True)
+    manifest = {"kind": "synthetic", "seed": seed, "feeds": [], "responses": {}}
+    paragraphs = paragraph_pool(rng)
+
+    for f in range(feeds):
+        feed_url = f"https://feeds{f % FEED_HOSTS}.example.test/feed/{f}.xml"
+        items = []
+        for e in range(entries):
+            item = synthetic_entry(rng, f"https://news{rng.randrange(ARTICLE_HOSTS)}.example.test/{f}/{e}.html")
+            items.append(item)
+            _write(out_dir, manifest, item["link"],
+                   synthetic_article(rng, item["title"], article_kb, paragraphs), "text/html; charset=utf-8")
+        _write(out_dir, manifest, feed_url, rss_document(f"Fixture feed {f}", feed_url, items),
+               "application/rss+xml; charset=utf-8")
+        manifest["feeds"].append(feed_url)
+
+    _save_manifest(out_dir, manifest)
+    return manifest
+
+def record_corpus(out_dir, feed_urls, articles_per_feed=RECORD_ARTICLES):
+    """Download live feeds and their first article pages into a corpus"""
+    os.makedirs(os.path.join(out_dir, "responses"), exist_ok=True)
+    manifest = {"kind": "recorded", "recorded": datetime.now().isoformat(), "feeds": [], "responses": {}}
+
+    for feed_url in feed_urls:
+        try:
+            response = http_client.get(feed_url)
+            response.raise_for_status()
+            feed = feedparser.parse(response.content)
+            _write(out_dir, manifest, feed_url, response.content,
+                   response.headers.get("Content-Type", "application/rss+xml"))
+            manifest["feeds"].append(feed_url)
+            print(f"Recorded feed {feed_url} ({len(feed.entries)} entries)")
+        except Exception as e:
+            print(f"Error recording feed {feed_url}: {e}")
+            continue
+
+        for entry in feed.entries[:articles_per_feed]:
+            link = entry.get("link")
+            if not link or link in manifest["responses"]:
+                continue
+            try:
+                page = http_client.get(link)
+                page.raise_for_status()
+                _write(out_dir, manifest, link, page.content, page.headers.get("Content-Type", "text/html"))
+            except Exception as e:
+                print(f"  Error recording article {link}: {e}")
+
+    _save_manifest(out_dir, manifest)
+    return manifest
+
+def load_manifest(corpus_dir):
+    with open(os.path.join(corpus_dir, MANIFEST)) as f:
+        return json.load(f)
+
+# ===== REPLAY =====
+class FixtureAdapter(BaseAdapter):
+    """requests transport adapter that answers from a fixture corpus.
+
+    Unknown URLs get a 404. Conditional requests matching the stored ETag
+    get a 304, like a well-behaved origin.
+    """
+
+    def __init__(self, corpus_dir, manifest=None):
+        super().__init__()
+        self.corpus_dir = corpus_dir
+        self.manifest = manifest or load_manifest(corpus_dir)
+        self.requests = 0
+        self.bytes_served = 0
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        self.requests += 1
+        fixture = self.manifest["responses"].get(request.url)
+        headers = CaseInsensitiveDict()
+        body = b""
+        if fixture is None:
+            status = 404
+        elif request.headers.get("If-None-Match") == fixture["etag"]:
+            status = 304
+            headers["ETag"] = fixture["etag"]
+        else:
+            status = 200
+            with open(os.path.join(self.corpus_dir, "responses", fixture["path"]), "rb") as f:
+                body = f.read()
+            headers["Content-Type"] = fixture["content_type"]
+            headers["ETag"] = fixture["etag"]
+        headers["Content-Length"] = str(len(body))
+        self.bytes_served += len(body)
+
+        response = Response()
+        response.status_code = status
+        response.reason = {200: "OK", 304: "Not Modified", 404: "Not Found"}[status]
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+def install(corpus_dir, manifest=None):
+    """Route every http(s) request of the shared session to a corpus"""
+    adapter = FixtureAdapter(corpus_dir, manifest)
+    session = http_client.get_session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return adapter
+
+def uninstall():
+    """Go back to real network access"""
+    http_client.reset_session()
+
+def feed_sources(manifest):
+    """Source registry reading the feeds of a corpus into both digests"""
+    types = ["blog", "news", "corporate", "gis", "academic"]
+    sources = SourceRegistry()
+    for i, url in enumerate(manifest["feeds"]):
+        sources.add(url, f"Fixture {urlparse(url).netloc}{urlparse(url).path}", type=types[i % len(types)],
+                    digests=["daily", "weekly"])
+    return sources
+
+# ===== MAIN EXECUTION =====
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    generate = commands.add_parser("generate", help="write a synthetic corpus")
+    generate.add_argument("--out", required=True)
+    generate.add_argument("--feeds", type=int, default=100)
+    generate.add_argument("--entries", type=int, default=20)
+    generate.add_argument("--article-kb", type=int, default=ARTICLE_KB)
+    generate.add_argument("--seed", type=int, default=1)
+    record = commands.add_parser("record", help="record the live feeds of both digests")
+    record.add_argument("--out", required=True)
+    record.add_argument("--articles", type=int, default=RECORD_ARTICLES)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        manifest = generate_corpus(args.out, args.feeds, args.entries, args.article_kb, args.seed)
+    else:
+        from sources import SOURCES
+        urls = SOURCES.urls()
+        manifest = record_corpus(args.out, urls, args.articles)
+    print(f"{len(manifest['feeds'])} feeds, {len(manifest['responses'])} responses in {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""End-to-end load test of both digests against local stand-in servers.
+
+Starts the stub HTTP server (benchmarks/stub_server.py) and the SMTP sink
+(benchmarks/smtp_sink.py), points both digests and test_digest.run_tests
+at them through their configuration constants, runs everything and checks
+the delivered mail. Nothing touches the network.
+
+    python -m benchmarks.load_test --feeds 1000 --latency 0.02 --failure-rate 0.01
+    python -m benchmarks.load_test --feeds 10000 --runs 2 --max-seconds 600 --output load.json
+    python -m benchmarks.load_test --feeds 50 --subscribers 500 --personalize --smtp-defer-rate 0.05
+
+Exits non-zero when a check fails.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import ai_gis_digest
+from digest_engine import SourceRegistry, http_client
+import test_digest
+import weekly_trends_digest
+from benchmarks.smtp_sink import SMTPSink
+from benchmarks.stub_server import StubHTTPHarness, StubSettings
+
+# ===== CONFIGURATION =====
+SOURCE_TYPES = ["blog", "news", "corporate", "gis", "academic"]
+
+# ===== FUNCTIONS =====
+def configure(http, sink, feeds, cache_dir, subscribers=1, personalize=False):
+    """Point both digests and the smoke tests at the local servers"""
+    feed_urls = http.feed_urls(feeds)
+    for module in (ai_gis_digest, weekly_trends_digest, test_digest):
+        module.SMTP_SERVER = sink.host
+        module.SMTP_PORT = sink.port
+        module.SMTP_STARTTLS = False
+
+    for module in (ai_gis_digest, weekly_trends_digest):
+        module.RECIPIENTS = {f"subscriber{n}@example.com": f"Subscriber {n}" for n in range(subscribers)}
+        module.PERSONALIZE = personalize
+
+    sources = SourceRegistry()
+    for n, url in enumerate(feed_urls):
+        sources.add(url, f"Stub feed {n}", type=SOURCE_TYPES[n % len(SOURCE_TYPES)], digests=["daily", "weekly"])
+    for module in (ai_gis_digest, weekly_trends_digest):
+        module.SOURCES = sources
+    test_digest.TEST_FEEDS = feed_urls[:2]
+    test_digest.TEST_URLS = [http.base_url(0) + "/article/0/0.html"]
+
+    for module in (ai_gis_digest, weekly_trends_digest):
+        module.FEED_CACHE_PATH = os.path.join(cache_dir, "feeds.json")
+        module.CONTENT_CACHE_PATH = os.path.join(cache_dir, "content.sqlite")
+        module.REDIRECT_CACHE_PATH = os.path.join(cache_dir, "redirects.sqlite")
+        module.HOST_HEALTH_PATH = os.path.join(cache_dir, "hosts.json")
+        module.HOST_RATE = None  # a few stub listeners stand in for hundreds of real hosts
+        module.ARTICLE_STORE_PATH = os.path.join(cache_dir, "articles.sqlite")
+        module.SEEN_FILTER_DIR = os.path.join(cache_dir, "seen")
+        module.METRICS_DIR = os.path.join(cache_dir, "metrics")
+    http_client.reset_session()
+
+def run_step(name, fn, sink, verbose):
+    """Run one entry point and return its timing and the mail it delivered"""
+    before = len(sink.messages)
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if verbose else output):
+        result = fn()
+    seconds = time.perf_counter() - start
+    delivered = sink.messages[before:]
+    return {
+        "step": name,
+        "seconds": round(seconds, 3),
+        "result": result,
+        "messages": len(delivered),
+        "recipients": sum(len(m.rcpt_tos) for m in delivered),
+        "subjects": [m.subject for m in delivered],
+        "message_bytes": sum(len(m.data) for m in delivered),
+    }
+
+def check(results, max_seconds, subscribers):
+    """Return a list of failed checks"""
+    failures = []
+    expected = {
+        "daily": "AI & GIS Daily Digest",
+        "weekly": "GIS & AI Weekly Trends",
+        "run_tests": "Test: AI & GIS Daily Digest System",
+    }
+    for step in results:
+        subject = expected[step["step"]]
+        recipients = 1 if step["step"] == "run_tests" else subscribers
+        if step["recipients"] != recipients or any(subject not in s for s in step["subjects"]):
+            failures.append(f"{step['step']} (run {step['run']}): expected '{subject}' for {recipients} "
+                            f"recipient(s), got {step['recipients']} recipient(s) of {set(step['subjects'])}")
+        if step["step"] == "run_tests" and step["result"] is not True:
+            failures.append(f"run_tests (run {step['run']}) reported failure")
+        if max_seconds is not None and step["seconds"] > max_seconds:
+            failures.append(f"{step['step']} (run {step['run']}) took {step['seconds']}s > {max_seconds}s")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feeds", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=20)
+    parser.add_argument("--article-kb", type=int, default=40)
+    parser.add_argument("--hosts", type=int, default=8, help="stub listeners (distinct hosts)")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--no-etag", action="store_true", help="stub server never answers 304")
+    parser.add_argument("--runs", type=int, default=1, help="later runs exercise the caches and 304s")
+    parser.add_argument("--subscribers", type=int, default=1, help="recipients of each digest")
+    parser.add_argument("--personalize", action="store_true", help="one message per subscriber")
+    parser.add_argument("--smtp-defer-rate", type=float, default=0.0, help="share of messages the sink answers with 451")
+    parser.add_argument("--smtp-max-recipients", type=int, default=0, help="RCPTs the sink accepts per message")
+    parser.add_argument("--max-seconds", type=float, help="fail any step slower than this")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="show the digests' own output")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency, args.jitter, args.failure_rate, args.entries,
+                            args.article_kb, honor_etag=not args.no_etag)
+    steps = [
+        ("daily", ai_gis_digest.send_daily_digest),
+        ("weekly", weekly_trends_digest.send_weekly_trends_digest),
+        ("run_tests", test_digest.run_tests),
+    ]
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            StubHTTPHarness(args.hosts, settings) as http, \
+            SMTPSink(defer_rate=args.smtp_defer_rate, max_recipients=args.smtp_max_recipients) as sink:
+        configure(http, sink, args.feeds, cache_dir, args.subscribers, args.personalize)
+        for run in range(args.runs):
+            # A fresh spool per run: the outbox would otherwise skip a digest it already sent
+            for module in (ai_gis_digest, weekly_trends_digest):
+                module.OUTBOX_DIR = os.path.join(cache_dir, f"outbox-{run}", module.__name__)
+            for name, fn in steps:
+                step = run_step(name, fn, sink, args.verbose)
+                step["run"] = run
+                results.append(step)
+                print(f"{name} #{run}: {step['seconds']:.2f}s, {step['messages']} message(s) "
+                      f"to {step['recipients']} recipient(s)", file=sys.stderr)
+        http_stats = dict(http.stats)
+        smtp_stats = dict(sink.stats)
+    http_client.reset_session()
+
+    failures = check(results, args.max_seconds, args.subscribers)
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "settings": vars(args),
+        "steps": results,
+        "http": http_stats,
+        "smtp": smtp_stats,
+        "failures": failures,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    for failure in failures:
+        print(f"FAILED: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
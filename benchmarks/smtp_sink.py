@@ -0,0 +1,205 @@
+"""Local SMTP sink that accepts and records every message it is sent.
+
+Speaks enough SMTP for smtplib: EHLO/HELO, AUTH PLAIN/LOGIN (any
+credentials), MAIL, RCPT, DATA, RSET, NOOP and QUIT. STARTTLS is refused,
+so point the digests at it with SMTP_STARTTLS = False. It can also defer
+a share of messages with 451 and cap recipients per message with 452, to
+exercise the mailer's retries.
+
+    python -m benchmarks.smtp_sink --port 2525 --save-dir .cache/outbox-sink
+"""
+import argparse
+import os
+import random
+import socketserver
+import threading
+import time
+from email import message_from_bytes
+from email import policy
+
+# ===== CONFIGURATION =====
+DEFAULT_PORT = 2525
+MAX_LINE = 64 * 1024
+
+# ===== SERVER =====
+class ReceivedMessage:
+    """One accepted message: envelope plus raw content"""
+
+    def __init__(self, mail_from, rcpt_tos, data):
+        self.mail_from = mail_from
+        self.rcpt_tos = rcpt_tos
+        self.data = data
+        self.received = time.time()
+
+    @property
+    def message(self):
+        return message_from_bytes(self.data, policy=policy.default)
+
+    @property
+    def subject(self):
+        return self.message["Subject"]
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def readline(self):
+        line = self.rfile.readline(MAX_LINE)
+        if not line:
+            raise ConnectionError("client closed the connection")
+        return line.rstrip(b"\r\n").decode("utf-8", "replace")
+
+    def handle(self):
+        sink = self.server.sink
+        sink.count("connections")
+        self.reply("220 localhost SMTP sink ready")
+        mail_from, rcpt_tos = None, []
+        try:
+            while True:
+                line = self.readline()
+                verb, _, arg = line.partition(" ")
+                verb = verb.upper()
+                if verb == "EHLO":
+                    self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SIZE 52428800\r\n")
+                elif verb == "HELO":
+                    self.reply("250 localhost")
+                elif verb == "AUTH":
+                    if arg.upper().startswith("LOGIN"):
+                        parts = arg.split()
+                        if len(parts) < 2:
+                            self.reply("334 VXNlcm5hbWU6")
+                            self.readline()
+                        self.reply("334 UGFzc3dvcmQ6")
+                        self.readline()
+                    elif arg.upper() == "PLAIN":
+                        self.reply("334 ")
+                        self.readline()
+                    self.reply("235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from, rcpt_tos = arg.partition(":")[2].strip().split(" ")[0].strip("<>"), []
+                    self.reply("250 OK")
+                elif verb == "RCPT":
+                    if sink.max_recipients and len(rcpt_tos) >= sink.max_recipients:
+                        sink.count("deferred")
+                        self.reply("452 4.5.3 Too many recipients")
+                        continue
+                    rcpt_tos.append(arg.partition(":")[2].strip().strip("<>"))
+                    self.reply("250 OK")
+                elif verb == "DATA":
+                    if not rcpt_tos:
+                        self.reply("503 5.5.1 RCPT first")
+                        continue
+                    self.reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        raw = self.rfile.readline(MAX_LINE)
+                        if not raw or raw in (b".\r\n", b".\n"):
+                            break
+                        lines.append(raw[1:] if raw.startswith(b"..") else raw)
+                    if sink.defer():
+                        self.reply("451 4.3.0 Try again later")
+                    else:
+                        sink.record(ReceivedMessage(mail_from, rcpt_tos, b"".join(lines)))
+                        self.reply("250 OK: queued")
+                    mail_from, rcpt_tos = None, []
+                elif verb == "RSET":
+                    mail_from, rcpt_tos = None, []
+                    self.reply("250 OK")
+                elif verb == "NOOP":
+                    self.reply("250 OK")
+                elif verb == "QUIT":
+                    self.reply("221 Bye")
+                    return
+                elif verb == "STARTTLS":
+                    self.reply("454 4.7.0 TLS not available")
+                else:
+                    self.reply("502 5.5.2 Command not recognized")
+        except ConnectionError:
+            pass
+
+class _ThreadingSMTPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class SMTPSink:
+    """Threaded SMTP server that keeps every received message in memory"""
+
+    def __init__(self, port=0, bind="127.0.0.1", save_dir=None, defer_rate=0.0, max_recipients=0, seed=None):
+        self.server = _ThreadingSMTPServer((bind, port), _SMTPHandler)
+        self.server.sink = self
+        self.save_dir = save_dir
+        self.defer_rate = defer_rate          # Share of messages answered with 451
+        self.max_recipients = max_recipients  # RCPTs accepted per message (0 = unlimited)
+        self.messages = []
+        self.stats = {"connections": 0, "messages": 0, "recipients": 0, "deferred": 0}
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+
+    def defer(self):
+        with self._lock:
+            if self.defer_rate and self._random.random() < self.defer_rate:
+                self.stats["deferred"] += 1
+                return True
+            return False
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def record(self, received):
+        with self._lock:
+            self.messages.append(received)
+            self.stats["messages"] += 1
+            self.stats["recipients"] += len(received.rcpt_tos)
+            number = self.stats["messages"]
+        if self.save_dir:
+            os.makedirs(self.save_dir, exist_ok=True)
+            with open(os.path.join(self.save_dir, f"{number:06d}.eml"), "wb") as f:
+                f.write(received.data)
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# ===== MAIN EXECUTION =====
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--save-dir", help="also write every message as a numbered .eml file")
+    parser.add_argument("--defer-rate", type=float, default=0.0, help="share of messages answered with 451")
+    parser.add_argument("--max-recipients", type=int, default=0, help="RCPTs accepted per message (0 = unlimited)")
+    args = parser.parse_args()
+
+    with SMTPSink(args.port, save_dir=args.save_dir, defer_rate=args.defer_rate,
+                  max_recipients=args.max_recipients) as sink:
+        print(f"SMTP sink listening on {sink.host}:{sink.port}. Press Ctrl+C to exit.")
+        seen = 0
+        try:
+            while True:
+                time.sleep(1)
+                for received in sink.messages[seen:]:
+                    print(f"{received.mail_from} -> {', '.join(received.rcpt_tos)}: {received.subject}")
+                seen = len(sink.messages)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Local HTTP server with synthetic feeds and article pages for load tests.
+
+Content is generated on the fly from the request path, so any number of
+feeds can be served without a corpus on disk. Latency, failure rate,
+sizes and 304 behaviour are configurable. Several listeners (one per
+port) stand in for different hosts, so per-host limits behave as they
+would against real sites.
+
+    python -m benchmarks.stub_server --hosts 4 --latency 0.05 --failure-rate 0.02
+
+Feeds are served at /feed/<n>.xml and articles at /article/<feed>/<entry>.html.
+"""
+import argparse
+import hashlib
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks import fixtures
+
+# ===== CONFIGURATION =====
+DEFAULT_HOSTS = 4           # Listeners (distinct host:port pairs) to start
+DEFAULT_LATENCY = 0.0       # Seconds added before every response
+DEFAULT_JITTER = 0.0        # Extra random latency, uniform in [0, jitter]
+DEFAULT_FAILURE_RATE = 0.0  # Share of requests answered with a 503
+DEFAULT_ENTRIES = 20        # Items per feed
+DEFAULT_ARTICLE_KB = 40     # Approximate article page size
+FEED_PATH = re.compile(r"^/feed/(\d+)\.xml$")
+ARTICLE_PATH = re.compile(r"^/article/(\d+)/(\d+)\.html$")
+
+# ===== SERVER =====
+class StubSettings:
+    """Behaviour shared by all listeners; may be changed while running"""
+
+    def __init__(self, latency=DEFAULT_LATENCY, jitter=DEFAULT_JITTER,
+                 failure_rate=DEFAULT_FAILURE_RATE, entries=DEFAULT_ENTRIES,
+                 article_kb=DEFAULT_ARTICLE_KB, honor_etag=True, version=0, seed=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.entries = entries
+        self.article_kb = article_kb
+        self.honor_etag = honor_etag
+        self.version = version  # bump to make every feed "change"
+        self.seed = seed
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        harness = self.server.harness
+        settings = harness.settings
+        harness.count("requests")
+        delay = settings.latency + random.uniform(0, settings.jitter)
+        if delay:
+            time.sleep(delay)
+        if random.random() < settings.failure_rate:
+            harness.count("failures")
+            return self._respond(503, b"", "text/plain")
+
+        feed = FEED_PATH.match(self.path)
+        article = ARTICLE_PATH.match(self.path)
+        if feed:
+            body, content_type = harness.feed(int(feed.group(1))), "application/rss+xml; charset=utf-8"
+        elif article:
+            body, content_type = harness.article(self.path), "text/html; charset=utf-8"
+        else:
+            return self._respond(404, b"", "text/plain")
+
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        if settings.honor_etag and self.headers.get("If-None-Match") == etag:
+            harness.count("not_modified")
+            return self._respond(304, b"", None, etag)
+        harness.count("bytes", len(body))
+        self._respond(200, body, content_type, etag)
+
+    def _respond(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that stop reading early (streaming extraction) just hang up
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+class StubHTTPHarness:
+    """A set of local listeners serving synthetic feeds and articles"""
+
+    def __init__(self, hosts=DEFAULT_HOSTS, settings=None, bind="127.0.0.1"):
+        self.settings = settings or StubSettings()
+        self.stats = {"requests": 0, "failures": 0, "not_modified": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._paragraphs = fixtures.paragraph_pool(random.Random(self.settings.seed))
+        self.servers = []
+        for _ in range(hosts):
+            server = _StubServer((bind, 0), _Handler)
+            server.harness = self
+            self.servers.append(server)
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def base_url(self, n):
+        """URL prefix of the listener that serves feed or article number n"""
+        host, port = self.servers[n % len(self.servers)].server_address
+        return f"http://{host}:{port}"
+
+    def feed_url(self, n):
+        return f"{self.base_url(n)}/feed/{n}.xml"
+
+    def feed_urls(self, count):
+        return [self.feed_url(n) for n in range(count)]
+
+    def feed(self, n):
+        settings = self.settings
+        rng = random.Random(f"{settings.seed}:{settings.version}:feed:{n}")
+        items = [fixtures.synthetic_entry(rng, f"{self.base_url(n + e + 1)}/article/{n}/{e}.html")
+                 for e in range(settings.entries)]
+        return fixtures.rss_document(f"Stub feed {n}", self.feed_url(n), items)
+
+    def article(self, path):
+        rng = random.Random(f"{self.settings.seed}:article:{path}")
+        return fixtures.synthetic_article(rng, f"Stub article {path}", self.settings.article_kb,
+                                          self._paragraphs)
+
+    def start(self):
+        for server in self.servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+# ===== MAIN EXECUTION =====
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=DEFAULT_HOSTS)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER)
+    parser.add_argument("--failure-rate", type=float, default=DEFAULT_FAILURE_RATE)
+    parser.add_argument("--entries", type=int, default=DEFAULT_ENTRIES)
+    parser.add_argument("--article-kb", type=int, default=DEFAULT_ARTICLE_KB)
+    parser.add_argument("--no-etag", action="store_true", help="never answer 304")
+    args = parser.parse_args()
+
+    settings = StubSettings(args.latency, args.jitter, args.failure_rate, args.entries,
+                            args.article_kb, honor_etag=not args.no_etag)
+    with StubHTTPHarness(args.hosts, settings) as harness:
+        for n in range(len(harness.servers)):
+            print(f"Serving feeds at {harness.base_url(n)}/feed/<n>.xml")
+        print("Press Ctrl+C to exit.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Engine shared by the digest scripts.
+
+A digest is a configuration of this engine: sources from a SourceRegistry,
+a ScoringProfile, email templates and delivery settings, run by Digest.
+Feeds and articles go through shared caches, so a URL read by several
+digests is downloaded once per freshness window.
+"""
+from .digest import Digest
+from .profile import ScoringProfile
+from .registry import Source, SourceRegistry
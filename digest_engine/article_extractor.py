@@ -0,0 +1,272 @@
+import codecs
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+
+import requests
+from bs4 import BeautifulSoup
+
+from . import http_client
+from . import metrics
+from .host_health import HostUnavailable, host_of, submit_by_host
+from .urls import canonical_url
+
+# ===== CONFIGURATION =====
+DEFAULT_WORKERS = 8            # Parallel article downloads
+DEFAULT_DEADLINE = 60          # Seconds allowed for all extractions in one run
+UNAVAILABLE = "Content not available"
+SKIPPED_TAGS = ("script", "style", "nav", "footer", "header", "aside")
+STREAM_SKIPPED_TAGS = SKIPPED_TAGS + ("head", "title", "noscript", "template")
+
+STREAM_MAX_BYTES = 256 * 1024  # Hard cap on bytes read per article in stream mode
+STREAM_CHUNK_SIZE = 16 * 1024  # Bytes fed to the parser at a time
+STREAM_TEXT_CHARS = 1000       # Stop reading once this much body text is collected
+MIN_DESCRIPTION_CHARS = 50     # Shorter meta descriptions are ignored
+
+# Cached downloads in progress in this process: canonical URL -> Event set when done
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# ===== FUNCTIONS =====
+def download_html(url, timeout=None, redirects=None):
+    """Download a page through the shared HTTP session and return its raw body.
+
+    Raises requests.HTTPError for a non-2xx response.
+    """
+    response = http_client.get(url, timeout=timeout)
+    response.raise_for_status()
+    metrics.inc("http_bytes_total", len(response.content), kind="article")
+    if redirects is not None:
+        redirects.learn(url, response.url)
+    return response.content
+
+def clean_text(text):
+    """Collapse the whitespace of extracted page text"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+def html_to_text(html, max_chars=None):
+    """Strip page chrome from an HTML document and return its cleaned text"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    # Remove unwanted elements
+    for element in soup(SKIPPED_TAGS):
+        element.decompose()
+
+    return truncate_text(clean_text(soup.get_text()), max_chars)
+
+def truncate_text(text, max_chars=None):
+    """Cut text to `max_chars`, marking the cut with an ellipsis"""
+    if max_chars is not None and len(text) > max_chars:
+        return text[:max_chars] + "..."
+    return text
+
+class _StreamingTextParser(HTMLParser):
+    """Incremental HTML parser that collects body text and meta descriptions"""
+
+    def __init__(self, target_chars):
+        super().__init__(convert_charrefs=True)
+        self.target_chars = target_chars
+        self.description = None
+        self.chunks = []
+        self.collected = 0
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "meta":
+            attrs = dict(attrs)
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            content = (attrs.get("content") or "").strip()
+            if name in ("description", "og:description") and len(content) >= MIN_DESCRIPTION_CHARS:
+                self.description = content
+        elif tag == "body":
+            self._skip_depth = 0  # an unclosed <head> ends here
+        elif tag in STREAM_SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in STREAM_SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.chunks.append(data)
+            self.collected += len(data.strip())
+
+    @property
+    def done(self):
+        return self.description is not None or self.collected >= self.target_chars
+
+    def text(self):
+        if self.description is not None:
+            return clean_text(self.description)
+        return clean_text("".join(self.chunks))
+
+def stream_text(url, timeout=None, max_bytes=STREAM_MAX_BYTES, target_chars=STREAM_TEXT_CHARS, redirects=None):
+    """Download an article in chunks and return its text as soon as there is enough.
+
+    Reads at most `max_bytes`, prefers <meta name=description> and
+    og:description, and otherwise stops once `target_chars` of clean body
+    text have been collected. The final URL after redirects is recorded
+    in `redirects` (see urls.RedirectCache). Raises requests.HTTPError for
+    a non-2xx response without reading its body.
+    """
+    parser = _StreamingTextParser(target_chars)
+    with http_client.get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        if redirects is not None:
+            redirects.learn(url, response.url)
+        # requests assumes ISO-8859-1 when no charset is sent; real pages are mostly UTF-8
+        has_charset = "charset" in response.headers.get("Content-Type", "").lower()
+        encoding = response.encoding if has_charset else "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        read = 0
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            chunk = chunk[:max_bytes - read]
+            read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or read >= max_bytes:
+                break
+    metrics.inc("http_bytes_total", read, kind="article")
+    return parser.text()
+
+def _extract_one(url, timeout, parse_pool, streaming, redirects):
+    """Extract one article, parsing on the process pool if there is one"""
+    start = time.perf_counter()
+    try:
+        if streaming:
+            return stream_text(url, timeout=timeout, redirects=redirects)
+        html = download_html(url, timeout=timeout, redirects=redirects)
+        if parse_pool is not None:
+            return parse_pool.submit(html_to_text, html).result()
+        return html_to_text(html)
+    finally:
+        metrics.observe("article_extract_seconds", time.perf_counter() - start)
+
+def extract_all(urls, fallbacks, max_chars=None, timeout=None, workers=DEFAULT_WORKERS,
+                deadline=DEFAULT_DEADLINE, streaming=True, parse_in_processes=False, cache=None,
+                redirects=None, timed_out=None, host_limit=None):
+    """Extract the text of many articles on a worker pool.
+
+    Downloads run on threads. With `streaming` each page is read in capped
+    chunks and parsed incrementally until enough text is found (see
+    stream_text); otherwise the whole page is downloaded and parsed with
+    BeautifulSoup inline or, with `parse_in_processes`, on a process pool.
+    Articles still pending when `deadline` seconds have passed, downloads
+    that fail (timeouts, connection and HTTP errors) and pages yielding
+    less text than their fallback get their entry in `fallbacks` (usually the feed summary)
+    instead; none is cached. With a `cache` (see content_cache),
+    previously extracted URLs are answered without downloading, and a URL
+    another call in this process is already downloading is waited for and
+    then read from the cache instead of being downloaded twice. With
+    `redirects` (see urls.RedirectCache), the final URL of each download is
+    recorded and its text cached under it too. URLs that fell back at the
+    deadline are appended to the list `timed_out`. Results keep the order
+    of `urls`. `host_limit(host, workers)` caps the downloads running
+    against one host at a time (see HostHealth.limit).
+    """
+    timed_out = [] if timed_out is None else timed_out
+    urls = list(urls)
+    results = list(fallbacks)
+
+    # Answer what we can from the cache, download the rest
+    pending_urls = {}
+    for i, url in enumerate(urls):
+        cached = cache.get(url) if cache is not None else None
+        if cached is not None:
+            results[i] = truncate_text(cached, max_chars)
+        else:
+            pending_urls[i] = url
+    if not pending_urls:
+        return results
+
+    waiting = {}
+    if cache is not None:
+        with _inflight_lock:
+            for i, url in list(pending_urls.items()):
+                key = canonical_url(url)
+                if key in _inflight:
+                    waiting[i] = _inflight[key]
+                    del pending_urls[i]
+                else:
+                    _inflight[key] = threading.Event()
+
+    started = time.monotonic()
+    try:
+        _download_all(urls, pending_urls, results, max_chars, timeout, workers, deadline,
+                      streaming, parse_in_processes, cache, redirects, timed_out, host_limit)
+    finally:
+        if cache is not None:
+            with _inflight_lock:
+                for url in pending_urls.values():
+                    _inflight.pop(canonical_url(url)).set()
+
+    for i, done in waiting.items():
+        done.wait(max(0, deadline - (time.monotonic() - started)))
+        cached = cache.get(urls[i])
+        if cached is not None:
+            results[i] = truncate_text(cached, max_chars)
+        else:
+            timed_out.append(urls[i])
+    return results
+
+def _download_all(urls, pending_urls, results, max_chars, timeout, workers, deadline,
+                  streaming, parse_in_processes, cache, redirects, timed_out, host_limit):
+    """Download `pending_urls` ({index: url}) into `results`"""
+    if not pending_urls:
+        return
+    started = time.monotonic()
+    parse_pool = ProcessPoolExecutor() if parse_in_processes and not streaming else None
+    download_pool = ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending_urls))))
+    extract_one = metrics.bound(_extract_one)
+
+    def limit(host):
+        return host_limit(host, workers) if host_limit else workers
+
+    try:
+        indexes = list(pending_urls)
+        submitted = submit_by_host(download_pool,
+                                   lambda url: extract_one(url, timeout, parse_pool, streaming, redirects),
+                                   pending_urls.values(), limit)
+        futures = dict(zip(submitted, indexes))
+        done, pending = wait(futures, timeout=deadline)
+
+        for future in done:
+            i = futures[future]
+            try:
+                text = future.result()
+            except HostUnavailable:
+                continue  # keeps its fallback; the host is being skipped
+            except requests.RequestException as e:
+                # Timeouts, connection and HTTP errors: keep the fallback and cache nothing
+                print(f"Error extracting content from {urls[i]}: {e}")
+                metrics.inc("article_errors_total", host=host_of(urls[i]))
+                continue
+            except Exception as e:
+                print(f"Error extracting content from {urls[i]}: {e}")
+                metrics.inc("article_errors_total", host=host_of(urls[i]))
+                results[i] = UNAVAILABLE
+                continue
+            if not text or len(text) < len(results[i]):
+                # Nothing usable found (e.g. a page that is all <head> and script): keep the fallback
+                metrics.inc("article_empty_total", host=host_of(urls[i]))
+                continue
+            if cache is not None:
+                cache.put(urls[i], text)
+                # Later runs ask for the redirect target directly
+                target = redirects.resolve(urls[i]) if redirects is not None else urls[i]
+                if target != urls[i]:
+                    cache.put(target, text)
+            results[i] = truncate_text(text, max_chars)
+
+        timed_out.extend(urls[futures[future]] for future in pending)
+        if pending:
+            print(f"Extraction deadline of {deadline}s hit after {time.monotonic() - started:.1f}s: "
+                  f"{len(pending)} articles fall back to their feed summary")
+    finally:
+        # Don't wait for stragglers; their results are no longer needed
+        download_pool.shutdown(wait=False, cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=False, cancel_futures=True)
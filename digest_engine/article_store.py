@@ -0,0 +1,212 @@
+import os
+import sqlite3
+import threading
+import time
+
+from .urls import canonical_url
+
+# ===== CONFIGURATION =====
+DEFAULT_PATH = os.path.join(".cache", "articles.sqlite")
+RETENTION = 90 * 24 * 3600   # Seconds articles are kept after they were first ingested
+SQL_VARIABLES = 500          # Links per IN (...) query, below SQLite's variable limit
+
+# ===== ARTICLE STORE =====
+def _stored_score(score):
+    """A score as the profile computed it: stores created with a REAL column hand back 23.0 for 23"""
+    return int(score) if isinstance(score, float) and score.is_integer() else score
+
+class ArticleStore:
+    """Every article the digests have scored, stored in SQLite.
+
+    `articles` holds one row per canonical link: title, source, publication
+    time and the text that was scored. `rankings` holds one row per digest
+    and link, with the score (NULL for entries rejected or skipped before
+    extraction), the feed-order sequence number that breaks score ties, and
+    a state: pending until the window closes, then sent or passed. The
+    database runs in WAL mode, so the scheduler's jobs can read while one
+    of them writes.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS articles (
+                link TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                source_url TEXT NOT NULL,
+                source_name TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                published TEXT NOT NULL,
+                published_ts REAL NOT NULL,
+                ingested REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS articles_published ON articles (published_ts);
+            CREATE INDEX IF NOT EXISTS articles_ingested ON articles (ingested);
+            CREATE TABLE IF NOT EXISTS rankings (
+                digest TEXT NOT NULL,
+                link TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                score INTEGER,
+                state TEXT NOT NULL DEFAULT 'pending',
+                sent REAL,
+                PRIMARY KEY (digest, link)
+            );
+            CREATE INDEX IF NOT EXISTS rankings_score ON rankings (digest, state, score DESC, seq);
+            CREATE TABLE IF NOT EXISTS polls (
+                digest TEXT PRIMARY KEY,
+                polled REAL NOT NULL
+            );
+        """)
+
+    # ----- writing -----
+    def record(self, digest, scored):
+        """Store (seq, candidate, score) triples in one transaction; score None marks a rejected entry"""
+        now = time.time()
+        articles = []
+        rankings = []
+        for seq, candidate, score in scored:
+            link = canonical_url(candidate['link'])
+            source = candidate['source']
+            articles.append((link, candidate['link'], candidate['title'], candidate['content'], source.url,
+                             source.name, source.type, candidate['published'],
+                             candidate.get('published_ts') or now, now))
+            rankings.append((digest, link, seq, score))
+        with self._lock, self._db:
+            # A later, longer extraction of the same article replaces the stored text
+            self._db.executemany("""
+                INSERT INTO articles (link, url, title, content, source_url, source_name, source_type,
+                                      published, published_ts, ingested)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (link) DO UPDATE SET content = excluded.content
+                WHERE length(excluded.content) > length(articles.content)
+            """, articles)
+            self._db.executemany("""
+                INSERT INTO rankings (digest, link, seq, score) VALUES (?, ?, ?, ?)
+                ON CONFLICT (digest, link) DO UPDATE SET
+                    seq = excluded.seq, score = excluded.score, state = 'pending', sent = NULL
+            """, rankings)
+
+    def close_window(self, digest, sent_links, before_seq):
+        """Mark `sent_links` sent and every other pending entry numbered below `before_seq` passed"""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE rankings SET state = 'sent', sent = ? WHERE digest = ? AND link = ?",
+                [(now, digest, canonical_url(link)) for link in sent_links])
+            self._db.execute(
+                "UPDATE rankings SET state = 'passed' WHERE digest = ? AND state = 'pending' AND seq < ?",
+                (digest, before_seq))
+
+    def set_polled(self, digest, polled):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO polls (digest, polled) VALUES (?, ?)", (digest, polled))
+
+    def prune(self, retention=RETENTION):
+        """Forget articles first ingested more than `retention` seconds ago"""
+        cutoff = time.time() - retention
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM rankings WHERE link IN "
+                             "(SELECT link FROM articles WHERE ingested < ?)", (cutoff,))
+            return self._db.execute("DELETE FROM articles WHERE ingested < ?", (cutoff,)).rowcount
+
+    # ----- reading -----
+    def _select_links(self, query, digest, links):
+        found = set()
+        links = [canonical_url(link) for link in links]
+        with self._lock:
+            for start in range(0, len(links), SQL_VARIABLES):
+                chunk = links[start:start + SQL_VARIABLES]
+                marks = ",".join("?" * len(chunk))
+                found.update(row[0] for row in self._db.execute(query.format(marks=marks), (digest, *chunk)))
+        return found
+
+    def ranked_links(self, digest, links):
+        """The canonical forms of `links` that `digest` has already ranked"""
+        return self._select_links("SELECT link FROM rankings WHERE digest = ? AND link IN ({marks})",
+                                  digest, links)
+
+    def sent_links(self, digest, links):
+        """The canonical forms of `links` that `digest` has already sent"""
+        return self._select_links("SELECT link FROM rankings WHERE digest = ? AND state = 'sent' "
+                                  "AND link IN ({marks})", digest, links)
+
+    def window(self, digest, k):
+        """The best `k` pending (score, seq, row) of `digest`; ties go to the lower seq"""
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT r.score, r.seq, a.url, a.title, a.content, a.source_url, a.source_name,
+                       a.source_type, a.published
+                FROM rankings r JOIN articles a ON a.link = r.link
+                WHERE r.digest = ? AND r.state = 'pending' AND r.score IS NOT NULL
+                ORDER BY r.score DESC, r.seq
+                LIMIT ?
+            """, (digest, k)).fetchall()
+        return [(_stored_score(score), seq,
+                 {"link": url, "title": title, "content": content, "source_url": source_url,
+                  "source": source_name, "source_type": source_type, "published": published})
+                for score, seq, url, title, content, source_url, source_name, source_type, published in rows]
+
+    def next_seq(self, digest):
+        with self._lock:
+            return self._db.execute("SELECT COALESCE(MAX(seq) + 1, 0) FROM rankings WHERE digest = ?",
+                                    (digest,)).fetchone()[0]
+
+    def polled(self, digest):
+        """Unix time of the digest's last ingestion poll, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT polled FROM polls WHERE digest = ?", (digest,)).fetchone()
+        return row[0] if row else None
+
+    def recent(self, source_urls, since):
+        """Articles from `source_urls` published since the Unix time `since`, oldest first"""
+        source_urls = list(source_urls)
+        rows = []
+        with self._lock:
+            for start in range(0, len(source_urls), SQL_VARIABLES):
+                chunk = source_urls[start:start + SQL_VARIABLES]
+                marks = ",".join("?" * len(chunk))
+                rows.extend(self._db.execute(f"""
+                    SELECT url, title, content, source_url, published, published_ts FROM articles
+                    WHERE published_ts >= ? AND source_url IN ({marks})
+                """, (since, *chunk)))
+        rows.sort(key=lambda row: row[5])
+        return [{"link": url, "title": title, "content": content, "source_url": source_url,
+                 "published": published, "published_ts": published_ts}
+                for url, title, content, source_url, published, published_ts in rows]
+
+    def stats(self):
+        with self._lock:
+            articles = self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+            rankings = dict(self._db.execute("SELECT state, COUNT(*) FROM rankings GROUP BY state"))
+        return {"articles": articles, **rankings}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ===== SHARED STORES =====
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_store(path=DEFAULT_PATH):
+    """The process-wide ArticleStore for `path`, shared by every digest and job"""
+    with _shared_lock:
+        store = _shared.get(path)
+        if store is None:
+            store = _shared[path] = ArticleStore(path)
+        return store
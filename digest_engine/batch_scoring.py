@@ -0,0 +1,60 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the array-backed path gives identical results
+    np = None
+
+# ===== TERM MATRIX =====
+class TermMatrix:
+    """Sparse binary document-term matrix over a KeywordMatcher's terms.
+
+    Row i marks which terms occur in texts[i] (each term counts once, as
+    in the scalar scoring functions). Stored in CSR layout: the columns of
+    row i are indices[indptr[i]:indptr[i + 1]]. Build it once, then score
+    it against any number of weight vectors.
+    """
+
+    def __init__(self, texts, matcher):
+        self.terms = list(matcher.weights)
+        column = {term: i for i, term in enumerate(self.terms)}
+        self.indptr = array("l", [0])
+        self.indices = array("l")
+        for text in texts:
+            self.indices.extend(sorted(column[term] for term in matcher.find(text)))
+            self.indptr.append(len(self.indices))
+        self.rows = len(self.indptr) - 1
+
+    def row(self, i):
+        """Return the column indices set in row i"""
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def dot(self, weights):
+        """Multiply by a weight vector aligned with `terms`"""
+        if np is not None:
+            weights = np.asarray(weights)
+            row_ids = np.repeat(np.arange(self.rows), np.diff(np.asarray(self.indptr)))
+            totals = np.bincount(row_ids, weights=weights[np.asarray(self.indices)],
+                                 minlength=self.rows)
+            return totals.astype(weights.dtype)
+        return [sum(weights[j] for j in self.row(i)) for i in range(self.rows)]
+
+    def union_counts(self, other):
+        """Count, per row, the distinct terms set in this matrix or `other`"""
+        return [len(set(self.row(i)).union(other.row(i))) for i in range(self.rows)]
+
+# ===== FUNCTIONS =====
+def weight_vector(matcher, field=None):
+    """Return the matcher's weights as a vector aligned with TermMatrix columns"""
+    if field is None:
+        return list(matcher.weights.values())
+    return [weight[field] for weight in matcher.weights.values()]
+
+def weighted_sum(products, offsets):
+    """Add matrix @ weight products and per-row offsets into one score list"""
+    if np is not None:
+        total = np.asarray(offsets)
+        for product in products:
+            total = total + product
+        return total.tolist()
+    return [sum(row) for row in zip(offsets, *products)]
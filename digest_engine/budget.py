@@ -0,0 +1,86 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from . import metrics
+
+# ===== CONFIGURATION =====
+MIN_EXTRACT_SECONDS = 2   # With less time than this left, extraction is skipped for feed summaries
+MIN_SEND_TIMEOUT = 5      # SMTP socket timeout kept even when the budget is spent
+
+# ===== RUN BUDGET =====
+class BudgetExceeded(Exception):
+    """Work skipped because the run's time budget was spent"""
+
+class RunBudget:
+    """The wall-clock time one digest run may take, shared by its stages.
+
+    Stages ask how much time is left before `reserve` seconds that are kept
+    for scoring, rendering and sending. When time runs short they degrade
+    in a fixed order: articles keep their feed summary instead of being
+    extracted, then the slowest feeds are skipped. Each skipped item is
+    recorded with skip() in the run's report. `seconds` None never runs out.
+    """
+
+    def __init__(self, seconds, reserve=0):
+        self.seconds = seconds
+        self.reserve = reserve
+        self.started = time.monotonic()
+        self.skipped = []   # (stage, item, reason)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def left(self, reserve=True):
+        """Seconds left (before the reserve, unless `reserve` is False), or None without a budget"""
+        if self.seconds is None:
+            return None
+        return max(0.0, self.seconds - self.elapsed() - (self.reserve if reserve else 0))
+
+    def limit(self, seconds, reserve=True):
+        """`seconds` (None: no limit of its own) cut down to the time left"""
+        left = self.left(reserve)
+        if left is None:
+            return seconds
+        return left if seconds is None else min(seconds, left)
+
+    def skip(self, stage, item, reason):
+        """Record that `item` was skipped or degraded in `stage` to stay within the budget"""
+        self.skipped.append((stage, item, reason))
+        metrics.inc("degraded_total", stage=stage, reason=reason)
+        metrics.detail("degraded", item, stage=stage, reason=reason,
+                       elapsed=round(self.elapsed(), 3))
+
+    def checkpoint(self, stage):
+        """Record the time left as `stage` starts"""
+        left = self.left(reserve=False)
+        if left is not None:
+            metrics.set_gauge("budget_left_seconds", round(left, 3), stage=stage)
+
+    def report(self, name):
+        """Print and record what the run skipped to stay within its budget"""
+        if self.seconds is None:
+            return
+        metrics.set_gauge("budget_seconds", self.seconds, digest=name)
+        counts = {}
+        for stage, _, reason in self.skipped:
+            counts[(stage, reason)] = counts.get((stage, reason), 0) + 1
+        summary = ", ".join(f"{count} {stage} ({reason})" for (stage, reason), count in counts.items())
+        print(f"{datetime.now()}: Run budget {self.seconds}s, used {self.elapsed():.1f}s"
+              + (f"; degraded: {summary}" if summary else ""))
+
+_current = contextvars.ContextVar("run_budget", default=None)
+
+def current():
+    """The budget of the calling run (one that never runs out outside a run)"""
+    return _current.get() or RunBudget(None)
+
+@contextmanager
+def within(budget):
+    """Make `budget` the current() budget for the block"""
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
@@ -0,0 +1,53 @@
+import argparse
+from datetime import datetime
+
+from . import profiler
+from .scheduler import Scheduler
+
+# ===== FUNCTIONS =====
+def main(digests, title):
+    """Command line of a digest process: --profile, --drain, or run the digests on their schedules.
+
+    Each digest runs on the SCHEDULE of its config module ("daily at 08:00",
+    "monday at 08:00"). One process can host any number of digests.
+    """
+    config = digests[0].config
+    parser = argparse.ArgumentParser(description=title)
+    parser.add_argument("--profile", action="store_true",
+                        help=f"run each digest once under cProfile, a stack sampler and tracemalloc, "
+                             f"write reports to {config.PROFILE_DIR} and exit")
+    parser.add_argument("--drain", action="store_true",
+                        help="deliver the messages waiting in the outbox and exit, without fetching feeds")
+    args = parser.parse_args()
+
+    if args.drain:
+        for digest in digests:
+            print(f"{datetime.now()}: {digest.name} outbox drained: {digest.drain()}")
+        return
+
+    if args.profile:
+        for digest in digests:
+            profiler.profile_run(digest.run, digest.name, digest.config.PROFILE_DIR)
+        return
+
+    print(title)
+    print("=" * len(title))
+
+    scheduler = Scheduler()
+    for digest in digests:
+        # Deliver mail left in the outbox by an earlier process, then keep retrying deferred mail
+        digest.outbox().start_drainer(digest.open_mailer, digest.config.OUTBOX_RETRY_INTERVAL)
+        scheduler.add(digest.name, digest.run, digest.config.SCHEDULE)
+        print(f"{digest.name}: {digest.config.SCHEDULE}")
+        if digest.config.INGEST_SCHEDULE:
+            # Rank new entries through the day, so the digest itself only renders and sends
+            scheduler.add(f"{digest.name}_ingest", digest.ingest().poll, digest.config.INGEST_SCHEDULE)
+            print(f"{digest.name} ingestion: {digest.config.INGEST_SCHEDULE}")
+
+    print("Scheduler started; digests that missed their last run (or never ran) start now.")
+    print("Press Ctrl+C to exit.")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        print(f"{datetime.now()}: Stopping, waiting for running digests to finish...")
+        scheduler.stop()
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+import threading
+import time
+
+from . import metrics
+from .urls import canonical_url
+
+# ===== CONFIGURATION =====
+DEFAULT_PATH = os.path.join(".cache", "content.sqlite")
+DEFAULT_TTL = 7 * 24 * 3600              # Seconds before a cached article is re-extracted
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024     # Cached text kept before LRU eviction kicks in
+MAX_STORED_CHARS = 2000                  # Enough text for either digest to truncate from
+
+# ===== CONTENT CACHE =====
+class ContentCache:
+    """Extracted article text shared by both digests, stored in SQLite.
+
+    Entries expire after `ttl` seconds, and the least recently used entries
+    are evicted once the stored text exceeds `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS content (
+                url TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS content_accessed ON content (accessed);
+        """)
+
+    def get(self, url):
+        """Return the cached text for a URL, or None if missing or expired"""
+        key = canonical_url(url)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT text, created FROM content WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                metrics.inc("cache_requests_total", cache="content", result="miss")
+                return None
+            self._db.execute("UPDATE content SET accessed = ? WHERE url = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            metrics.inc("cache_requests_total", cache="content", result="hit")
+            return row[0]
+
+    def put(self, url, text):
+        """Store the extracted text for a URL and evict old entries if over budget"""
+        text = text[:MAX_STORED_CHARS]
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO content (url, text, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (canonical_url(url), text, len(text.encode("utf-8")), now, now),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM content").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in self._db.execute("SELECT url, size FROM content ORDER BY accessed"):
+            victims.append((url,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM content WHERE url = ?", victims)
+        self.evictions += len(victims)
+
+    def stats(self):
+        """Return hit/miss/eviction counters and the current cache size"""
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM content"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,498 @@
+import calendar
+import os
+import time
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import feedparser
+
+from . import budget
+from . import http_client
+from . import metrics
+from .article_extractor import extract_all
+from .article_store import shared_store
+from .content_cache import ContentCache
+from .feed_cache import shared_cache
+from .feed_fetcher import fetch_feeds
+from .host_health import host_of, shared_health
+from .ingest import Ingestor
+from .mailer import TIMEOUT as SMTP_TIMEOUT, Mailer
+from .near_duplicates import collapse
+from .outbox import Outbox, make_key
+from .seen_filter import shared_filter
+from .topk import TopK, top_k, stream_select
+from .urls import canonical_url, shared_redirects
+
+# ===== DIGEST =====
+class Config:
+    """Settings of one digest: its script's constants over shared modules.
+
+    Each name is looked up on every access, in the script first and then in
+    `shared` in order, so a script overrides a shared setting by defining
+    it, and values changed at runtime take effect on the next run.
+    """
+
+    def __init__(self, script, *shared):
+        self.layers = (script,) + shared
+
+    def __getattr__(self, name):
+        for layer in self.layers:
+            if hasattr(layer, name):
+                return getattr(layer, name)
+        raise AttributeError(f"{name} is not set in {', '.join(layer.__name__ for layer in self.layers)}")
+
+class Digest:
+    """One digest: sources, scoring profile, email template and delivery.
+
+    `config` is the digest script's module and `shared` the modules holding
+    the settings common to all digests (settings.py, sources.py); see
+    Config. Their constants (FEED_*, EXTRACT_*, CONTENT_CACHE_*, SMTP_*,
+    RECIPIENTS, OUTBOX_DIR, SOURCES, ...) are read on every run, so
+    changing them at runtime takes effect on the next run. `subject` is
+    formatted with {date}; `context(items)` returns the template values
+    shared by every recipient.
+    """
+
+    def __init__(self, name, config, profile, template, subject, context, noun="articles", shared=()):
+        self.name = name
+        self.config = Config(config, *shared)
+        self.profile = profile
+        self.template = template
+        self.subject = subject
+        self.context = context
+        self.noun = noun
+        self.ingestor = None
+
+    # ----- collection -----
+    def fetch(self):
+        """Download this digest's feeds through the shared feed cache.
+
+        Returns (source, feed, error) in registry order. A feed another digest
+        fetched within FEED_FRESHNESS seconds is not downloaded again. Under
+        a run budget, feeds whose host is slower on average than the time
+        left are skipped, and so are feeds still downloading when it is up.
+        """
+        config = self.config
+        sources = config.SOURCES.for_digest(self.name)
+        feed_cache = shared_cache(config.FEED_CACHE_PATH, config.FEED_FRESHNESS)
+        hosts = self.host_health()
+        run_budget = budget.current()
+        run_budget.checkpoint("feed_fetch")
+        window = run_budget.limit(None)
+        results = {}
+        if window is not None:
+            for source in sources:
+                latency = hosts.latency(host_of(source.url))
+                if latency is not None and latency > window:
+                    results[source.url] = (None, budget.BudgetExceeded(f"host averages {latency:.1f}s"))
+                    run_budget.skip("feed_fetch", source.url, "slow host")
+
+        before = feed_cache.stats()
+        with metrics.timed("feed_fetch", digest=self.name):
+            urls = [source.url for source in sources if source.url not in results]
+            for url, feed, error in fetch_feeds(urls, mode=config.FEED_FETCH_MODE,
+                                                concurrency=config.FEED_CONCURRENCY,
+                                                per_host_limit=config.FEED_PER_HOST_LIMIT, fetch=feed_cache.parse,
+                                                host_limit=hosts.limit, deadline=window):
+                results[url] = (feed, error)
+                if isinstance(error, budget.BudgetExceeded):
+                    run_budget.skip("feed_fetch", url, "budget spent")
+            feed_cache.save()
+            self.save_host_health()
+        after = feed_cache.stats()
+        print(f"Feed cache: {after['hits'] - before['hits']} hits, {after['misses'] - before['misses']} misses")
+        return [(source, *results[source.url]) for source in sources]
+
+    def candidates(self, results):
+        """Turn feed entries into candidates, skipping duplicate links and links this digest already sent.
+
+        Links on wrapper hosts are followed first (see
+        RedirectCache.resolve_wrappers), then links are replaced by their
+        known redirect target and compared in canonical form, so a Google
+        News wrapper, the article itself and a copy with utm_* parameters
+        count as one link. Entries with a malformed link are skipped.
+        """
+        seen_links = set()
+        sent = self.seen()
+        redirects = self.redirects()
+        # Wrapper links (Google News) of entries that are never extracted are only resolved here
+        redirects.resolve_wrappers(entry.get('link', '') for _, feed, error in results if not error
+                                   for entry in feed.entries[:self.profile.entries_per_source])
+        lookups = 0
+        skipped = 0
+        lookup_seconds = 0.0
+        candidates = []
+        for source, feed, error in results:
+            try:
+                print(f"Checking {source.name}...")
+                if error:
+                    raise error
+                metrics.detail("feeds", source.url, entries=len(feed.entries))
+                if not feed.entries:
+                    print(f"  No entries found in this feed")
+                    continue
+
+                for entry in feed.entries[:self.profile.entries_per_source]:
+                    try:
+                        link = redirects.resolve(entry.link)
+                        key = canonical_url(link)
+                    except ValueError as e:
+                        print(f"  Skipping entry with a malformed link {entry.get('link')!r}: {e}")
+                        continue
+                    if key in seen_links:
+                        continue
+                    start = time.perf_counter()
+                    already_sent = link in sent or (link != entry.link and entry.link in sent)
+                    lookup_seconds += time.perf_counter() - start
+                    lookups += 1
+                    if already_sent:
+                        skipped += 1
+                        seen_links.add(key)
+                        continue
+                    if not self.profile.accept(entry, source):
+                        continue
+                    summary = entry.get('summary', '')
+                    published_parsed = entry.get('published_parsed')
+                    candidates.append({
+                        'title': entry.title,
+                        'link': link,
+                        'summary': summary,
+                        'content': summary,
+                        'source': source,
+                        'published': self.profile.published(entry),
+                        'published_ts': calendar.timegm(published_parsed) if published_parsed else None,
+                    })
+                    seen_links.add(key)
+            except Exception as e:
+                print(f"Error processing {source.name}: {e}")
+
+        false_positive_rate = sent.false_positive_rate()
+        print(f"Seen filter: skipped {skipped} of {lookups} entries already sent, "
+              f"{lookup_seconds / max(lookups, 1) * 1e6:.1f} µs per lookup, "
+              f"estimated false-positive rate {false_positive_rate:.4%}")
+        metrics.inc("entries_total", skipped, digest=self.name, step="already_sent")
+        metrics.set_gauge("seen_filter_lookup_seconds", lookup_seconds / max(lookups, 1), digest=self.name)
+        metrics.set_gauge("seen_filter_false_positive_rate", false_positive_rate, digest=self.name)
+        return candidates
+
+    def history(self, exclude=()):
+        """Candidates from articles already in the store, published within profile.history_days.
+
+        Their stored text stands in for the feed summary, so they are
+        neither fetched nor, unless the text is short, extracted again.
+        """
+        if not self.profile.history_days:
+            return []
+        sources = {source.url: source for source in self.config.SOURCES.for_digest(self.name)}
+        since = time.time() - self.profile.history_days * 24 * 3600
+        exclude = {canonical_url(link) for link in exclude}
+        sent = self.seen()
+        candidates = []
+        for row in self.store().recent(sources, since):
+            source = sources[row['source_url']]
+            entry = feedparser.FeedParserDict(title=row['title'], link=row['link'], summary=row['content'],
+                                              published=row['published'])
+            if canonical_url(row['link']) in exclude or row['link'] in sent or not self.profile.accept(entry, source):
+                continue
+            candidates.append({
+                'title': row['title'],
+                'link': row['link'],
+                'summary': row['content'],
+                'content': row['content'],
+                'source': source,
+                'published': self.profile.published(entry),
+                'published_ts': row['published_ts'],
+            })
+        metrics.inc("entries_total", len(candidates), digest=self.name, step="history")
+        return candidates
+
+    def gather(self):
+        """Candidates from the feeds, then from the store's history"""
+        candidates = self.candidates(self.fetch())
+        return candidates + self.history(exclude=[c['link'] for c in candidates])
+
+    def score(self, candidates):
+        budget.current().checkpoint("scoring")
+        with metrics.timed("scoring", digest=self.name):
+            return self.profile.score(candidates)
+
+    def collect(self, candidates=None, top=None, offset=0):
+        """Extract and score candidate entries (by default, all of them); returns items in feed order.
+
+        `top` is a TopK of items ranked earlier, numbered below `offset`;
+        extractions that could not beat them are skipped.
+        """
+        config = self.config
+        profile = self.profile
+        if candidates is None:
+            # Everything in the feeds and history except what this digest already sent
+            candidates = self.gather()
+        duplicates = []
+        if config.NEAR_DUPLICATE_DISTANCE is not None:
+            # Copies of one story from several feeds are extracted and ranked once, as their best copy
+            with metrics.timed("dedup", digest=self.name):
+                candidates, duplicates = collapse(candidates, self.representative, config.NEAR_DUPLICATE_DISTANCE)
+            print(f"Near-duplicates: dropped {len(duplicates)} copies, {len(candidates)} distinct entries left")
+            metrics.inc("entries_total", len(duplicates), digest=self.name, step="near_duplicate")
+        metrics.inc("entries_total", len(candidates), digest=self.name, step="candidates")
+
+        # Entries with a usable summary are scored right away
+        to_extract = [(offset + i, c) for i, c in enumerate(candidates) if len(c['summary']) < profile.min_summary_chars]
+        ready = [(offset + i, c) for i, c in enumerate(candidates) if len(c['summary']) >= profile.min_summary_chars]
+        if top is None:
+            top = TopK(profile.max_items)
+        scored = []
+        for (index, candidate), item_score in zip(ready, self.score([c for _, c in ready])):
+            if item_score is not None:
+                top.push(item_score, index)
+                scored.append((index, candidate, item_score))
+
+        # Extract the rest best-first, skipping entries that cannot make the top max_items
+        started = time.monotonic()
+        run_budget = budget.current()
+        run_budget.checkpoint("extraction")
+        with ContentCache(config.CONTENT_CACHE_PATH, ttl=config.CONTENT_CACHE_TTL,
+                          max_bytes=config.CONTENT_CACHE_MAX_BYTES) as content_cache:
+            def extract_and_score(batch):
+                # Extraction is the first thing given up when the run budget runs short
+                deadline = run_budget.limit(max(0, config.EXTRACT_DEADLINE - (time.monotonic() - started)))
+                if deadline < budget.MIN_EXTRACT_SECONDS:
+                    for candidate in batch:
+                        run_budget.skip("extraction", candidate['link'], "feed summary")
+                    return self.score(batch)
+                timed_out = []
+                with metrics.timed("extraction", digest=self.name):
+                    extracted = extract_all(
+                        [c['link'] for c in batch],
+                        fallbacks=[c['summary'] for c in batch], max_chars=profile.extract_chars,
+                        timeout=run_budget.limit(config.EXTRACT_TIMEOUT), workers=config.EXTRACT_WORKERS,
+                        deadline=deadline,
+                        streaming=config.EXTRACT_MODE == "stream",
+                        parse_in_processes=config.EXTRACT_PARSE_IN_PROCESSES,
+                        cache=content_cache, redirects=self.redirects(), timed_out=timed_out,
+                        host_limit=self.host_health().limit
+                    )
+                for link in timed_out:
+                    run_budget.skip("extraction", link, "feed summary")
+                for candidate, content in zip(batch, extracted):
+                    candidate['content'] = content
+                return self.score(batch)
+
+            resolved, pruned = stream_select(top, to_extract, profile.upper_bound, extract_and_score,
+                                             batch_size=config.EXTRACT_BATCH)
+            cache_stats = content_cache.stats()
+        self.save_host_health()
+        print(f"Content cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['entries']} entries")
+        print(f"Extracted {len(to_extract) - pruned} articles, skipped {pruned} that could not make "
+              f"the top {profile.max_items}")
+        metrics.inc("entries_total", len(to_extract) - pruned, digest=self.name, step="extracted")
+        metrics.inc("entries_total", pruned, digest=self.name, step="skipped")
+        scored.extend(resolved)
+        scored.sort(key=lambda s: s[0])  # back to feed order, so ties rank as before
+
+        # Rejected, skipped and duplicate entries are recorded too, so ingestion never scores them again
+        scores = {index: item_score for index, _, item_score in scored}
+        rows = [(offset + i, c, scores.get(offset + i)) for i, c in enumerate(candidates)]
+        rows += [(offset + len(candidates) + i, c, None) for i, c in enumerate(duplicates)]
+        with metrics.timed("store", digest=self.name):
+            self.store().record(self.name, rows)
+
+        items = []
+        for index, candidate, item_score in scored:
+            source = candidate['source']
+            items.append(self.item(candidate, source.name, source.url, source.type, item_score))
+            print(f"  Added: {candidate['title']} (Score: {item_score})")
+        return items
+
+    def representative(self, candidate):
+        """How good a copy of a story is: the higher upper bound, then a summary that needs no extraction"""
+        return self.profile.upper_bound(candidate), len(candidate['summary']) >= self.profile.min_summary_chars
+
+    def item(self, article, source_name, source_url, source_type, score):
+        """The item the templates render, from a candidate or a stored article"""
+        content = article['content']
+        return {
+            'title': article['title'],
+            'link': article['link'],
+            'summary': content[:self.profile.summary_chars] + "..." if len(content) > self.profile.summary_chars else content,
+            'source': source_name,
+            'source_url': source_url,
+            'source_type': source_type,
+            'published': article['published'],
+            'score': score
+        }
+
+    def select(self, items):
+        """The top max_items items; ties keep their feed order"""
+        with metrics.timed("selection", digest=self.name):
+            return top_k(items, self.profile.max_items, key=lambda x: x['score'])
+
+    # ----- email -----
+    def render(self, items):
+        """Render the parts of the email shared by every recipient"""
+        budget.current().checkpoint("render")
+        with metrics.timed("render", digest=self.name):
+            return self.template.prepare(items, self.context(items))
+
+    def build_message(self, content, to=None):
+        """Build the MIME message from (html, plain text)"""
+        html_content, text_content = content
+        msg = MIMEMultipart("alternative")
+        msg['Subject'] = self.subject.format(date=datetime.now().strftime('%Y-%m-%d'))
+        msg['From'] = self.config.EMAIL_ADDRESS
+        msg['To'] = to or self.config.RECIPIENT_EMAIL
+
+        # Clients show the last part they support, so the HTML goes last
+        msg.attach(MIMEText(text_content, "plain"))
+        msg.attach(MIMEText(html_content, "html"))
+        return msg
+
+    def open_mailer(self, **options):
+        """Mailer for the configured SMTP account; `options` go to Mailer (timeout, max_retries)"""
+        config = self.config
+        return Mailer(config.SMTP_SERVER, config.SMTP_PORT, config.EMAIL_ADDRESS, config.EMAIL_PASSWORD,
+                      config.SMTP_STARTTLS, **options)
+
+    def outbox(self):
+        return Outbox(self.config.OUTBOX_DIR)
+
+    def store(self):
+        """The article store shared by every digest"""
+        return shared_store(self.config.ARTICLE_STORE_PATH)
+
+    def redirects(self):
+        """Redirect targets learned by extraction, shared by every digest"""
+        return shared_redirects(self.config.REDIRECT_CACHE_PATH, self.config.REDIRECT_TTL)
+
+    def host_health(self):
+        """Per-host limits, backoff and circuit breakers, applied to every request of the process"""
+        health = shared_health(self.config.HOST_HEALTH_PATH, self.config.HOST_RATE)
+        http_client.use_host_health(health)
+        return health
+
+    def save_host_health(self):
+        health = self.host_health()
+        health.report()
+        try:
+            health.save()
+        except Exception as e:
+            print(f"{datetime.now()}: Error saving host state: {e}")
+
+    def seen(self):
+        """The filter of links this digest has sent, checked before any entry is extracted or scored"""
+        return shared_filter(os.path.join(self.config.SEEN_FILTER_DIR, f"{self.name}.bloom"))
+
+    def send(self, prepared):
+        """Spool the prepared digest for every subscriber, then deliver it from the outbox.
+
+        Once the run budget is spent the mail still goes out, but with short
+        SMTP timeouts and deferred recipients left to the outbox drainer.
+        """
+        config = self.config
+        run_budget = budget.current()
+        run_budget.checkpoint("send")
+        left = run_budget.left(reserve=False)
+        options = {}
+        if left is not None:
+            options["timeout"] = max(budget.MIN_SEND_TIMEOUT, min(SMTP_TIMEOUT, left))
+            if left <= 0:
+                options["max_retries"] = 0
+                run_budget.skip("send", self.name, "retries left to the outbox")
+        with metrics.timed("send", digest=self.name):
+            outbox = self.outbox()
+            day = datetime.now().strftime('%Y-%m-%d')
+            recipients = config.RECIPIENTS
+            if config.PERSONALIZE:
+                batches = [(make_key(self.name, day, prepared.fingerprint, email), email, [email], name)
+                           for email, name in recipients.items()]
+            else:
+                # One message, sent in batches of recipients; the To header only names a sole subscriber
+                to = next(iter(recipients)) if len(recipients) == 1 else config.EMAIL_ADDRESS
+                batches = [(make_key(self.name, day, prepared.fingerprint, *sorted(recipients)), to,
+                            list(recipients), config.RECIPIENT_NAME)]
+
+            # The key makes this idempotent: rerunning the same day with the same items sends nothing twice
+            for key, to, batch, name in batches:
+                if not outbox.is_sent(key):
+                    outbox.enqueue(key, self.build_message(prepared.render({"recipient_name": name}), to), batch)
+
+            try:
+                summary = outbox.drain(lambda: self.open_mailer(**options))
+            except Exception as e:
+                print(f"{datetime.now()}: Error sending email, it stays in the outbox: {e}")
+                return False
+
+            if summary["retry"]:
+                print(f"{datetime.now()}: {summary['retry']} message(s) deferred, will retry from {config.OUTBOX_DIR}")
+            if all(outbox.is_sent(key) for key, _, _, _ in batches):
+                print(f"{datetime.now()}: Email sent successfully to {len(recipients)} recipient(s)")
+                return True
+            return False
+
+    def drain(self):
+        """Deliver messages waiting in the outbox"""
+        return self.outbox().drain(self.open_mailer)
+
+    # ----- run -----
+    def ingest(self):
+        """Rank this digest's entries between runs; schedule the returned Ingestor's poll()"""
+        if self.ingestor is None:
+            self.ingestor = Ingestor(self)
+        return self.ingestor
+
+    def run(self):
+        """Collect, select, render and send one digest; returns True if it was delivered.
+
+        While ingestion keeps a recent ranking, that ranking is sent and no
+        feed is fetched. The run's stages share RUN_BUDGET seconds (see
+        budget.RunBudget).
+        """
+        print(f"{datetime.now()}: Starting the {self.name} digest...")
+        metrics.reset()
+        with budget.within(budget.RunBudget(self.config.RUN_BUDGET, self.config.RUN_BUDGET_RESERVE)) as run_budget:
+            success = self._run()
+            run_budget.report(self.name)
+        self.write_metrics(run_budget.elapsed(), success)
+        return success
+
+    def _run(self):
+        ranked = self.ingestor.ranked(self.config.INGEST_MAX_AGE) if self.ingestor else None
+        if ranked is not None:
+            top_items, mark = ranked
+            print(f"{datetime.now()}: Using the top {len(top_items)} {self.noun} ranked by ingestion")
+        else:
+            items = self.collect(offset=self.store().next_seq(self.name))
+            print(f"{datetime.now()}: Found {len(items)} potential {self.noun}")
+
+            top_items = self.select(items)
+            print(f"{datetime.now()}: Selected top {len(top_items)} {self.noun}")
+            mark = self.store().next_seq(self.name)
+        metrics.inc("entries_total", len(top_items), digest=self.name, step="selected")
+
+        success = self.send(self.render(top_items))
+        # Spooled in the outbox, so the window is done: the next digest starts after it
+        self.store().close_window(self.name, [item['link'] for item in top_items], mark)
+        self.store().prune()
+        try:
+            self.seen().add_many(item['link'] for item in top_items)
+            self.seen().save()
+        except Exception as e:
+            print(f"{datetime.now()}: Error saving the seen filter: {e}")
+
+        if success:
+            print(f"{datetime.now()}: Digest sent with {len(top_items)} {self.noun}")
+        else:
+            print(f"{datetime.now()}: Failed to send digest")
+        return success
+
+    def write_metrics(self, run_seconds, success):
+        """Write this run's Prometheus textfile and JSON report"""
+        metrics.set_gauge("run_seconds", run_seconds, digest=self.name)
+        metrics.set_gauge("run_timestamp_seconds", time.time(), digest=self.name)
+        metrics.set_gauge("run_success", int(success), digest=self.name)
+        try:
+            metrics.write_reports(self.config.METRICS_DIR, self.name)
+        except Exception as e:
+            print(f"{datetime.now()}: Error writing metrics: {e}")
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from email.utils import mktime_tz, parsedate_tz
+
+import feedparser
+
+from . import http_client
+from . import metrics
+from .files import write_atomic
+from .host_health import HostUnavailable
+
+# ===== CONFIGURATION =====
+DEFAULT_PATH = os.path.join(".cache", "feeds.json")
+ENTRY_FIELDS = ("id", "title", "link", "summary", "published", "published_parsed")
+
+# ===== FEED CACHE =====
+class FeedCache:
+    """Persistent feed cache revalidated with conditional GETs.
+
+    Stores each feed's ETag, Last-Modified value and parsed entries on disk.
+    Refetches send If-None-Match / If-Modified-Since, and a 304 response is
+    answered from the stored entries. A feed fetched less than `fresh_for`
+    seconds ago is answered from the cache without any request, and
+    concurrent parse() calls for one URL share a single download.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, fresh_for=0):
+        self.path = path
+        self.fresh_for = fresh_for
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._url_locks = defaultdict(threading.Lock)
+        self._updated = {}
+        self._feeds = self._load()
+
+    def reload(self):
+        """Pick up feeds another process fetched since this cache was loaded"""
+        feeds = self._load()
+        with self._lock:
+            for url, record in feeds.items():
+                if record.get("fetched", 0) > self._feeds.get(url, {}).get("fetched", 0):
+                    self._feeds[url] = record
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def parse(self, url):
+        """Parse a feed, reusing the cached entries while fresh or when the server answers 304"""
+        with self._lock:
+            url_lock = self._url_locks[url]
+        # Callers asking for the same feed at once wait for one download
+        with url_lock:
+            return self._parse(url)
+
+    def _parse(self, url):
+        with self._lock:
+            cached = self._feeds.get(url)
+
+        if cached and time.time() - cached.get("fetched", 0) < self.fresh_for:
+            with self._lock:
+                self.hits += 1
+            metrics.inc("cache_requests_total", cache="feed", result="fresh")
+            return self._cached_feed(cached, status=200)
+
+        try:
+            feed = http_client.fetch_feed(
+                url,
+                etag=cached.get("etag") if cached else None,
+                modified=cached.get("modified") if cached else None,
+            )
+        except HostUnavailable:
+            if not cached:
+                raise
+            # The host is being skipped: its last entries are better than none
+            with self._lock:
+                self.hits += 1
+            metrics.inc("cache_requests_total", cache="feed", result="stale")
+            return self._cached_feed(cached, status=200)
+
+        if feed.get("status") == 304 and cached:
+            with self._lock:
+                self.hits += 1
+                # Revalidated: fresh again for another window
+                cached = dict(cached, fetched=time.time())
+                self._feeds[url] = self._updated[url] = cached
+            metrics.inc("cache_requests_total", cache="feed", result="hit")
+            return self._cached_feed(cached, status=304)
+
+        metrics.inc("cache_requests_total", cache="feed", result="miss")
+        with self._lock:
+            self.misses += 1
+            if feed.entries and (feed.get("etag") or feed.get("modified") or self.fresh_for):
+                record = {
+                    "etag": feed.get("etag"),
+                    "modified": feed.get("modified"),
+                    "fetched": time.time(),
+                    "entries": [
+                        {field: entry[field] for field in ENTRY_FIELDS if field in entry}
+                        for entry in feed.entries
+                    ],
+                }
+                self._feeds[url] = record
+                self._updated[url] = record
+        return feed
+
+    def _cached_feed(self, record, status):
+        return feedparser.FeedParserDict(
+            status=status,
+            entries=[_cached_entry(entry) for entry in record["entries"]],
+        )
+
+    def save(self):
+        """Write feeds refreshed during this run back to disk"""
+        with self._lock:
+            if not self._updated:
+                return
+            # Merge with the file so a concurrent run of the other digest isn't clobbered
+            feeds = self._load()
+            feeds.update(self._updated)
+            write_atomic(self.path, json.dumps(feeds))
+            self._updated = {}
+
+    def stats(self):
+        """Return hit/miss counters for this run"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+def _cached_entry(entry):
+    """A stored entry as feedparser returns it, with published_parsed a UTC struct_time again"""
+    entry = feedparser.FeedParserDict(entry)
+    if entry.get("published_parsed"):
+        entry["published_parsed"] = time.struct_time(entry["published_parsed"])
+    elif entry.get("published"):
+        # Records cached before published_parsed was stored: RFC 822 dates, as RSS uses
+        parsed = parsedate_tz(entry["published"])
+        if parsed:
+            entry["published_parsed"] = time.gmtime(mktime_tz(parsed))
+    return entry
+
+# ===== SHARED CACHES =====
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_cache(path=DEFAULT_PATH, fresh_for=0):
+    """Process-wide FeedCache for `path`, so all digests in a process share fetches"""
+    with _shared_lock:
+        cache = _shared.get(path)
+        if cache is None:
+            cache = _shared[path] = FeedCache(path, fresh_for)
+        else:
+            cache.fresh_for = fresh_for
+            cache.reload()
+        return cache
@@ -0,0 +1,96 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import http_client
+from . import metrics
+from .budget import BudgetExceeded
+from .host_health import host_of, submit_by_host
+
+# ===== CONFIGURATION =====
+DEFAULT_MODE = "threads"      # "threads", "asyncio" or "sequential"
+DEFAULT_CONCURRENCY = 8       # Max feeds downloaded at the same time
+DEFAULT_PER_HOST_LIMIT = 2    # Max concurrent downloads against one host
+
+# ===== FUNCTIONS =====
+def _fetch_one(url, fetch):
+    """Fetch a single feed, returning (url, feed, error)"""
+    start = time.perf_counter()
+    try:
+        feed, error = fetch(url), None
+    except Exception as e:
+        feed, error = None, e
+    seconds = time.perf_counter() - start
+    metrics.observe("feed_fetch_seconds", seconds)
+    metrics.detail("feeds", url, seconds=round(seconds, 4), error=str(error) if error else None)
+    if error:
+        metrics.inc("feed_errors_total", feed=url)
+    return url, feed, error
+
+def _skipped(url, deadline):
+    return url, None, BudgetExceeded(f"not fetched within {deadline:.1f}s")
+
+def _fetch_sequential(urls, fetch, deadline):
+    started = time.monotonic()
+    return [_fetch_one(url, fetch) if deadline is None or time.monotonic() - started < deadline
+            else _skipped(url, deadline) for url in urls]
+
+def _fetch_threaded(urls, fetch, concurrency, per_host_limit, deadline):
+    # A feed takes a worker only once its host has a free slot, so workers never wait on a busy host
+    fetch_one = metrics.bound(_fetch_one)
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = submit_by_host(pool, lambda url: fetch_one(url, fetch), urls, per_host_limit)
+        done, _ = wait(futures, timeout=deadline)
+        return [future.result() if future in done else _skipped(url, deadline)
+                for url, future in zip(urls, futures)]
+    finally:
+        # Past the deadline, feeds still downloading are abandoned
+        pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+async def _fetch_async(urls, fetch, concurrency, per_host_limit, deadline):
+    loop = asyncio.get_running_loop()
+    global_slots = asyncio.Semaphore(concurrency)
+    host_slots = {host: asyncio.Semaphore(per_host_limit(host)) for host in map(host_of, urls)}
+
+    fetch_one = metrics.bound(_fetch_one)  # executor threads do not inherit the run's metrics
+
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        async def worker(url):
+            async with host_slots[host_of(url)], global_slots:
+                return await loop.run_in_executor(pool, fetch_one, url, fetch)
+
+        tasks = [asyncio.ensure_future(worker(url)) for url in urls]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        return [task.result() if task in done else _skipped(url, deadline) for url, task in zip(urls, tasks)]
+    finally:
+        pool.shutdown(wait=deadline is None, cancel_futures=True)
+
+def fetch_feeds(urls, mode=DEFAULT_MODE, concurrency=DEFAULT_CONCURRENCY,
+                per_host_limit=DEFAULT_PER_HOST_LIMIT, fetch=http_client.fetch_feed, host_limit=None,
+                deadline=None):
+    """Download and parse feeds concurrently.
+
+    Returns a list of (url, feed, error) tuples in the same order as `urls`,
+    so callers process entries exactly as the sequential loop would.
+    `host_limit(host, per_host_limit)` can lower the limit of single hosts
+    (see HostHealth.limit). Feeds not fetched within `deadline` seconds
+    come back with a BudgetExceeded error.
+    """
+    urls = list(urls)
+    concurrency = max(1, min(concurrency, len(urls) or 1))
+    default_limit = max(1, per_host_limit)
+
+    def per_host_limit(host):
+        return max(1, host_limit(host, default_limit)) if host_limit else default_limit
+
+    if mode == "sequential" or concurrency == 1:
+        return _fetch_sequential(urls, fetch, deadline)
+    if mode == "threads":
+        return _fetch_threaded(urls, fetch, concurrency, per_host_limit, deadline)
+    if mode == "asyncio":
+        return asyncio.run(_fetch_async(urls, fetch, concurrency, per_host_limit, deadline))
+    raise ValueError(f"Unknown feed fetch mode: {mode}")
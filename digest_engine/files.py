@@ -0,0 +1,31 @@
+import os
+import threading
+
+# ===== FUNCTIONS =====
+def write_atomic(path, data):
+    """Replace the file at `path` with `data` (str or bytes) in one step.
+
+    The data goes to a temporary file named after the process and thread,
+    is flushed to disk and then renamed over `path`, so readers see the old
+    file or the new one, never half of one, and concurrent writers in other
+    threads or processes never share a temporary file. The parent directory
+    is created if needed.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,228 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from urllib.parse import urlparse
+
+from . import metrics
+from .files import write_atomic
+
+# ===== CONFIGURATION =====
+DEFAULT_PATH = os.path.join(".cache", "hosts.json")
+DEFAULT_RATE = 5.0         # Requests per second allowed to one host
+BURST = 10                 # Requests a host may get back to back
+MIN_SHARE = 0.02           # Lowest share of the rate that backoff slows a host to
+SHARE_STEP = 0.05          # Share of the rate a host regains with each success
+BACKOFF = 2.0              # First pause after a 429/5xx; doubles with each failure in a row
+MAX_BACKOFF = 120          # Longest pause after 429/5xx (or Retry-After) that is honored
+MAX_WAIT = 15              # A request that would wait longer than this fails right away instead
+FAILURE_THRESHOLD = 3      # Failures in a row (timeouts, connection errors, 429, 5xx) that open the circuit
+COOLDOWN = 30 * 60         # Seconds a host is skipped once its circuit opens; doubles on each reopening
+MAX_COOLDOWN = 24 * 3600
+SLOW_SECONDS = 5.0         # Hosts slower than this on average get one connection at a time
+FAILING_RATE = 0.25        # ... as do hosts failing more than this share of requests
+EWMA_WEIGHT = 0.3          # Weight of the newest request in the latency and failure averages
+SAVED_FIELDS = ("share", "failures", "open_until", "cooldown", "not_before", "latency", "error_rate", "requests")
+
+# ===== HOST HEALTH =====
+class HostUnavailable(Exception):
+    """A request skipped because its host's circuit is open or it is backing off"""
+
+def host_of(url):
+    """Return the lower-cased host part of a URL"""
+    return urlparse(url).netloc.lower()
+
+class HostHealth:
+    """Per-host rate limiting, backoff and circuit breaking for every HTTP request.
+
+    Each host has a token bucket (`rate` requests per second, BURST at once;
+    None turns it off). A 429 or 5xx halves the host's rate and pauses it
+    for Retry-After or an exponential backoff; successes win the rate back
+    step by step. After
+    FAILURE_THRESHOLD failures in a row the circuit opens and requests to the
+    host fail right away for COOLDOWN seconds, after which one trial request
+    decides whether it closes again or reopens for twice as long. Latency
+    and failure averages set how many connections a host gets at once (see
+    limit). The state is saved to `path`, so a host that was failing
+    stays skipped in the next run.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, rate=DEFAULT_RATE):
+        self.path = path
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._hosts = {}
+        for host, saved in self._load().items():
+            state = self._state(host)
+            state.update({field: saved[field] for field in SAVED_FIELDS if field in saved})
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = {
+                "share": 1.0, "tokens": BURST, "refilled": time.monotonic(), "failures": 0,
+                "open_until": 0.0, "cooldown": COOLDOWN, "not_before": 0.0, "probing": False,
+                "latency": 0.0, "error_rate": 0.0, "requests": 0,
+            }
+        return state
+
+    # ----- before a request -----
+    def acquire(self, url):
+        """Wait for `url`'s host to allow a request; raises HostUnavailable instead of waiting long"""
+        host = host_of(url)
+        while True:
+            with self._lock:
+                state = self._state(host)
+                now = time.time()
+                if state["failures"] >= FAILURE_THRESHOLD:
+                    if now < state["open_until"] or state["probing"]:
+                        metrics.inc("host_skips_total", host=host)
+                        until = datetime.fromtimestamp(state["open_until"]).strftime("%H:%M")
+                        raise HostUnavailable(f"{host} failed {state['failures']} times in a row, skipped until {until}")
+                    state["probing"] = True  # half open: this request decides
+                    return
+                wait = state["not_before"] - now
+                if self.rate:
+                    rate = self.rate * state["share"]
+                    ticks = time.monotonic()
+                    state["tokens"] = min(BURST, state["tokens"] + (ticks - state["refilled"]) * rate)
+                    state["refilled"] = ticks
+                    wait = max(wait, (1 - state["tokens"]) / rate)
+                if wait <= 0:
+                    state["tokens"] -= 1
+                    return
+            if wait > MAX_WAIT:
+                metrics.inc("host_skips_total", host=host)
+                raise HostUnavailable(f"{host} is backing off for another {wait:.0f}s")
+            time.sleep(wait)
+
+    def latency(self, host):
+        """Average response time of `host` in seconds, or None if it was never asked"""
+        with self._lock:
+            state = self._hosts.get(host)
+            return state["latency"] if state and state["requests"] else None
+
+    def limit(self, host, default):
+        """Concurrent requests for `host`: `default`, or 1 while it is slow or failing"""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state and (state["latency"] > SLOW_SECONDS or state["error_rate"] > FAILING_RATE):
+                return 1
+        return default
+
+    # ----- after a request -----
+    def record(self, url, seconds, status=None, retry_after=None):
+        """Record a request's outcome: its status, or None for a timeout or connection error"""
+        host = host_of(url)
+        failed = status is None or status == 429 or status >= 500
+        with self._lock:
+            state = self._state(host)
+            state["probing"] = False
+            state["requests"] += 1
+            state["latency"] += EWMA_WEIGHT * (seconds - state["latency"])
+            state["error_rate"] += EWMA_WEIGHT * (failed - state["error_rate"])
+            if not failed:
+                state["failures"] = 0
+                state["cooldown"] = COOLDOWN
+                state["share"] = min(1.0, state["share"] + SHARE_STEP)
+                return
+            state["failures"] += 1
+            if status is not None:
+                state["share"] = max(MIN_SHARE, state["share"] / 2)
+                pause = retry_after if retry_after is not None else BACKOFF * 2 ** (state["failures"] - 1)
+                state["not_before"] = time.time() + min(MAX_BACKOFF, pause)
+                metrics.inc("host_backoffs_total", host=host)
+            if state["failures"] >= FAILURE_THRESHOLD:
+                state["open_until"] = time.time() + state["cooldown"]
+                print(f"{datetime.now()}: Circuit for {host} open for {state['cooldown'] / 60:.0f} min "
+                      f"after {state['failures']} failures in a row")
+                state["cooldown"] = min(MAX_COOLDOWN, state["cooldown"] * 2)
+
+    def stats(self):
+        """{host: saved state} with the latency and failure averages"""
+        with self._lock:
+            return {host: {field: state[field] for field in SAVED_FIELDS} for host, state in self._hosts.items()}
+
+    def report(self):
+        """Record each host's averages and circuit state as gauges of the current run"""
+        now = time.time()
+        for host, state in self.stats().items():
+            metrics.set_gauge("host_latency_seconds", round(state["latency"], 4), host=host)
+            metrics.set_gauge("host_error_rate", round(state["error_rate"], 4), host=host)
+            metrics.set_gauge("host_circuit_open", int(state["failures"] >= FAILURE_THRESHOLD
+                                                       and state["open_until"] > now), host=host)
+
+    # ----- persistence -----
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"{datetime.now()}: Ignoring unreadable host state {self.path}: {e}")
+            return {}
+
+    def save(self):
+        write_atomic(self.path, json.dumps(self.stats(), indent=2, sort_keys=True))
+
+# ===== PER-HOST DISPATCH =====
+def submit_by_host(pool, fn, urls, limit):
+    """Submit fn(url) for every URL to `pool`, with at most limit(host) calls running against one host.
+
+    A URL is handed to the pool only once its host has a free slot, so no
+    worker sits waiting behind a busy host while other hosts have work.
+    Returns one future per URL, in order; URLs still queued when the pool
+    shuts down stay pending, and those the pool cancels are cancelled.
+    """
+    urls = list(urls)
+    futures = [Future() for _ in urls]
+    queues = {}
+    for url, future in zip(urls, futures):
+        queues.setdefault(host_of(url), deque()).append((url, future))
+    free = {host: max(1, limit(host)) for host in queues}
+    lock = threading.Lock()
+
+    def start(host):
+        while True:
+            with lock:
+                if not queues[host] or not free[host]:
+                    return
+                url, future = queues[host].popleft()
+                free[host] -= 1
+            try:
+                started = pool.submit(fn, url)
+            except RuntimeError:
+                return  # the pool was shut down: what is left stays pending
+            started.add_done_callback(lambda started, host=host, future=future: finish(host, future, started))
+
+    def finish(host, future, started):
+        with lock:
+            free[host] += 1
+        if started.cancelled():
+            future.cancel()
+        elif started.exception() is not None:
+            future.set_exception(started.exception())
+        else:
+            future.set_result(started.result())
+        start(host)
+
+    for host in queues:
+        start(host)
+    return futures
+
+# ===== SHARED STATE =====
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_health(path=DEFAULT_PATH, rate=DEFAULT_RATE):
+    """The process-wide HostHealth for `path`"""
+    with _shared_lock:
+        health = _shared.get(path)
+        if health is None:
+            health = _shared[path] = HostHealth(path, rate)
+        health.rate = rate
+        return health
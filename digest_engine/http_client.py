@@ -0,0 +1,130 @@
+import threading
+import time
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import metrics
+
+# ===== CONFIGURATION =====
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+TIMEOUT = (5, 15)        # (connect, read) seconds
+RETRIES = 2              # Retries for connection errors and 429/5xx responses, without host health
+BACKOFF_FACTOR = 0.5     # Sleep between retries grows as 0.5s, 1s, 2s, ...
+POOL_HOSTS = 32          # Hosts with a keep-alive pool
+POOL_SIZE = 8            # Keep-alive connections per host
+
+_session = None
+_session_lock = threading.Lock()
+_host_health = None   # HostHealth consulted around every request, see use_host_health()
+
+# ===== FUNCTIONS =====
+def _retry():
+    """urllib3 retries of the session: none while HostHealth owns backoff and the breaker"""
+    if _host_health is not None:
+        # Retrying here would hit a failing host again and hide the failures from HostHealth.record
+        return Retry(0, read=False)
+    return Retry(
+        total=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        raise_on_status=False,
+    )
+
+def _apply_retry(session):
+    for adapter in session.adapters.values():
+        if isinstance(adapter, HTTPAdapter):
+            adapter.max_retries = _retry()
+
+def _build_session():
+    adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_SIZE, max_retries=_retry())
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept-Encoding": "gzip, deflate",
+    })
+    return session
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session()
+        return _session
+
+def reset_session():
+    """Close the shared session so the next request picks up new settings"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+def use_host_health(health):
+    """Rate-limit, back off and circuit-break every request through `health` (None: off)"""
+    global _host_health
+    with _session_lock:
+        _host_health = health
+        if _session is not None:
+            _apply_retry(_session)
+
+def _retry_after(response):
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+def get(url, headers=None, timeout=None, **kwargs):
+    """GET a URL through the shared keep-alive session.
+
+    With host health in use, waits for the host's rate limit and raises
+    host_health.HostUnavailable for a host that is being skipped.
+    """
+    health = _host_health
+    if health is None:
+        return get_session().get(url, headers=headers, timeout=timeout or TIMEOUT, **kwargs)
+    health.acquire(url)
+    start = time.perf_counter()
+    try:
+        response = get_session().get(url, headers=headers, timeout=timeout or TIMEOUT, **kwargs)
+    except requests.RequestException:
+        health.record(url, time.perf_counter() - start)
+        raise
+    health.record(url, time.perf_counter() - start, response.status_code, _retry_after(response))
+    return response
+
+def fetch_feed(url, etag=None, modified=None):
+    """Download a feed through the shared session and parse it with feedparser.
+
+    Sends If-None-Match / If-Modified-Since when validators are given. A 304
+    comes back as an empty result with status 304.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if modified:
+        headers["If-Modified-Since"] = modified
+
+    response = get(url, headers=headers)
+    if response.status_code == 304:
+        return feedparser.FeedParserDict(status=304, entries=[], href=response.url)
+    response.raise_for_status()
+    metrics.inc("http_bytes_total", len(response.content), kind="feed")
+
+    feed = feedparser.parse(
+        response.content,
+        response_headers={key.lower(): value for key, value in response.headers.items()},
+    )
+    feed["status"] = response.status_code
+    feed["href"] = response.url
+    if response.headers.get("ETag"):
+        feed["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        feed["modified"] = response.headers["Last-Modified"]
+    return feed
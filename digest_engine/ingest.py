@@ -0,0 +1,55 @@
+import time
+from datetime import datetime
+
+from . import metrics
+from .topk import TopK
+from .urls import canonical_url
+
+# ===== INGESTOR =====
+class Ingestor:
+    """Polls a digest's feeds between runs and keeps its top items ranked.
+
+    Each poll extracts and scores only the entries the digest has not
+    ranked before, recording them in the article store, so when the digest
+    runs it only renders and sends the store's pending window (see
+    Digest.run). The window lives in the store and survives restarts.
+    """
+
+    def __init__(self, digest):
+        self.digest = digest
+
+    def poll(self):
+        """Fetch the feeds once and rank the entries not seen before"""
+        digest = self.digest
+        store = digest.store()
+        print(f"{datetime.now()}: Polling the {digest.name} feeds...")
+        metrics.reset()
+        candidates = digest.gather()
+        ranked = store.ranked_links(digest.name, [c['link'] for c in candidates])
+        new = [c for c in candidates if canonical_url(c['link']) not in ranked]
+
+        # Extractions that cannot beat the window's current top items are skipped
+        top = TopK(digest.profile.max_items)
+        for score, seq, _ in store.window(digest.name, digest.profile.max_items):
+            top.push(score, seq)
+        digest.collect(new, top=top, offset=store.next_seq(digest.name))
+        store.set_polled(digest.name, time.time())
+        store.prune()
+
+        print(f"{datetime.now()}: Ranked {len(new)} new entries, holding the top {len(top)} {digest.noun}")
+        try:
+            metrics.write_reports(digest.config.METRICS_DIR, f"{digest.name}_ingest")
+        except Exception as e:
+            print(f"{datetime.now()}: Error writing metrics: {e}")
+
+    def ranked(self, max_age):
+        """(items best first, window mark), or None if the last poll is older than `max_age` seconds"""
+        digest = self.digest
+        store = digest.store()
+        polled = store.polled(digest.name)
+        if polled is None or time.time() - polled > max_age:
+            return None
+        mark = store.next_seq(digest.name)
+        items = [digest.item(row, row['source'], row['source_url'], row['source_type'], score)
+                 for score, _, row in store.window(digest.name, digest.profile.max_items)]
+        return items, mark
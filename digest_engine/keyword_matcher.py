@@ -0,0 +1,104 @@
+import re
+
+# ===== KEYWORD MATCHER =====
+# Words this short must stand alone where they begin or end a term ("ai"
+# must not match inside "maintain" or "said"); longer ones match as plain
+# substrings, so "trend" still matches "trends".
+WHOLE_WORD_MAX_LEN = 3
+
+def _is_short(word):
+    return len(word) <= WHOLE_WORD_MAX_LEN
+
+def _boundary_check(term):
+    """Return (spaced, search) confirming `term` at word boundaries, or None.
+
+    `spaced` is the term padded with a space on each short edge; most hits
+    are confirmed by it in one substring test. `search` is the literal-first
+    regex for the rest (a term next to punctuation or at an end of the text).
+    """
+    words = term.split()
+    start, end = _is_short(words[0]), _is_short(words[-1])
+    if not start and not end:
+        return None
+    literal = re.escape(term)
+    pattern = literal
+    if start:
+        pattern += r"(?<!\w" + literal + ")"
+    if end:
+        pattern += r"(?!\w)"
+    spaced = (" " if start else "") + term + (" " if end else "")
+    return spaced, re.compile(pattern).search
+
+class KeywordMatcher:
+    """Weighted term table compiled once for repeated matching.
+
+    find() reports every term present in a text, with its weight.
+    Matching is case-insensitive, and short words at the edge of a term
+    must be whole words (see WHOLE_WORD_MAX_LEN). Terms that share their
+    longest word are grouped under it, so one substring test rules out the
+    whole group for most texts.
+    """
+
+    def __init__(self, weights):
+        self.weights = dict(weights)
+        self._tables = {}
+
+    def _table(self, field):
+        """Compile the scan table whose values are one field of the weights.
+
+        `field` is a tuple position, None for the whole weight, or "term"
+        for (term, weight) pairs. Returns (plain, groups): plain is
+        [(term, value)] for terms that need a substring test only; groups
+        is [(anchor, [(term, check, value)])].
+        """
+        groups = {}
+        for term in self.weights:
+            groups.setdefault(max(term.split(), key=len), []).append(term)
+        plain, checked = [], []
+        for anchor, terms in groups.items():
+            if len(terms) == 1:
+                anchor = terms[0]   # the term's own test rules it in or out
+            members = [(anchor if term == anchor else term, _boundary_check(term), self._value(term, field))
+                       for term in terms]
+            if len(members) == 1 and members[0][1] is None:
+                plain.append((anchor, members[0][2]))
+            else:
+                checked.append((anchor, members))
+        table = self._tables[field] = (plain, checked)
+        return table
+
+    def _value(self, term, field):
+        if field == "term":
+            return term, self.weights[term]
+        if field is None:
+            return self.weights[term]
+        return self.weights[term][field]
+
+    def _scan(self, text, field):
+        """Return the values of every term found in `text`"""
+        plain, groups = self._tables.get(field) or self._table(field)
+        text = text.lower()
+        # Most terms are absent, and a plain substring test rules them out in C
+        found = [value for term, value in plain if term in text]
+        for anchor, members in groups:
+            if anchor in text:
+                for term, check, value in members:
+                    if (term is anchor or term in text) and (
+                            check is None or check[0] in text or check[1](text)):
+                        found.append(value)
+        return found
+
+    def find(self, text):
+        """Return {term: weight} for every term that occurs in `text`"""
+        return dict(self._scan(text, "term"))
+
+    def contains_any(self, text):
+        """Return True if at least one term occurs in `text`"""
+        return bool(self._scan(text, None))
+
+    def score(self, text, field=None):
+        """Sum the weights of the terms found in `text`.
+
+        With `field`, weights are tuples and only that position is summed.
+        """
+        return sum(self._scan(text, field))
@@ -0,0 +1,253 @@
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from . import metrics
+
+# ===== CONFIGURATION =====
+POOL_SIZE = 4                  # Parallel SMTP connections (one sender thread each)
+MESSAGES_PER_CONNECTION = 100  # Reconnect after this many messages (providers cap messages per session)
+RECIPIENTS_PER_MESSAGE = 50    # RCPT TO addresses per envelope when one message goes to many subscribers
+MAX_RETRIES = 3                # Retries after a transient (4xx) reply or a dropped connection
+RETRY_BACKOFF = 1.0            # Sleep between retries grows as 1s, 2s, 4s, ...
+IDLE_CHECK = 30                # Seconds idle before a pooled connection is checked with NOOP
+TIMEOUT = 30                   # Socket timeout in seconds
+
+# ===== FUNCTIONS =====
+def is_transient(code):
+    """True for SMTP replies that are worth retrying (4xx)"""
+    return 400 <= code < 500
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# ===== CONNECTION POOL =====
+class _Connection:
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+class SMTPPool:
+    """Authenticated SMTP connections reused across messages.
+
+    At most `size` connections are open at once. A connection is replaced
+    after `messages_per_connection` messages, when the server drops it, or
+    when it fails a NOOP after sitting idle.
+    """
+
+    def __init__(self, server, port, user=None, password=None, starttls=True,
+                 size=POOL_SIZE, messages_per_connection=MESSAGES_PER_CONNECTION, timeout=TIMEOUT):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.messages_per_connection = messages_per_connection
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _open(self):
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.user:
+                smtp.login(self.user, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        metrics.inc("smtp_connections_total")
+        return _Connection(smtp)
+
+    def _acquire(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if time.monotonic() - conn.last_used < IDLE_CHECK:
+                return conn
+            try:
+                conn.smtp.noop()
+                return conn
+            except (smtplib.SMTPException, OSError):
+                self._discard(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.smtp.close()
+        except Exception:
+            pass
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless it broke"""
+        with self._slots:
+            conn = self._acquire()
+            try:
+                yield conn.smtp
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                # smtplib resets the transaction after a refusal; only 421 closes the session
+                if getattr(e, "smtp_code", None) == 421:
+                    self._discard(conn)
+                else:
+                    self._release(conn)
+                raise
+            except BaseException:
+                self._discard(conn)
+                raise
+            conn.sent += 1
+            self._release(conn)
+
+    def _release(self, conn):
+        if conn.sent >= self.messages_per_connection:
+            self._quit(conn)
+            return
+        conn.last_used = time.monotonic()
+        self._idle.put(conn)
+
+    def _quit(self, conn):
+        try:
+            conn.smtp.quit()
+        except Exception:
+            self._discard(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+# ===== MAILER =====
+class Delivery:
+    """Outcome of a deliver() call"""
+
+    def __init__(self):
+        self.delivered = []
+        self.failed = {}    # address: error, refused permanently (5xx)
+        self.deferred = {}  # address: last error, still transient after all retries
+        self.envelopes = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ok(self):
+        return bool(self.delivered) and not self.failed and not self.deferred
+
+    def merge(self, delivered, failed, deferred, retries):
+        with self._lock:
+            self.delivered.extend(delivered)
+            self.failed.update(failed)
+            self.deferred.update(deferred)
+            self.envelopes += 1
+            self.retries += retries
+
+class Mailer:
+    """Sends messages over a pool of SMTP connections.
+
+    deliver() takes (message, recipients) pairs. A message for many
+    recipients is sent once per batch of `recipients_per_message`
+    addresses instead of once per address. Envelopes are spread over the
+    pool's connections in parallel. Transient failures are retried with
+    exponential backoff, for only the recipients that were deferred.
+    """
+
+    def __init__(self, server, port, user=None, password=None, starttls=True, sender=None,
+                 pool_size=POOL_SIZE, recipients_per_message=RECIPIENTS_PER_MESSAGE,
+                 messages_per_connection=MESSAGES_PER_CONNECTION,
+                 max_retries=MAX_RETRIES, retry_backoff=RETRY_BACKOFF, timeout=TIMEOUT):
+        self.pool = SMTPPool(server, port, user, password, starttls, pool_size, messages_per_connection, timeout)
+        self.sender = sender or user
+        self.pool_size = pool_size
+        self.recipients_per_message = recipients_per_message
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+    def deliver(self, messages):
+        """Send (message, recipients) pairs and return one Delivery for all of them"""
+        total = Delivery()
+        for delivery in self.deliver_each(messages):
+            total.delivered.extend(delivery.delivered)
+            total.failed.update(delivery.failed)
+            total.deferred.update(delivery.deferred)
+            total.envelopes += delivery.envelopes
+            total.retries += delivery.retries
+        return total
+
+    def deliver_each(self, messages):
+        """Send (message, recipients) pairs and return a Delivery per message"""
+        deliveries = [Delivery() for _ in messages]
+        envelopes = [(n, msg, batch) for n, (msg, recipients) in enumerate(messages)
+                     for batch in chunks(list(recipients), self.recipients_per_message)]
+        if len(envelopes) == 1 or self.pool_size == 1:
+            for n, msg, batch in envelopes:
+                deliveries[n].merge(*self._send_envelope(msg, batch))
+        else:
+            with ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="smtp-sender") as executor:
+                results = executor.map(metrics.bound(lambda envelope: self._send_envelope(*envelope[1:])), envelopes)
+                for (n, _, _), result in zip(envelopes, results):
+                    deliveries[n].merge(*result)
+        for result in ("delivered", "failed", "deferred"):
+            metrics.inc("emails_total", sum(len(getattr(d, result)) for d in deliveries), result=result)
+        return deliveries
+
+    def _send_envelope(self, msg, recipients):
+        """Send one envelope, retrying deferred recipients; returns (delivered, failed, deferred, retries)"""
+        pending, delivered, failed, deferred = list(recipients), [], {}, {}
+        error = None
+        attempt = 0
+        while pending:
+            if attempt > self.max_retries:
+                deferred.update(dict.fromkeys(pending, str(error)))
+                break
+            if attempt:
+                time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                metrics.inc("smtp_retries_total")
+            attempt += 1
+            try:
+                with self.pool.connection() as smtp:
+                    refused = smtp.send_message(msg, self.sender, pending)
+            except smtplib.SMTPRecipientsRefused as e:
+                refused = e.recipients
+            except smtplib.SMTPAuthenticationError as e:
+                # Bad credentials will not fix themselves within this call
+                deferred.update(dict.fromkeys(pending, f"{e.smtp_code} {_text(e.smtp_error)}"))
+                break
+            except smtplib.SMTPResponseException as e:
+                error = f"{e.smtp_code} {_text(e.smtp_error)}"
+                if not is_transient(e.smtp_code):
+                    failed.update(dict.fromkeys(pending, error))
+                    break
+                continue
+            except (smtplib.SMTPException, OSError) as e:
+                # Dropped or timed-out connection: the pool opens a new one
+                error = e
+                continue
+
+            refused = {address: (code, _text(reply)) for address, (code, reply) in refused.items()}
+            delivered.extend(address for address in pending if address not in refused)
+            failed.update({address: f"{code} {reply}" for address, (code, reply) in refused.items()
+                           if not is_transient(code)})
+            pending = [address for address, (code, _) in refused.items() if is_transient(code)]
+            if pending:
+                error = "; ".join(f"{address}: {code} {reply}" for address, (code, reply) in refused.items()
+                                  if is_transient(code))
+        return delivered, failed, deferred, max(attempt - 1, 0)
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _text(reply):
+    return reply.decode("utf-8", "replace") if isinstance(reply, bytes) else str(reply)
@@ -0,0 +1,231 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from .files import write_atomic
+
+# ===== CONFIGURATION =====
+PREFIX = "digest_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+HELP = {
+    "stage_seconds": "Time spent in each pipeline stage",
+    "feed_fetch_seconds": "Download and parse time per feed",
+    "article_extract_seconds": "Download and extraction time per article",
+    "http_bytes_total": "Response bytes downloaded",
+    "cache_requests_total": "Cache lookups by cache and result",
+    "feed_errors_total": "Feeds that failed to download or parse",
+    "article_errors_total": "Articles that failed to download or parse",
+    "article_empty_total": "Articles whose page held less text than their feed summary",
+    "redirects_resolved_total": "Redirect-wrapper links followed before dedup",
+    "entries_total": "Feed entries by digest and processing step",
+    "host_skips_total": "Requests skipped because their host's circuit was open or it was backing off",
+    "host_backoffs_total": "429/5xx responses that slowed a host down",
+    "host_latency_seconds": "Moving average of a host's response time",
+    "host_error_rate": "Moving average of a host's share of failed requests",
+    "host_circuit_open": "1 while a host is being skipped after repeated failures",
+    "budget_seconds": "Time budget of the run",
+    "budget_left_seconds": "Budget left as each stage started",
+    "degraded_total": "Feeds, extractions and retries skipped to stay within the run budget",
+    "seen_filter_lookup_seconds": "Mean time to check one link against the sent-links filter",
+    "seen_filter_false_positive_rate": "Estimated chance the sent-links filter drops a new link",
+    "run_seconds": "Wall-clock duration of the last run",
+    "run_timestamp_seconds": "Unix time the last run finished",
+    "run_success": "1 if the last run sent its email",
+    "emails_total": "Email recipients by delivery result",
+    "outbox_messages_total": "Spooled messages by outcome (sent, retry, dead, duplicate)",
+    "smtp_connections_total": "SMTP connections opened (and authenticated)",
+    "smtp_retries_total": "SMTP sends retried after a transient failure",
+}
+
+# ===== METRICS REGISTRY =====
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+class Metrics:
+    """Thread-safe counters, gauges and latency histograms for one run.
+
+    Values are keyed by name plus keyword labels. `details` holds per-item
+    records (e.g. per feed) that only go into the JSON report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_hooks = []  # callables (event, stage, labels), event is "enter" or "exit"
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.gauges = {}
+            self.histograms = {}
+            self.details = {}
+            self.started = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = _Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    def detail(self, table, key, **values):
+        """Merge `values` into the JSON-only record `table`[`key`]"""
+        with self._lock:
+            self.details.setdefault(table, {}).setdefault(key, {}).update(values)
+
+    @contextmanager
+    def timed(self, stage, **labels):
+        """Record the duration of a block (or, as a decorator, of each call) as stage_seconds"""
+        for hook in self.stage_hooks:
+            hook("enter", stage, labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+            for hook in self.stage_hooks:
+                hook("exit", stage, labels)
+
+    def to_prometheus(self):
+        """Render all values in the Prometheus text exposition format"""
+        with self._lock:
+            series = {}
+            for (name, labels), value in self.counters.items():
+                series.setdefault((name, "counter"), []).append((name, labels, value))
+            for (name, labels), value in self.gauges.items():
+                series.setdefault((name, "gauge"), []).append((name, labels, value))
+            for (name, labels), histogram in self.histograms.items():
+                lines = series.setdefault((name, "histogram"), [])
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append((name + "_bucket", labels + (("le", repr(float(bound))),), cumulative))
+                lines.append((name + "_bucket", labels + (("le", "+Inf"),), histogram.count))
+                lines.append((name + "_sum", labels, histogram.sum))
+                lines.append((name + "_count", labels, histogram.count))
+
+        out = []
+        for (name, kind), lines in sorted(series.items()):
+            if name in HELP:
+                out.append(f"# HELP {PREFIX}{name} {HELP[name]}")
+            out.append(f"# TYPE {PREFIX}{name} {kind}")
+            for sample, labels, value in lines:
+                rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                out.append(f"{PREFIX}{sample}{{{rendered}}} {value}" if rendered else f"{PREFIX}{sample} {value}")
+        return "\n".join(out) + "\n"
+
+    def to_dict(self):
+        """Return a JSON-ready summary of all values"""
+        def labelled(key):
+            name, labels = key
+            return name + "".join(f"[{k}={v}]" for k, v in labels)
+
+        with self._lock:
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "counters": {labelled(key): value for key, value in sorted(self.counters.items())},
+                "gauges": {labelled(key): value for key, value in sorted(self.gauges.items())},
+                "histograms": {
+                    labelled(key): {
+                        "count": h.count,
+                        "sum": round(h.sum, 6),
+                        "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                        "max": round(h.max, 6),
+                    }
+                    for key, h in sorted(self.histograms.items())
+                },
+                "details": self.details,
+            }
+
+    def write_reports(self, directory, name):
+        """Write <name>.prom (for the node_exporter textfile collector) and <name>.json"""
+        # The textfile collector must never see a half-written file
+        write_atomic(os.path.join(directory, f"{name}.prom"), self.to_prometheus())
+        write_atomic(os.path.join(directory, f"{name}.json"), json.dumps(self.to_dict(), indent=2))
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# ===== DEFAULT REGISTRY =====
+# Shared by the fetchers, caches and digests of this process, unless a run
+# collects into its own registry (see collecting())
+REGISTRY = Metrics()
+_current = contextvars.ContextVar("metrics_registry", default=None)
+
+def current():
+    """The registry the calling run records into"""
+    return _current.get() or REGISTRY
+
+@contextmanager
+def collecting(registry):
+    """Record everything the block does into `registry` instead of REGISTRY.
+
+    Lets concurrent runs keep separate reports. Work handed to other threads
+    must be wrapped with bound() to follow.
+    """
+    token = _current.set(registry)
+    try:
+        yield registry
+    finally:
+        _current.reset(token)
+
+def bound(fn):
+    """Wrap `fn` so it records into the caller's registry on any thread"""
+    registry = current()
+
+    def run(*args, **kwargs):
+        token = _current.set(registry)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+def inc(name, amount=1, **labels):
+    current().inc(name, amount, **labels)
+
+def set_gauge(name, value, **labels):
+    current().set(name, value, **labels)
+
+def observe(name, value, **labels):
+    current().observe(name, value, **labels)
+
+def detail(table, key, **values):
+    current().detail(table, key, **values)
+
+def timed(stage, **labels):
+    return current().timed(stage, **labels)
+
+def reset():
+    current().reset()
+
+def write_reports(directory, name):
+    current().write_reports(directory, name)
@@ -0,0 +1,132 @@
+import hashlib
+import html
+import re
+
+# ===== CONFIGURATION =====
+SIGNATURE_BITS = 64
+DEFAULT_MAX_DISTANCE = 5   # Differing signature bits at which two entries count as the same story
+TITLE_WEIGHT = 3           # Title words count this many times more than summary words
+SUMMARY_WORDS = 40         # Summary words signed, from the start of the summary
+MASK = (1 << SIGNATURE_BITS) - 1
+TAG_PATTERN = re.compile(r"<[^>]+>")
+WORD_PATTERN = re.compile(r"[^\W_]+")
+PUBLISHER_SUFFIX = re.compile(r"\s+[-|\u2013\u2014]\s+[^-|\u2013\u2014]{1,60}$")   # "Title - The Verge"
+
+# ===== SIGNATURES =====
+def words(text):
+    """Distinct lowercase words of `text` in order, with HTML tags and entities removed"""
+    return list(dict.fromkeys(WORD_PATTERN.findall(html.unescape(TAG_PATTERN.sub(" ", text)).lower())))
+
+def simhash(hashes):
+    """SimHash of 64-bit token hashes: bit i is set when most hashes have bit i set.
+
+    A token repeated in `hashes` is weighted by its repeats. The per-bit
+    counts are kept bit-sliced (counters[j] holds bit j of all 64 counts),
+    so adding a hash is a ripple-carry add on Python ints instead of a loop
+    over its 64 bits.
+    """
+    counters = []
+    for carry in hashes:
+        j = 0
+        while carry:
+            if j == len(counters):
+                counters.append(carry)
+                break
+            counters[j], carry = counters[j] ^ carry, counters[j] & carry
+            j += 1
+
+    # Compare every count with half the hashes, most significant bit first
+    half = len(hashes) // 2
+    greater, equal = 0, MASK
+    for j in reversed(range(max(len(counters), half.bit_length()))):
+        count_bits = counters[j] if j < len(counters) else 0
+        if (half >> j) & 1:
+            equal &= count_bits
+        else:
+            greater |= equal & count_bits
+            equal &= ~count_bits
+    return greater
+
+def signatures(entries):
+    """SimHash signatures of (title, summary) pairs; None for an entry without words.
+
+    The publisher suffix that aggregators append to titles is dropped, and
+    title words are weighted TITLE_WEIGHT times the summary's first
+    SUMMARY_WORDS words, since copies of a story share the headline far
+    more than the teaser.
+    """
+    cache = {}
+
+    def token_hash(token):
+        value = cache.get(token)
+        if value is None:
+            value = cache[token] = int.from_bytes(
+                hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        return value
+
+    result = []
+    for title, summary in entries:
+        title_words = words(PUBLISHER_SUFFIX.sub("", title))
+        hashes = [token_hash(word) for word in title_words] * TITLE_WEIGHT
+        title_words = set(title_words)
+        hashes += [token_hash(word) for word in words(summary)[:SUMMARY_WORDS] if word not in title_words]
+        result.append(simhash(hashes) if hashes else None)
+    return result
+
+# ===== CLUSTERING =====
+def clusters(entries, max_distance=DEFAULT_MAX_DISTANCE):
+    """Group the indexes of (title, summary) `entries` whose signatures differ in at most `max_distance` bits.
+
+    Signatures are split into max_distance + 1 bands; two signatures that
+    close agree exactly on at least one band, so only entries sharing a
+    band are compared; at the default distance a band bucket holds about
+    1/1000 of the pool. Returns lists of indexes in order, one per cluster.
+    """
+    bands = max_distance + 1
+    width = SIGNATURE_BITS // bands
+    parent = list(range(len(entries)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    exact = {}
+    buckets = {}
+    for i, signature in enumerate(signatures(entries)):
+        if signature is None:
+            continue
+        if signature in exact:
+            union(exact[signature], i)
+            continue
+        exact[signature] = i
+        for band in range(bands):
+            shift = band * width
+            key = (band, (signature >> shift) & ((1 << width) - 1) if band < bands - 1 else signature >> shift)
+            members = buckets.setdefault(key, [])
+            for j, other in members:
+                if (signature ^ other).bit_count() <= max_distance:
+                    union(j, i)
+            members.append((i, signature))
+
+    groups = {}
+    for i in range(len(entries)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+def collapse(candidates, best, max_distance=DEFAULT_MAX_DISTANCE):
+    """Keep one candidate per near-duplicate cluster of title and summary.
+
+    `best` ranks the members of a cluster (highest wins, earliest on ties).
+    Returns (kept candidates, dropped duplicates), both in their original order.
+    """
+    groups = clusters([(c['title'], c['summary']) for c in candidates], max_distance)
+    keep = {max(group, key=lambda i: (best(candidates[i]), -i)) for group in groups}
+    return ([c for i, c in enumerate(candidates) if i in keep],
+            [c for i, c in enumerate(candidates) if i not in keep])
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from email import message_from_bytes
+from email import policy
+
+from . import metrics
+from .files import write_atomic
+
+# ===== CONFIGURATION =====
+MAX_ATTEMPTS = 12          # Drain attempts before a message is moved to dead/
+RETRY_DELAY = 60           # Seconds before the first re-attempt; doubles per attempt
+MAX_RETRY_DELAY = 3600     # Cap on the delay between attempts
+CLAIM_TIMEOUT = 15 * 60    # Seconds after which a claim left by a crashed sender is taken over
+SENT_RETENTION = 7 * 24 * 3600   # Seconds sent/ markers are kept to reject duplicate enqueues
+
+# ===== FUNCTIONS =====
+def make_key(digest, *parts):
+    """Idempotency key: the same digest, day and content always map to the same key"""
+    return f"{digest}-{hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()[:24]}"
+
+# ===== OUTBOX =====
+class Outbox:
+    """On-disk spool of rendered messages waiting for delivery.
+
+    Each message is stored as <key>.eml plus a <key>.json state file listing
+    the recipients still pending. drain() sends what is due, keeps
+    transiently deferred recipients for a later attempt with backoff and
+    retires the message to sent/ (or dead/ after MAX_ATTEMPTS). The key
+    makes enqueue idempotent: a message that is spooled or was sent within
+    SENT_RETENTION is not queued again. Senders claim a message with an
+    exclusive lock file, so overlapping drains never send it twice.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sent_dir = os.path.join(directory, "sent")
+        self.dead_dir = os.path.join(directory, "dead")
+        for path in (directory, self.sent_dir, self.dead_dir):
+            os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, key, suffix, folder=None):
+        return os.path.join(folder or self.directory, key + suffix)
+
+    def enqueue(self, key, msg, recipients):
+        """Spool `msg` for `recipients`; returns False if `key` is already spooled or sent"""
+        with self._lock:
+            if self.is_sent(key) or os.path.exists(self._path(key, ".json")):
+                metrics.inc("outbox_messages_total", outcome="duplicate")
+                return False
+            if "Message-ID" not in msg:
+                # Stable across re-attempts, so receivers can drop a copy resent after a crash
+                domain = (msg["From"] or "localhost").rpartition("@")[2] or "localhost"
+                msg["Message-ID"] = f"<{key}@{domain}>"
+            write_atomic(self._path(key, ".eml"), msg.as_bytes())
+            # The state file is written last: its presence marks the message as ready
+            state = {
+                "key": key,
+                "recipients": list(recipients),
+                "delivered": 0,
+                "failed": {},
+                "attempts": 0,
+                "next_attempt": 0,
+                "created": time.time(),
+                "last_error": None,
+            }
+            write_atomic(self._path(key, ".json"), json.dumps(state).encode())
+        return True
+
+    def is_sent(self, key):
+        return os.path.exists(self._path(key, ".json", self.sent_dir))
+
+    def _load(self, key):
+        try:
+            with open(self._path(key, ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # retired by another sender
+
+    def pending(self):
+        """State of every spooled message, oldest first"""
+        states = [self._load(name[:-5]) for name in os.listdir(self.directory) if name.endswith(".json")]
+        return sorted(filter(None, states), key=lambda state: state["created"])
+
+    def _claim(self, key):
+        path = self._path(key, ".lock")
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < CLAIM_TIMEOUT:
+                    return False
+                os.remove(path)
+            except OSError:
+                return False
+            return self._claim(key)
+
+    def _release(self, key):
+        try:
+            os.remove(self._path(key, ".lock"))
+        except OSError:
+            pass
+
+    def drain(self, mailer_factory):
+        """Deliver every due message with one mailer; returns counts by outcome"""
+        self.prune()
+        now = time.time()
+        claimed = []
+        for state in self.pending():
+            key = state["key"]
+            if state["next_attempt"] > now or not self._claim(key):
+                continue
+            # Another sender may have settled the message between listing and claiming
+            state = self._load(key)
+            if state is None or state["next_attempt"] > now:
+                self._release(key)
+                continue
+            claimed.append(state)
+        summary = {"sent": 0, "retry": 0, "dead": 0}
+        if not claimed:
+            return summary
+
+        try:
+            messages = []
+            for state in claimed:
+                with open(self._path(state["key"], ".eml"), "rb") as f:
+                    messages.append((message_from_bytes(f.read(), policy=policy.default), state["recipients"]))
+            with mailer_factory() as mailer:
+                deliveries = mailer.deliver_each(messages)
+            for state, delivery in zip(claimed, deliveries):
+                outcome = self._settle(state, delivery)
+                summary[outcome] += 1
+                metrics.inc("outbox_messages_total", outcome=outcome)
+        finally:
+            for state in claimed:
+                self._release(state["key"])
+        return summary
+
+    def _settle(self, state, delivery):
+        key = state["key"]
+        state["attempts"] += 1
+        state["delivered"] += len(delivery.delivered)
+        state["failed"].update(delivery.failed)
+        state["recipients"] = [address for address in state["recipients"] if address in delivery.deferred]
+        state["last_error"] = next(iter(delivery.deferred.values()), None)
+
+        if not state["recipients"] and state["delivered"]:
+            self._retire(key, state, self.sent_dir)
+            return "sent"
+        if not state["recipients"]:
+            self._retire(key, state, self.dead_dir)
+            print(f"{datetime.now()}: Outbox could not deliver {key}: {state['failed']}")
+            return "dead"
+        if state["attempts"] >= MAX_ATTEMPTS:
+            self._retire(key, state, self.dead_dir)
+            print(f"{datetime.now()}: Outbox gave up on {key} after {state['attempts']} attempts: "
+                  f"{state['last_error']}")
+            return "dead"
+        state["next_attempt"] = time.time() + min(RETRY_DELAY * 2 ** (state["attempts"] - 1), MAX_RETRY_DELAY)
+        write_atomic(self._path(key, ".json"), json.dumps(state).encode())
+        return "retry"
+
+    def _retire(self, key, state, folder):
+        state["finished"] = time.time()
+        write_atomic(self._path(key, ".json", folder), json.dumps(state).encode())
+        if folder == self.dead_dir:
+            os.replace(self._path(key, ".eml"), self._path(key, ".eml", folder))
+        else:
+            os.remove(self._path(key, ".eml"))
+        os.remove(self._path(key, ".json"))
+
+    def prune(self, retention=SENT_RETENTION):
+        """Forget sent/ markers older than `retention` seconds"""
+        cutoff = time.time() - retention
+        for name in os.listdir(self.sent_dir):
+            path = os.path.join(self.sent_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def start_drainer(self, mailer_factory, interval):
+        """Drain now and then every `interval` seconds on a daemon thread"""
+        drainer = Drainer(self, mailer_factory, interval)
+        drainer.start()
+        return drainer
+
+class Drainer(threading.Thread):
+    """Background sender that keeps draining an Outbox"""
+
+    def __init__(self, outbox, mailer_factory, interval):
+        super().__init__(name="outbox-drainer", daemon=True)
+        self.outbox = outbox
+        self.mailer_factory = mailer_factory
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                summary = self.outbox.drain(self.mailer_factory)
+                if any(summary.values()):
+                    print(f"{datetime.now()}: Outbox drained: {summary}")
+            except Exception as e:
+                print(f"{datetime.now()}: Error draining outbox: {e}")
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
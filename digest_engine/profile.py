@@ -0,0 +1,31 @@
+# ===== SCORING PROFILE =====
+class ScoringProfile:
+    """How one digest filters, scores and trims feed entries.
+
+    Digests subclass it. Candidates are dicts with title, link, summary,
+    content, source (a registry Source) and published; `content` is the
+    feed summary or, for short summaries, the extracted article text.
+    """
+
+    max_items = 10           # Items in the email
+    entries_per_source = 20  # Entries read from the top of each feed
+    min_summary_chars = 50   # Shorter feed summaries are replaced by the article text
+    extract_chars = 250      # Article text kept after extraction
+    summary_chars = 250      # Characters of content shown per item
+    history_days = 0         # Also rank articles already in the store from this many days back
+
+    def accept(self, entry, source):
+        """Whether a feed entry becomes a candidate at all"""
+        return True
+
+    def published(self, entry):
+        """The entry's publication date as scored and shown"""
+        return entry.get('published', '')
+
+    def score(self, candidates):
+        """Scores for a batch of candidates; None rejects a candidate"""
+        raise NotImplementedError
+
+    def upper_bound(self, candidate):
+        """Highest score `candidate` could get once its article is extracted"""
+        return float("inf")  # never skip an extraction
@@ -0,0 +1,169 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+
+from . import metrics
+
+# ===== CONFIGURATION =====
+SAMPLE_INTERVAL = 0.005  # Seconds between stack samples
+TOP_N = 15               # Rows per table in the text report
+TRACE_FRAMES = 1         # Frames kept per allocation (1 = the allocating line)
+
+# ===== STACK SAMPLER =====
+class StackSampler(threading.Thread):
+    """Wall-clock sampling profiler covering every thread.
+
+    Unlike cProfile (main thread only) this also sees the download and
+    extraction worker pools. Stacks are counted in the collapsed format
+    ("outer;inner;leaf count") that flamegraph.pl, speedscope and inferno
+    read.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Pool workers differ only by their number suffix; merge them
+                thread = re.sub(r"_\d+$", "", names.get(ident, "thread"))
+                self.stacks[";".join([thread] + stack[::-1])] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+# ===== STAGE MEMORY =====
+class StageMemory:
+    """metrics stage hook that attributes tracemalloc growth to pipeline stages.
+
+    A snapshot is taken when a metrics.timed() stage starts and ends. The
+    difference, grouped by allocating line, is added to that stage. Peak
+    traced memory is tracked per stage too. Snapshots are slow on a big
+    heap; the time they take is kept in `overhead`.
+    """
+
+    def __init__(self):
+        self.overhead = 0.0
+        self.sites = defaultdict(Counter)   # stage -> {site: bytes}
+        self.counts = defaultdict(Counter)  # stage -> {site: blocks}
+        self.peaks = defaultdict(int)
+        self.calls = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Snapshot.filter_traces() is slow on big heaps; drop our own sites when grouping instead
+        self._ignored = (tracemalloc.__file__, __file__)
+
+    def __call__(self, event, stage, labels):
+        start = time.perf_counter()
+        try:
+            self._record(event, stage, labels)
+        finally:
+            self.overhead += time.perf_counter() - start
+
+    def _record(self, event, stage, labels):
+        name = ".".join([labels["digest"], stage] if "digest" in labels else [stage])
+        stack = self._local.__dict__.setdefault("stack", [])
+        if event == "enter":
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            stack.append({"name": name, "snapshot": tracemalloc.take_snapshot(), "peak": 0})
+            return
+
+        entry = stack.pop()
+        peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+        diff = tracemalloc.take_snapshot().compare_to(entry["snapshot"], "lineno")
+        with self._lock:
+            self.calls[name] += 1
+            self.peaks[name] = max(self.peaks[name], peak)
+            for stat in diff:
+                frame = stat.traceback[0]
+                if stat.size_diff > 0 and frame.filename not in self._ignored:
+                    site = f"{frame.filename}:{frame.lineno}"
+                    self.sites[name][site] += stat.size_diff
+                    self.counts[name][site] += max(stat.count_diff, 0)
+        if stack:
+            stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+        tracemalloc.reset_peak()
+
+    def report(self, top_n=TOP_N):
+        lines = []
+        for name in sorted(self.sites, key=lambda n: -sum(self.sites[n].values())):
+            total = sum(self.sites[name].values())
+            lines.append(f"\n[{name}] {self.calls[name]} call(s), net +{total / 1024:.1f} KiB, "
+                         f"peak {self.peaks[name] / 1024 / 1024:.1f} MiB traced")
+            for site, size in self.sites[name].most_common(top_n):
+                lines.append(f"  {size / 1024:10.1f} KiB  {self.counts[name][site]:8d} blocks  {site}")
+        return "\n".join(lines)
+
+# ===== FUNCTIONS =====
+def profile_run(fn, name, out_dir, top_n=TOP_N):
+    """Run `fn` once under cProfile, the stack sampler and tracemalloc.
+
+    Writes to `out_dir`:
+      <name>.pstats     cProfile data (snakeviz, pstats, gprof2dot)
+      <name>.collapsed  sampled stacks of all threads for flamegraph tools
+      <name>.txt        top functions by CPU time and top allocation sites per stage
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    profile = cProfile.Profile()
+    memory = StageMemory()
+    sampler = StackSampler()
+
+    tracemalloc.start(TRACE_FRAMES)
+    metrics.REGISTRY.stage_hooks.append(memory)
+    sampler.start()
+    started = time.perf_counter()
+    profile.enable()
+    try:
+        return fn()
+    finally:
+        profile.disable()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        metrics.REGISTRY.stage_hooks.remove(memory)
+        tracemalloc.stop()
+
+        profile.dump_stats(os.path.join(out_dir, f"{name}.pstats"))
+        sampler.write_collapsed(os.path.join(out_dir, f"{name}.collapsed"))
+
+        cpu = io.StringIO()
+        stats = pstats.Stats(profile, stream=cpu)
+        stats.sort_stats("cumulative").print_stats(top_n)
+        stats.sort_stats("tottime").print_stats(top_n)
+        with open(os.path.join(out_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Profile of {name}: {elapsed:.2f}s wall, {sampler.samples} stack samples, "
+                    f"{memory.overhead:.2f}s of it taking memory snapshots "
+                    f"(StageMemory in the tables below)\n")
+            f.write("\n===== CPU (main thread, cProfile) =====\n")
+            f.write(cpu.getvalue())
+            f.write("\n===== MEMORY (net growth per stage, tracemalloc) =====")
+            f.write(memory.report(top_n) + "\n")
+        print(f"Profile written to {out_dir}/{name}.txt, .pstats and .collapsed")
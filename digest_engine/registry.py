@@ -0,0 +1,51 @@
+# ===== SOURCE REGISTRY =====
+class Source:
+    """One feed: where it lives, what kind of source it is and how much it counts.
+
+    `type` and `weight` are read by scoring profiles; `digests` names the
+    digests that read this feed.
+    """
+
+    def __init__(self, url, name=None, type="other", weight=0, digests=()):
+        self.url = url
+        self.name = name or url
+        self.type = type
+        self.weight = weight
+        self.digests = set(digests)
+
+    def __repr__(self):
+        return f"Source({self.name!r}, type={self.type!r}, digests={sorted(self.digests)})"
+
+class SourceRegistry:
+    """Every feed the digests read, registered once per URL.
+
+    A feed used by several digests is one entry, so the fetch layer
+    downloads it once for all of them.
+    """
+
+    def __init__(self, sources=()):
+        self._sources = {}
+        for source in sources:
+            self.add(source.url, source.name, source.type, source.weight, source.digests)
+
+    def add(self, url, name=None, type="other", weight=0, digests=()):
+        """Register a feed; registering a known URL again only adds digests to it"""
+        source = self._sources.get(url)
+        if source is None:
+            source = self._sources[url] = Source(url, name, type, weight, digests)
+        else:
+            source.digests.update(digests)
+        return source
+
+    def for_digest(self, digest):
+        """Sources read by `digest`, in registration order"""
+        return [source for source in self._sources.values() if digest in source.digests]
+
+    def urls(self):
+        return list(self._sources)
+
+    def __iter__(self):
+        return iter(self._sources.values())
+
+    def __len__(self):
+        return len(self._sources)
@@ -0,0 +1,114 @@
+import hashlib
+import html
+import re
+
+# ===== CONFIGURATION =====
+PLACEHOLDER = re.compile(r"\$\{(!?)(\w+)\}")  # ${name} is escaped, ${!name} is inserted as is
+TAG = re.compile(r"<[^>]+>")
+WHITESPACE = re.compile(r"\s+")
+
+# ===== FUNCTIONS =====
+def plain_text(markup):
+    """Turn a feed summary that may contain HTML into plain text"""
+    return WHITESPACE.sub(" ", html.unescape(TAG.sub(" ", markup))).strip()
+
+# ===== TEMPLATES =====
+class Template:
+    """Template source compiled once into literal chunks and placeholders.
+
+    ${name} is HTML-escaped (unless the template is built with
+    escape=False, for plain text) and ${!name} is inserted as is.
+    Rendering appends to a list of parts; nothing is concatenated until
+    the caller joins them once.
+    """
+
+    def __init__(self, source, escape=True):
+        self.literals = []
+        self.fields = []
+        position = 0
+        for match in PLACEHOLDER.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.fields.append((match.group(2), match.group(1) == "!" or not escape))
+            position = match.end()
+        self.tail = source[position:]
+
+    def render_into(self, out, values):
+        for literal, (name, raw) in zip(self.literals, self.fields):
+            out.append(literal)
+            value = str(values[name])
+            out.append(value if raw else html.escape(value))
+        out.append(self.tail)
+
+    def render(self, values):
+        out = []
+        self.render_into(out, values)
+        return "".join(out)
+
+class DigestTemplate:
+    """HTML and plain-text layout of one digest email.
+
+    `item_values(index, item)` maps an item to the placeholders of the item
+    templates. Header and item blocks are rendered once per digest by
+    prepare(); only the per-recipient footer is rendered per message.
+    """
+
+    def __init__(self, css, header, item, footer, empty,
+                 text_header, text_item, text_footer, text_empty, item_values):
+        self.head = f"<html>\n<head>\n<style>\n{css}\n</style>\n</head>\n<body>\n"
+        self.tail = "</body>\n</html>\n"
+        self.header = Template(header)
+        self.item = Template(item)
+        self.footer = Template(footer)
+        self.empty = Template(empty)
+        self.text_header = Template(text_header, escape=False)
+        self.text_item = Template(text_item, escape=False)
+        self.text_footer = Template(text_footer, escape=False)
+        self.text_empty = Template(text_empty, escape=False)
+        self.item_values = item_values
+
+    def prepare(self, items, context):
+        """Render everything that does not depend on the recipient"""
+        if not items:
+            return PreparedDigest(self, [self.empty.render(context)], [self.text_empty.render(context)],
+                                  context, empty=True)
+
+        html_parts = [self.head]
+        text_parts = []
+        self.header.render_into(html_parts, context)
+        self.text_header.render_into(text_parts, context)
+        for index, item in enumerate(items, 1):
+            values = self.item_values(index, item)
+            self.item.render_into(html_parts, values)
+            self.text_item.render_into(text_parts, values)
+        return PreparedDigest(self, ["".join(html_parts)], ["".join(text_parts)], context)
+
+    def render(self, items, context, recipient=None):
+        """Return (html, text) for one recipient"""
+        return self.prepare(items, context).render(recipient)
+
+class PreparedDigest:
+    """A digest with its shared body rendered; render() adds the personal parts"""
+
+    def __init__(self, template, html_body, text_body, context, empty=False):
+        self.template = template
+        self.html_body = html_body
+        self.text_body = text_body
+        self.context = context
+        self.empty = empty
+
+    @property
+    def fingerprint(self):
+        """Hash of the shared body: equal for digests with the same content"""
+        return hashlib.sha1("".join(self.html_body + self.text_body).encode()).hexdigest()
+
+    def render(self, recipient=None):
+        """Return (html, text) personalized with the `recipient` placeholder values"""
+        if self.empty:
+            return self.html_body[0], self.text_body[0]
+        values = dict(self.context, **(recipient or {}))
+        html_parts = list(self.html_body)
+        text_parts = list(self.text_body)
+        self.template.footer.render_into(html_parts, values)
+        self.template.text_footer.render_into(text_parts, values)
+        html_parts.append(self.template.tail)
+        return "".join(html_parts), "".join(text_parts)
@@ -0,0 +1,185 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from . import metrics
+from .files import write_atomic
+
+# ===== CONFIGURATION =====
+WORKERS = 4                # Jobs that may run at the same time
+STATE_PATH = ".cache/scheduler.json"   # Last completed run of each job, for catching up after downtime
+MAX_SLEEP = 300            # Seconds between wall-clock re-checks (clock changes, suspend)
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# ===== SCHEDULES =====
+class Schedule:
+    """Run times of a job: every day or one weekday at a local HH:MM, or every N minutes.
+
+    Written as "daily at 08:00", "monday at 08:00" or "every 30 minutes";
+    interval run times are counted from midnight.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        words = spec.lower().split()
+        if len(words) == 3 and words[0] == "every" and words[2] in ("minute", "minutes"):
+            self.every = timedelta(minutes=int(words[1]))
+            return
+        day, _, at = spec.lower().partition(" at ")
+        day = day.strip()
+        if day not in ("daily", *WEEKDAYS):
+            raise ValueError(f"Unknown schedule: {spec!r}")
+        hour, minute = at.strip().split(":")
+        self.every = None
+        self.weekday = None if day == "daily" else WEEKDAYS.index(day)
+        self.hour = int(hour)
+        self.minute = int(minute)
+
+    def _matches(self, moment):
+        return self.weekday is None or moment.weekday() == self.weekday
+
+    def last_before(self, moment):
+        """Latest run time at or before `moment`"""
+        if self.every:
+            midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+            return midnight + self.every * ((moment - midnight) // self.every)
+        due = moment.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if due > moment:
+            due -= timedelta(days=1)
+        while not self._matches(due):
+            due -= timedelta(days=1)
+        return due
+
+    def next_after(self, moment):
+        """Earliest run time strictly after `moment`"""
+        if self.every:
+            next_midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+            return min(self.last_before(moment) + self.every, next_midnight)
+        due = moment.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if due <= moment:
+            due += timedelta(days=1)
+        while not self._matches(due):
+            due += timedelta(days=1)
+        return due
+
+    def __repr__(self):
+        return f"Schedule({self.spec!r})"
+
+# ===== SCHEDULER =====
+class Job:
+    def __init__(self, name, fn, schedule):
+        self.name = name
+        self.fn = fn
+        self.schedule = schedule if isinstance(schedule, Schedule) else Schedule(schedule)
+        self.next_due = None
+        self.running = False
+
+class Scheduler:
+    """Runs every digest job of the process on one timer and a worker pool.
+
+    The loop sleeps until the next run time instead of polling. A job whose
+    previous run is still going skips that run time rather than starting a
+    second copy, and a slow job never holds up the others. The last
+    completed run time of each job is kept in `state_path`; on start, a job
+    that missed its latest run time (or never ran) runs once right away.
+    """
+
+    def __init__(self, workers=WORKERS, state_path=STATE_PATH):
+        self.jobs = {}
+        self.state_path = state_path
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="digest-job")
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._state = self._load_state()
+
+    def add(self, name, fn, schedule):
+        """Register `fn` to run on `schedule` (a Schedule or its spec string)"""
+        job = Job(name, fn, schedule)
+        with self._lock:
+            self.jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    # ----- state -----
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"{datetime.now()}: Ignoring unreadable scheduler state {self.state_path}: {e}")
+            return {}
+
+    def _save_state(self):
+        with self._lock:
+            text = json.dumps(self._state, indent=2, sort_keys=True)
+        write_atomic(self.state_path, text)
+
+    # ----- running -----
+    def _dispatch(self, job, due):
+        """Start a run of `job` for run time `due` unless one is still going"""
+        with self._lock:
+            if job.running:
+                print(f"{datetime.now()}: {job.name} is still running, skipping its {due:%Y-%m-%d %H:%M} run")
+                return False
+            job.running = True
+        self._pool.submit(self._run, job, due)
+        return True
+
+    def _run(self, job, due):
+        # Each run records into its own metrics registry, so concurrent jobs keep separate reports
+        try:
+            with metrics.collecting(metrics.Metrics()):
+                job.fn()
+            with self._lock:
+                self._state[job.name] = due.isoformat()
+            self._save_state()
+        except Exception as e:
+            print(f"{datetime.now()}: Job {job.name} failed: {e}")
+        finally:
+            with self._lock:
+                job.running = False
+
+    def catch_up(self, now=None):
+        """Run each job whose latest run time passed without a completed run"""
+        now = now or datetime.now()
+        for job in list(self.jobs.values()):
+            missed = job.schedule.last_before(now)
+            last_run = self._state.get(job.name)
+            if last_run is None or datetime.fromisoformat(last_run) < missed:
+                print(f"{datetime.now()}: Catching up {job.name} (last completed run: {last_run or 'never'})")
+                self._dispatch(job, missed)
+
+    def run_forever(self):
+        """Catch up, then run jobs at their run times until stop()"""
+        self.catch_up()
+        while not self._stopped:
+            now = datetime.now()
+            with self._lock:
+                jobs = list(self.jobs.values())
+            for job in jobs:
+                if job.next_due is None:
+                    job.next_due = job.schedule.next_after(now)
+                elif job.next_due <= now:
+                    self._dispatch(job, job.next_due)
+                    job.next_due = job.schedule.next_after(now)
+            if not jobs:
+                self._wakeup.wait(MAX_SLEEP)
+            else:
+                deadline = min(job.next_due for job in jobs)
+                self._wakeup.wait(min(MAX_SLEEP, max(0, (deadline - datetime.now()).total_seconds())))
+            self._wakeup.clear()
+
+    def next_runs(self):
+        """{job name: next run time}"""
+        now = datetime.now()
+        return {job.name: job.next_due or job.schedule.next_after(now) for job in self.jobs.values()}
+
+    def stop(self, wait=True):
+        """End run_forever(); with `wait`, let running jobs finish"""
+        self._stopped = True
+        self._wakeup.set()
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import math
+import threading
+import time
+
+from .files import write_atomic
+from .urls import canonical_url
+
+# ===== CONFIGURATION =====
+DEFAULT_CAPACITY = 10000          # Links added per generation before the error rate degrades
+DEFAULT_ERROR_RATE = 0.001        # Target false-positive rate of each generation
+DEFAULT_GENERATIONS = 4           # Filters kept; the oldest is dropped at each rotation
+DEFAULT_EXPIRY = 28 * 24 * 3600   # Seconds a link is remembered (between 3/4 of this and all of it)
+
+# ===== BLOOM FILTERS =====
+def _positions(key, bits, hashes):
+    """Bit positions of `key` by double hashing one 128-bit digest"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+class RotatingBloomFilter:
+    """Compact set of links with time-based expiry.
+
+    A Bloom filter per generation: links go into the newest one and every
+    generation is checked on lookup. Every expiry/generations seconds the
+    oldest generation is dropped and an empty one started, so a link is
+    forgotten after roughly `expiry` seconds. False positives (a new link
+    reported as seen) happen at about `error_rate` per generation; there
+    are no false negatives before expiry. Saved to `path` as a JSON header
+    line followed by the generations' bits.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY, error_rate=DEFAULT_ERROR_RATE,
+                 generations=DEFAULT_GENERATIONS, expiry=DEFAULT_EXPIRY):
+        self.path = path
+        self.bits = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacity * math.log(2)))
+        self.generations = generations
+        self.rotate_every = expiry / generations
+        self._lock = threading.Lock()
+        self._filters = []    # [created, bytearray], oldest first
+        self._load()
+        if not self._filters:
+            self._rotate(time.time())
+
+    def _rotate(self, now):
+        self._filters.append([now, bytearray((self.bits + 7) // 8)])
+        del self._filters[:-self.generations]
+
+    def _rotate_if_due(self, now):
+        if now - self._filters[-1][0] >= self.rotate_every:
+            self._rotate(now)
+
+    def add_many(self, links):
+        with self._lock:
+            self._rotate_if_due(time.time())
+            bits = self._filters[-1][1]
+            for link in links:
+                for position in _positions(canonical_url(link), self.bits, self.hashes):
+                    bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, link):
+        positions = _positions(canonical_url(link), self.bits, self.hashes)
+        with self._lock:
+            return any(all(bits[p >> 3] & (1 << (p & 7)) for p in positions) for _, bits in self._filters)
+
+    def false_positive_rate(self):
+        """Estimated chance that a link never added is reported as seen, from the bits set"""
+        with self._lock:
+            miss = 1.0
+            for _, bits in self._filters:
+                fill = int.from_bytes(bits, "little").bit_count() / self.bits
+                miss *= 1 - fill ** self.hashes
+        return 1 - miss
+
+    def size(self):
+        """Bytes held in memory and on disk at full rotation"""
+        return self.generations * ((self.bits + 7) // 8)
+
+    # ----- persistence -----
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                header = json.loads(f.readline())
+                if header["bits"] != self.bits or header["hashes"] != self.hashes:
+                    print(f"Seen filter {self.path} was built with other settings, starting empty")
+                    return
+                size = (self.bits + 7) // 8
+                filters = []
+                for created in header["created"]:
+                    bits = bytearray(f.read(size))
+                    if len(bits) != size:
+                        raise ValueError(f"truncated: generation {len(filters) + 1} has {len(bits)} of {size} bytes")
+                    filters.append([created, bits])
+                self._filters = filters[-self.generations:]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Ignoring unreadable seen filter {self.path}: {e}")
+            self._filters = []
+
+    def save(self):
+        with self._lock:
+            header = json.dumps({"bits": self.bits, "hashes": self.hashes,
+                                 "created": [created for created, _ in self._filters]})
+            data = header.encode("utf-8") + b"\n" + b"".join(bytes(bits) for _, bits in self._filters)
+        write_atomic(self.path, data)
+
+# ===== SHARED FILTERS =====
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_filter(path):
+    """The process-wide RotatingBloomFilter for `path`"""
+    with _shared_lock:
+        seen = _shared.get(path)
+        if seen is None:
+            seen = _shared[path] = RotatingBloomFilter(path)
+        return seen
@@ -0,0 +1,99 @@
+import heapq
+
+# ===== TOP-K SELECTION =====
+class TopK:
+    """Bounded min-heap holding the K best (score, index) pairs seen so far.
+
+    Ties are broken by the lower index, the same order a stable
+    sorted(..., reverse=True) gives, so streaming selection picks exactly
+    what a full sort would.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def admits(self, score, index):
+        """Return True if an item with this score and index would be kept"""
+        if self.k <= 0:
+            return False
+        return len(self._heap) < self.k or (score, -index) > self._heap[0][0]
+
+    def push(self, score, index, item=None):
+        """Offer an item; returns True if it is (for now) in the top K"""
+        if not self.admits(score, index):
+            return False
+        entry = ((score, -index), item)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+        return True
+
+    def threshold(self):
+        """Return the K-th best score, or None while fewer than K items are held"""
+        if len(self._heap) < self.k:
+            return None
+        return self._heap[0][0][0]
+
+    def copy(self):
+        """An independent TopK holding the same entries"""
+        other = TopK(self.k)
+        other._heap = list(self._heap)
+        return other
+
+    def entries(self):
+        """Return the held (score, index, item) triples, best first"""
+        return [(score, -neg_index, item) for (score, neg_index), item
+                in sorted(self._heap, key=lambda entry: entry[0], reverse=True)]
+
+    def items(self):
+        """Return the held items, best first"""
+        return [item for _, item in sorted(self._heap, key=lambda entry: entry[0], reverse=True)]
+
+# ===== FUNCTIONS =====
+def top_k(items, k, key):
+    """Return the k largest items by `key` without sorting all of them.
+
+    Same result and tie order as sorted(items, key=key, reverse=True)[:k].
+    """
+    return heapq.nlargest(k, items, key=key)
+
+def stream_select(top, pending, upper_bound, resolve, batch_size):
+    """Resolve pending candidates best-bound-first, skipping hopeless ones.
+
+    `pending` is a list of (index, candidate) whose exact score needs
+    expensive work (e.g. article extraction). `upper_bound(candidate)` must
+    never be below the exact score. Candidates are handed to
+    `resolve(candidates)` in batches; it returns their exact scores (None
+    rejects one). A candidate is skipped when `top` can no longer admit
+    even its upper bound.
+
+    Returns (resolved, pruned): resolved is a list of (index, candidate,
+    score) and pruned the number of candidates that were never resolved.
+    """
+    bounded = sorted(((upper_bound(c), i, c) for i, c in pending), key=lambda b: (-b[0], b[1]))
+    resolved = []
+    pruned = 0
+
+    for start in range(0, len(bounded), batch_size):
+        batch = []
+        for bound, index, candidate in bounded[start:start + batch_size]:
+            if top.admits(bound, index):
+                batch.append((index, candidate))
+            else:
+                pruned += 1
+        if not batch:
+            continue
+
+        scores = resolve([candidate for _, candidate in batch])
+        for (index, candidate), score in zip(batch, scores):
+            if score is None:
+                continue
+            top.push(score, index)
+            resolved.append((index, candidate, score))
+
+    return resolved, pruned
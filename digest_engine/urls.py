@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from . import http_client
+from . import metrics
+
+# ===== CONFIGURATION =====
+DEFAULT_REDIRECTS_PATH = os.path.join(".cache", "redirects.sqlite")
+DEFAULT_REDIRECT_TTL = 30 * 24 * 3600   # Seconds a learned redirect target is trusted
+TRACKING_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "mkt_tok",
+    "_hsenc", "_hsmi", "oc", "ref", "ref_src", "cmpid", "ncid", "sr_share",
+}
+DEFAULT_PORTS = {"http": 80, "https": 443}
+WRAPPER_HOSTS = {"news.google.com", "feedproxy.google.com", "t.co", "bit.ly", "lnkd.in"}  # Links that only redirect
+RESOLVE_TIMEOUT = 5        # Seconds per wrapper link followed before dedup
+RESOLVE_WORKERS = 4        # Wrapper links followed at the same time
+
+# ===== CANONICAL URLS =====
+def canonical_url(url):
+    """The key every cache, store and dedup check uses for a URL.
+
+    Tracking parameters (utm_*, fbclid, Google News' oc, ...), the fragment,
+    credentials, default ports, a leading "www." and a trailing slash are
+    dropped; http becomes https, scheme and host are lowercased and the
+    remaining query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    if scheme == "http":
+        scheme = "https"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES))
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+# ===== REDIRECT CACHE =====
+class RedirectCache:
+    """Where links ended up after redirects, stored in SQLite.
+
+    Feed links are often redirect wrappers (Google News) or go through
+    http -> https and tracking hops. Extraction records the final URL of
+    every download here, and resolve_wrappers follows the links of known
+    wrapper hosts up front, so candidates are keyed on the target and
+    downloaded directly. Targets are trusted for `ttl` seconds.
+    """
+
+    def __init__(self, path=DEFAULT_REDIRECTS_PATH, ttl=DEFAULT_REDIRECT_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS redirects (
+                    link TEXT PRIMARY KEY,
+                    target TEXT NOT NULL,
+                    resolved REAL NOT NULL
+                )
+            """)
+            self._db.execute("DELETE FROM redirects WHERE resolved < ?", (time.time() - ttl,))
+
+    def _lookup(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT target, resolved FROM redirects WHERE link = ?",
+                                   (canonical_url(url),)).fetchone()
+        return None if row is None or time.time() - row[1] > self.ttl else row[0]
+
+    def resolve(self, url):
+        """The final URL `url` redirected to when last downloaded, or `url` itself"""
+        target = self._lookup(url)
+        if target is None:
+            metrics.inc("cache_requests_total", cache="redirect", result="miss")
+            return url
+        metrics.inc("cache_requests_total", cache="redirect", result="hit")
+        return target
+
+    def learn(self, url, target):
+        """Record that downloading `url` ended at `target`"""
+        if canonical_url(url) == canonical_url(target):
+            return
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO redirects (link, target, resolved) VALUES (?, ?, ?)",
+                             (canonical_url(url), target, time.time()))
+
+    def resolve_wrappers(self, links, timeout=RESOLVE_TIMEOUT, workers=RESOLVE_WORKERS):
+        """Follow the links on WRAPPER_HOSTS that are not resolved yet and record where they end.
+
+        Each link is requested once with a streamed GET whose body is never
+        read. A wrapper that does not redirect is recorded as its own target,
+        so it is not requested again within `ttl`. Failures are left for the
+        next run.
+        """
+        pending = []
+        for link in dict.fromkeys(links):
+            try:
+                if urlsplit(link).hostname in WRAPPER_HOSTS and self._lookup(link) is None:
+                    pending.append(link)
+            except ValueError:
+                continue  # malformed links are dropped by the caller
+        if not pending:
+            return 0
+
+        def follow(link):
+            try:
+                with http_client.get(link, timeout=timeout, stream=True) as response:
+                    # An error from the wrapper itself says nothing about where it leads
+                    return link, response.url if response.ok or response.history else None
+            except Exception as e:
+                print(f"{datetime.now()}: Could not resolve {link}: {e}")
+                return link, None
+
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as pool:
+            resolved = [(link, target) for link, target in pool.map(metrics.bound(follow), pending) if target]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO redirects (link, target, resolved) VALUES (?, ?, ?)",
+                                 [(canonical_url(link), target, time.time()) for link, target in resolved])
+        metrics.inc("redirects_resolved_total", len(resolved))
+        return len(resolved)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+# ===== SHARED CACHES =====
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_redirects(path=DEFAULT_REDIRECTS_PATH, ttl=DEFAULT_REDIRECT_TTL):
+    """The process-wide RedirectCache for `path`"""
+    with _shared_lock:
+        redirects = _shared.get(path)
+        if redirects is None:
+            redirects = _shared[path] = RedirectCache(path, ttl)
+        redirects.ttl = ttl
+        return redirects
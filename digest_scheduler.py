@@ -0,0 +1,11 @@
+import ai_gis_digest
+import weekly_trends_digest
+from digest_engine.cli import main
+
+# ===== DIGESTS =====
+# Every digest hosted by the scheduler process, each run on its own SCHEDULE
+DIGESTS = [ai_gis_digest.DIGEST, weekly_trends_digest.DIGEST]
+
+# ===== MAIN EXECUTION =====
+if __name__ == "__main__":
+    main(DIGESTS, "GIS & AI Digest Scheduler")
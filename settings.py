@@ -0,0 +1,49 @@
+# ===== SHARED SETTINGS =====
+# Settings common to both digests. Each Digest reads them from here unless
+# its script (ai_gis_digest.py, weekly_trends_digest.py) sets the same name.
+# The caches, host state and article store below are single files used by
+# both digests at once, so they are configured here only.
+# Settings that differ per digest (top-K size, timeouts, run budget, schedule,
+# outbox) stay in each script.
+
+# ===== EMAIL =====
+EMAIL_ADDRESS = "your.email@gmail.com"  # Your Gmail address
+EMAIL_PASSWORD = "your.gmail.app.password"    # Your Gmail app password
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = 587
+SMTP_STARTTLS = True  # Set to False for a local SMTP sink without TLS
+RECIPIENT_EMAIL = "your.email@gmail.com"
+RECIPIENT_NAME = "Giovanni Bwayo"  # Name used in the email footer
+RECIPIENTS = {RECIPIENT_EMAIL: RECIPIENT_NAME}  # Subscribers (email: name) the digests are sent to
+PERSONALIZE = False  # True: one message per subscriber with their name; False: one message batched over many recipients
+OUTBOX_RETRY_INTERVAL = 300  # Seconds between background attempts to deliver deferred messages
+
+# ===== FETCHING =====
+FEED_FETCH_MODE = "threads"  # "threads", "asyncio" or "sequential"
+FEED_CONCURRENCY = 8  # Max feeds downloaded in parallel
+FEED_PER_HOST_LIMIT = 2  # Max parallel downloads per host
+EXTRACT_WORKERS = 8  # Max article pages downloaded in parallel
+EXTRACT_MODE = "stream"  # "stream" (capped, stops early) or "full" (whole page + BeautifulSoup)
+EXTRACT_PARSE_IN_PROCESSES = False  # Parse article HTML on a process pool (full mode only)
+EXTRACT_BATCH = 16  # Entries extracted per wave; entries that can no longer make the top K are skipped
+RUN_BUDGET_RESERVE = 60  # Seconds of each run's budget kept for scoring, rendering and sending
+NEAR_DUPLICATE_DISTANCE = 5  # SimHash bits within which entries are one story, ranked once (None: off)
+
+# ===== SHARED STATE =====
+FEED_CACHE_PATH = ".cache/feeds.json"  # ETag/Last-Modified feed cache
+FEED_FRESHNESS = 1800  # Seconds a fetched feed is reused without a request, by either digest
+HOST_HEALTH_PATH = ".cache/hosts.json"  # Per-host backoff, circuit breakers and latency
+HOST_RATE = 5.0  # Requests per second to one host (None: no limit); halved while it answers 429/5xx
+CONTENT_CACHE_PATH = ".cache/content.sqlite"  # Extracted article text
+CONTENT_CACHE_TTL = 7 * 24 * 3600  # Seconds before a cached article is re-extracted
+CONTENT_CACHE_MAX_BYTES = 50 * 1024 * 1024  # LRU eviction above this much cached text
+REDIRECT_CACHE_PATH = ".cache/redirects.sqlite"  # Final URLs of redirecting feed links
+REDIRECT_TTL = 30 * 24 * 3600  # Seconds a learned redirect target is trusted
+ARTICLE_STORE_PATH = ".cache/articles.sqlite"  # Scored articles, rankings and sent status
+SEEN_FILTER_DIR = ".cache/seen"  # Compact filters of the links each digest already sent (about 4 weeks)
+METRICS_DIR = ".cache/metrics"  # Per-run <digest>.prom (Prometheus textfile) and <digest>.json reports
+PROFILE_DIR = ".cache/profile"  # Reports written by --profile
+
+# ===== INGESTION =====
+INGEST_SCHEDULE = "every 60 minutes"  # Poll feeds and rank new entries between digests (None: scrape at send time)
+INGEST_MAX_AGE = 3 * 3600  # Seconds after the last poll before a digest stops trusting the ranking and scrapes
@@ -0,0 +1,38 @@
+from digest_engine import SourceRegistry
+
+# ===== SOURCE REGISTRY =====
+# Every feed read by the digests, registered once per URL so a feed shared by
+# both digests is downloaded once. `digests` names the digests that read it;
+# `weight` is the daily source bonus, `type` the weekly source type.
+SOURCES = SourceRegistry()
+
+# Google News searches (more specific)
+SOURCES.add("https://news.google.com/rss/search?q=%22AI+GIS%22+OR+%22GIS+AI%22+OR+%22machine+learning+GIS%22&ceid=US:en&hl=en-US&gl=US",
+            "Google News: AI GIS", type="news", digests=["daily"])
+SOURCES.add("https://news.google.com/rss/search?q=geospatial+artificial+intelligence+OR+spatial+AI&ceid=US:en&hl=en-US&gl=US",
+            "Google News: geospatial AI", type="news", digests=["daily"])
+
+# Academic sources
+SOURCES.add("https://arxiv.org/rss/cs.AI", "arXiv cs.AI", type="academic", weight=5, digests=["daily"])  # Academic papers are highly relevant
+SOURCES.add("https://arxiv.org/rss/cs.CV", "arXiv cs.CV", type="academic", weight=5, digests=["daily"])
+SOURCES.add("https://hdsr.mitpress.mit.edu/rss_2.0", "Harvard Data Science Review", type="academic", digests=["weekly"])
+
+# GIS blogs
+SOURCES.add("https://www.esri.com/arcgis-blog/feed/", "Esri Insights Blog", type="gis", weight=4,
+            digests=["daily", "weekly"])  # Esri content is very GIS-focused
+SOURCES.add("https://blog.mapbox.com/rss", "Mapbox Blog", type="gis", digests=["daily", "weekly"])
+SOURCES.add("https://www.gislounge.com/feed/", "GIS Lounge", type="gis", digests=["weekly"])
+
+# Tech blogs and news
+SOURCES.add("https://towardsdatascience.com/feed/tagged/geospatial", "Towards Data Science: geospatial",
+            type="blog", digests=["daily"])
+SOURCES.add("https://towardsdatascience.com/feed", "Towards Data Science Trends", type="blog", digests=["weekly"])
+SOURCES.add("https://www.technologyreview.com/topic/artificial-intelligence/feed/", "MIT Technology Review AI",
+            type="news", digests=["weekly"])
+SOURCES.add("https://www.kdnuggets.com/feed", "KDnuggets News", type="news", digests=["weekly"])
+SOURCES.add("https://www.analyticsvidhya.com/blog/feed/", "Analytics Vidhya", type="blog", digests=["weekly"])
+
+# Corporate blogs
+SOURCES.add("https://ai.googleblog.com/feeds/posts/default", "Google AI Blog", type="corporate", digests=["weekly"])
+SOURCES.add("https://aws.amazon.com/blogs/machine-learning/feed/", "AWS Machine Learning Blog", type="corporate",
+            digests=["weekly"])
@@ -0,0 +1,70 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from digest_engine import http_client
+from digest_engine.article_extractor import extract_all
+from digest_engine.content_cache import ContentCache
+
+# ===== HELPERS =====
+SUMMARY = "Feed summary of the article, kept when the page has nothing better."
+PAGES = {
+    "/article.html": "<html><body><p>" + "Mapping floods with satellite imagery and deep learning. " * 5
+                     + "</p></body></html>",
+    "/script-only.html": "<html><head><script>" + "var x = 1;" * 32 * 1024 + "</script></head>"
+                         "<body><p>Too late to be read.</p></body></html>",
+    "/short.html": "<html><body><p>Subscribe</p></body></html>",
+}
+
+@pytest.fixture(scope="module")
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/slow.html":
+                time.sleep(2)
+            body = PAGES.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    http_client.reset_session()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    http_client.reset_session()
+
+# ===== TESTS =====
+@pytest.mark.parametrize("streaming", [True, False], ids=["stream", "full"])
+def test_page_without_text_keeps_summary_uncached(server, tmp_path, streaming):
+    urls = [f"{server}/script-only.html", f"{server}/short.html", f"{server}/article.html"]
+    with ContentCache(str(tmp_path / "content.sqlite")) as cache:
+        results = extract_all(urls, [SUMMARY] * 3, max_chars=250, timeout=5, streaming=streaming, cache=cache)
+        assert results[:2] == [SUMMARY, SUMMARY]
+        assert results[2].startswith("Mapping floods")
+        assert cache.get(urls[0]) is None and cache.get(urls[1]) is None
+        assert cache.get(urls[2]).startswith("Mapping floods")
+
+def test_failed_downloads_keep_summary(server, tmp_path):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    urls = [f"{server}/slow.html", f"http://127.0.0.1:{closed_port}/refused.html", f"{server}/missing.html"]
+    with ContentCache(str(tmp_path / "content.sqlite")) as cache:
+        results = extract_all(urls, [SUMMARY] * 3, max_chars=250, timeout=0.5, cache=cache)
+        assert results == [SUMMARY] * 3
+        assert all(cache.get(url) is None for url in urls)
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+import ai_gis_digest
+import weekly_trends_digest
+from digest_engine import batch_scoring
+from digest_engine.registry import Source
+
+# ===== HELPERS =====
+WORDS = (list(ai_gis_digest.RELEVANCE_WEIGHTS) + weekly_trends_digest.TREND_ARTICLE_KEYWORDS
+         + list(weekly_trends_digest.TREND_SCORE_WEIGHTS)
+         + "the data cities maintain said news trends models for with across teams".split())
+SEPARATORS = [" ", " ", ", ", ". ", " (", ") ", "-", "\n"]
+SOURCES = [Source("https://example.com/a", "A", type="academic", weight=5),
+           Source("https://example.com/b", "B", type="gis", weight=4),
+           Source("https://example.com/c", "C", type="news"),
+           Source("https://example.com/d", "D", type="other")]
+PUBLISHED = ["Mon, 06 Oct 2025 08:00:00 GMT", "Tue, 03 Dec 2024 10:00:00 GMT", "3 hours ago",
+             "2 days ago", "last week", "Fri, 01 Sep 2023 09:00:00 GMT", ""]
+
+def random_text(rng, words):
+    return "".join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(words))
+
+def generated_articles(count, seed=11):
+    rng = random.Random(seed)
+    return [{
+        "title": random_text(rng, rng.randint(3, 12)),
+        "content": random_text(rng, rng.randint(0, 120)),
+        "source": rng.choice(SOURCES),
+        "published": rng.choice(PUBLISHED),
+    } for _ in range(count)]
+
+@pytest.fixture(params=["numpy", "array"])
+def backend(request, monkeypatch):
+    """Run a test with NumPy and with the array-backed fallback"""
+    if request.param == "numpy":
+        monkeypatch.setattr(batch_scoring, "np", pytest.importorskip("numpy"))
+    else:
+        monkeypatch.setattr(batch_scoring, "np", None)
+    return request.param
+
+# ===== TESTS =====
+def test_score_articles_matches_scalar_scores(backend):
+    articles = generated_articles(3000)
+    expected = [ai_gis_digest.calculate_relevance_score(a['title'], a['content'], a['source'], a['published'])
+                for a in articles]
+    assert ai_gis_digest.score_articles(articles) == expected
+
+def test_score_trends_matches_scalar_scores(backend):
+    articles = generated_articles(3000, seed=12)
+    is_trend, scores = weekly_trends_digest.score_trends(articles)
+    assert is_trend == [weekly_trends_digest.is_trend_article(a['title'], a['content']) for a in articles]
+    assert scores == [weekly_trends_digest.calculate_trend_score(a, a['source'].type) for a in articles]
+    assert any(is_trend) and not all(is_trend)
+
+def test_empty_batch(backend):
+    assert ai_gis_digest.score_articles([]) == []
+    assert weekly_trends_digest.score_trends([]) == ([], [])
@@ -0,0 +1,43 @@
+import random
+
+import ai_gis_digest
+import weekly_trends_digest
+from digest_engine.article_extractor import truncate_text
+from digest_engine.registry import Source
+
+# ===== HELPERS =====
+SOURCES = [Source("https://example.com/a", "A", type="academic", weight=5),
+           Source("https://example.com/c", "C", type="news")]
+PUBLISHED = ["Mon, 06 Oct 2025 08:00:00 GMT", "3 hours ago", "last week", ""]
+DENSE_SENTENCE = ("New machine learning GIS and deep learning geospatial tools: AI remote sensing, "
+                  "spatial AI and computer vision GIS for satellite imagery AI.")
+
+def dense_texts(rng, terms, chars, count=300):
+    """Article texts packed with scoring terms, cut like extracted text"""
+    texts = [DENSE_SENTENCE]
+    for _ in range(count):
+        words = rng.sample(terms, len(terms))
+        texts.append(" ".join(words))
+    return [truncate_text(text, chars) for text in texts]
+
+def candidates(rng, titles, contents):
+    return [{"title": rng.choice(titles), "content": content, "summary": "",
+             "source": rng.choice(SOURCES), "published": rng.choice(PUBLISHED)} for content in contents]
+
+# ===== TESTS =====
+def test_daily_bound_is_never_below_the_score():
+    """The default bound may only skip entries that could not have ranked, whatever their text"""
+    rng = random.Random(1)
+    terms = list(ai_gis_digest.RELEVANCE_WEIGHTS)
+    contents = dense_texts(rng, terms, ai_gis_digest.DailyProfile.extract_chars)
+    for c in candidates(rng, terms, contents):
+        score = ai_gis_digest.calculate_relevance_score(c['title'], c['content'], c['source'], c['published'])
+        assert ai_gis_digest.score_upper_bound(c) >= score, c['content']
+
+def test_weekly_bound_is_never_below_the_score():
+    rng = random.Random(2)
+    terms = list(weekly_trends_digest.TREND_SCORE_WEIGHTS)
+    contents = dense_texts(rng, terms, weekly_trends_digest.TrendsProfile.extract_chars)
+    for c in candidates(rng, terms, contents):
+        score = weekly_trends_digest.calculate_trend_score(c, c['source'].type)
+        assert weekly_trends_digest.trend_score_upper_bound(c) >= score, c['content']
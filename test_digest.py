@@ -2,25 +2,31 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-import feedparser
-import requests
-from bs4 import BeautifulSoup
+from digest_engine import http_client
+from digest_engine.mailer import Mailer
+from settings import EMAIL_ADDRESS, EMAIL_PASSWORD, SMTP_SERVER, SMTP_PORT, SMTP_STARTTLS, RECIPIENT_EMAIL
 
 # ===== CONFIGURATION =====
-EMAIL_ADDRESS = "your.email@gmail.com"  # Your Gmail address
-EMAIL_PASSWORD = "your.gmail.app.password"    # Your Gmail app password 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-RECIPIENT_EMAIL = "your.email@gmail.com"
 MAX_ARTICLES = 10  # Limit to top 10 articles
 
+# Feeds and pages used by the checks below
+TEST_FEEDS = [
+    "https://www.esri.com/arcgis-blog/feed/",
+    "https://arxiv.org/rss/cs.AI"
+]
+TEST_URLS = [
+    "https://www.esri.com/arcgis-blog/overview/",
+    "https://arxiv.org/list/cs.AI/recent"
+]
+
 # ===== TEST FUNCTIONS =====
 def test_email_connection():
     """Test if we can connect to Gmail SMTP server"""
     print("Testing email connection...")
     try:
         with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
+            if SMTP_STARTTLS:
+                server.starttls()
             server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
         print("✓ Email connection test PASSED")
         return True
@@ -32,15 +38,10 @@ def test_feed_parsing():
     """Test if we can parse RSS feeds"""
     print("Testing feed parsing...")
     
-    test_feeds = [
-        "https://www.esri.com/arcgis-blog/feed/",
-        "https://arxiv.org/rss/cs.AI"
-    ]
-    
     successful_feeds = 0
-    for feed_url in test_feeds:
+    for feed_url in TEST_FEEDS:
         try:
-            feed = feedparser.parse(feed_url)
+            feed = http_client.fetch_feed(feed_url)
             if feed.entries:
                 print(f"✓ Feed '{feed_url}' has {len(feed.entries)} entries")
                 successful_feeds += 1
@@ -55,17 +56,9 @@ def test_content_extraction():
     """Test if we can extract content from a URL"""
     print("Testing content extraction...")
     
-    test_urls = [
-        "https://www.esri.com/arcgis-blog/overview/",
-        "https://arxiv.org/list/cs.AI/recent"
-    ]
-    
-    for url in test_urls:
+    for url in TEST_URLS:
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get(url, timeout=10)
             if response.status_code == 200:
                 print(f"✓ Successfully accessed {url}")
                 return True
@@ -98,10 +91,11 @@ def send_test_email():
         
         msg.attach(MIMEText(html_content, "html"))
         
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.send_message(msg)
+        with Mailer(SMTP_SERVER, SMTP_PORT, EMAIL_ADDRESS, EMAIL_PASSWORD, SMTP_STARTTLS) as mailer:
+            delivery = mailer.deliver([(msg, [RECIPIENT_EMAIL])])
+        if not delivery.ok:
+            print(f"✗ Failed to send test email: {delivery.failed}")
+            return False
         
         print("✓ Test email sent successfully!")
         return True
@@ -113,17 +107,12 @@ def get_sample_articles():
     """Get a few sample articles without sending email"""
     print("Fetching sample articles...")
     
-    feeds = [
-        "https://www.esri.com/arcgis-blog/feed/",
-        "https://arxiv.org/rss/cs.AI"
-    ]
-    
     articles = []
     keywords = ["gis", "geospatial", "ai", "artificial intelligence", "machine learning"]
     
-    for feed_url in feeds:
+    for feed_url in TEST_FEEDS:
         try:
-            feed = feedparser.parse(feed_url)
+            feed = http_client.fetch_feed(feed_url)
             for entry in feed.entries[:3]:  # Just get first 3 entries from each feed
                 title = entry.title.lower()
                 if any(keyword in title for keyword in keywords):
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pytest
+
+from digest_engine.budget import BudgetExceeded
+from digest_engine.feed_fetcher import fetch_feeds
+
+# ===== HELPERS =====
+URLS = [f"https://a.example.com/{n}.xml" for n in range(16)] + [f"https://b.example.com/{n}.xml" for n in range(16)]
+
+class Recorder:
+    """Fake feed download that records when each host's fetches start and how many overlap"""
+
+    def __init__(self, seconds=0.2):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.first_start = {}
+        self.started = time.monotonic()
+
+    def __call__(self, url):
+        host = url.split("/")[2]
+        with self.lock:
+            self.first_start.setdefault(host, time.monotonic() - self.started)
+            self.running[host] = self.running.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+        time.sleep(self.seconds)
+        with self.lock:
+            self.running[host] -= 1
+        return {"url": url}
+
+# ===== TESTS =====
+@pytest.mark.parametrize("mode", ["threads", "asyncio"])
+def test_busy_host_does_not_hold_workers(mode):
+    fetch = Recorder()
+    results = fetch_feeds(URLS, mode=mode, concurrency=8, per_host_limit=2, fetch=fetch)
+    assert [(url, feed["url"], error) for url, feed, error in results] == [(url, url, None) for url in URLS]
+    assert fetch.peak == {"a.example.com": 2, "b.example.com": 2}
+    # Host b starts right away instead of after host a's queue drains into the pool
+    assert fetch.first_start["b.example.com"] < fetch.seconds / 2
+
+def test_host_limit_lowers_one_host():
+    fetch = Recorder(seconds=0.02)
+    fetch_feeds(URLS, concurrency=8, per_host_limit=4, fetch=fetch,
+                host_limit=lambda host, default: 1 if host == "a.example.com" else default)
+    assert fetch.peak == {"a.example.com": 1, "b.example.com": 4}
+
+def test_deadline_skips_feeds_not_fetched():
+    fetch = Recorder(seconds=0.3)
+    results = fetch_feeds(URLS[:4], concurrency=2, per_host_limit=2, fetch=fetch, deadline=0.1)
+    assert all(isinstance(error, BudgetExceeded) for _, _, error in results)
@@ -0,0 +1,48 @@
+import os
+import threading
+
+from digest_engine.files import write_atomic
+
+# ===== TESTS =====
+def test_writes_text_and_bytes(tmp_path):
+    path = tmp_path / "state" / "nested" / "hosts.json"
+    write_atomic(str(path), "{\"é\": 1}")
+    assert path.read_text(encoding="utf-8") == "{\"é\": 1}"
+    write_atomic(str(path), b"\x00\x01")
+    assert path.read_bytes() == b"\x00\x01"
+    assert os.listdir(path.parent) == ["hosts.json"]
+
+def test_bare_file_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_atomic("feeds.json", "{}")
+    assert (tmp_path / "feeds.json").read_text() == "{}"
+
+def test_concurrent_writers_never_share_a_temp_file(tmp_path):
+    path = str(tmp_path / "feeds.json")
+    errors = []
+
+    def write(n):
+        try:
+            for _ in range(50):
+                write_atomic(path, str(n) * 1000)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert open(path).read() in {str(n) * 1000 for n in range(8)}
+    assert os.listdir(tmp_path) == ["feeds.json"]
+
+def test_failed_write_keeps_old_file(tmp_path):
+    path = tmp_path / "scheduler.json"
+    write_atomic(str(path), "old")
+    try:
+        write_atomic(str(path), object())
+    except TypeError:
+        pass
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["scheduler.json"]
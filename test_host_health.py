@@ -0,0 +1,184 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from digest_engine import host_health, http_client
+from digest_engine.host_health import (BURST, COOLDOWN, FAILURE_THRESHOLD, MAX_BACKOFF, HostHealth,
+                                       HostUnavailable, submit_by_host)
+
+# ===== HELPERS =====
+URL = "https://slow.example.com/feed.xml"
+
+class Clock:
+    """Stand-in for time.time/monotonic/sleep: sleeping moves the clock instead of waiting"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(host_health, "time", SimpleNamespace(time=clock.time, monotonic=clock.time,
+                                                             sleep=clock.sleep))
+    return clock
+
+def fail(health, times, status=None, retry_after=None):
+    for _ in range(times):
+        health.record(URL, 1.0, status, retry_after)
+
+class Server:
+    """Local HTTP server answering every GET with `status` and counting the hits"""
+
+    def __init__(self, status, headers=None):
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/feed.xml"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# ===== CIRCUIT BREAKER =====
+def test_circuit_opens_after_failures_in_a_row(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    fail(health, FAILURE_THRESHOLD - 1)
+    health.record(URL, 0.1, 200)     # a success resets the count
+    fail(health, FAILURE_THRESHOLD - 1)
+    health.acquire(URL)
+    fail(health, 1)
+    with pytest.raises(HostUnavailable):
+        health.acquire(URL)
+    health.acquire("https://other.example.com/")   # other hosts are unaffected
+
+def test_half_open_trial_closes_or_reopens_for_longer(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    fail(health, FAILURE_THRESHOLD)
+    clock.now += COOLDOWN
+    health.acquire(URL)                          # the one trial request
+    with pytest.raises(HostUnavailable):
+        health.acquire(URL)                      # nothing else while it runs
+    fail(health, 1)
+    clock.now += COOLDOWN
+    with pytest.raises(HostUnavailable):
+        health.acquire(URL)                      # reopened for twice as long
+    clock.now += COOLDOWN
+    health.acquire(URL)
+    health.record(URL, 0.1, 200)
+    health.acquire(URL)
+
+# ===== BACKOFF AND RATE =====
+def test_retry_after_pauses_the_host(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    health.record(URL, 0.1, 429, retry_after=3)
+    health.acquire(URL)
+    assert clock.slept == [3]
+
+def test_long_retry_after_is_capped_and_fails_fast(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    health.record(URL, 0.1, 503, retry_after=10 * MAX_BACKOFF)
+    with pytest.raises(HostUnavailable):
+        health.acquire(URL)
+    assert clock.slept == []
+    clock.now += MAX_BACKOFF
+    health.acquire(URL)
+
+def test_rate_limit_after_burst(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=2.0)
+    for _ in range(BURST):
+        health.acquire(URL)
+    assert clock.slept == []
+    health.acquire(URL)
+    assert clock.slept == [pytest.approx(0.5)]
+
+def test_slow_or_failing_hosts_get_one_connection(clock, tmp_path):
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    assert health.limit("slow.example.com", 4) == 4
+    for _ in range(10):
+        health.record(URL, 30.0, 200)
+    assert health.limit("slow.example.com", 4) == 1
+    assert health.limit("other.example.com", 4) == 4
+
+# ===== PERSISTENCE =====
+def test_open_circuit_survives_a_restart(clock, tmp_path):
+    path = str(tmp_path / "state" / "hosts.json")
+    health = HostHealth(path, rate=None)
+    fail(health, FAILURE_THRESHOLD)
+    health.save()
+    with pytest.raises(HostUnavailable):
+        HostHealth(path, rate=None).acquire(URL)
+
+def test_unreadable_state_is_ignored(clock, tmp_path, capsys):
+    path = tmp_path / "hosts.json"
+    path.write_text("{not json")
+    HostHealth(str(path), rate=None).acquire(URL)
+    assert "Ignoring unreadable host state" in capsys.readouterr().out
+
+# ===== HTTP CLIENT =====
+@pytest.mark.parametrize("status,headers", [(503, None), (429, {"Retry-After": "3"})])
+def test_no_transport_retries_under_host_health(status, headers, tmp_path):
+    """HostHealth sees every failure and owns the backoff: urllib3 must not retry or sleep first"""
+    server = Server(status, headers)
+    health = HostHealth(str(tmp_path / "hosts.json"), rate=None)
+    http_client.reset_session()
+    http_client.use_host_health(health)
+    try:
+        start = time.monotonic()
+        assert http_client.get(server.url, timeout=5).status_code == status
+        assert time.monotonic() - start < 1
+        assert server.hits == 1
+        assert health.stats()[f"127.0.0.1:{server.httpd.server_address[1]}"]["failures"] == 1
+    finally:
+        http_client.use_host_health(None)
+        http_client.reset_session()
+        server.close()
+
+# ===== PER-HOST DISPATCH =====
+def test_submit_by_host_limits_each_host_without_parking_workers():
+    running = {}
+    peak = {}
+    lock = threading.Lock()
+
+    def fetch(url):
+        host = url.split("/")[2]
+        with lock:
+            running[host] = running.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), running[host])
+        time.sleep(0.02)
+        with lock:
+            running[host] -= 1
+        return url
+
+    urls = [f"https://a.example.com/{n}" for n in range(12)] + [f"https://b.example.com/{n}" for n in range(12)]
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = submit_by_host(pool, fetch, urls, lambda host: 2 if host == "a.example.com" else 4)
+        done, pending = wait(futures, timeout=10)
+    assert not pending
+    assert [future.result() for future in futures] == urls
+    assert peak == {"a.example.com": 2, "b.example.com": 4}
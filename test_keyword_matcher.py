@@ -0,0 +1,66 @@
+import random
+import re
+
+import ai_gis_digest
+import weekly_trends_digest
+from digest_engine.keyword_matcher import KeywordMatcher
+
+# ===== HELPERS =====
+TABLES = [
+    ai_gis_digest.RELEVANCE_WEIGHTS,
+    ai_gis_digest.TITLE_MATCHER.weights,
+    weekly_trends_digest.TREND_SCORE_WEIGHTS,
+    weekly_trends_digest.TREND_ARTICLE_MATCHER.weights,
+]
+FILLERS = ["said", "maintain", "news", "trends", "geospatially", "the", "ArcGIS", "AI-driven", "2025s", "é"]
+SEPARATORS = [" ", " ", " ", ", ", "-", "(", ") ", "\n", "_", "/", "  ", "…"]
+
+def random_text(rng, terms, words=40):
+    """Text mixing table terms, near misses and assorted separators"""
+    parts = []
+    for _ in range(words):
+        word = rng.choice(terms) if rng.random() < 0.4 else rng.choice(FILLERS)
+        parts.append(word.upper() if rng.random() < 0.1 else word)
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+def reference_find(weights, text):
+    """One plain regex per term, with word boundaries at short edge words"""
+    found = {}
+    for term, weight in weights.items():
+        words = term.split()
+        pattern = re.escape(term)
+        if len(words[0]) <= 3:
+            pattern = r"\b" + pattern
+        if len(words[-1]) <= 3:
+            pattern += r"\b"
+        if re.search(pattern, text.lower()):
+            found[term] = weight
+    return found
+
+# ===== TESTS =====
+def test_matches_reference_regexes():
+    rng = random.Random(7)
+    for weights in TABLES:
+        matcher = KeywordMatcher(weights)
+        terms = list(weights)
+        for _ in range(500):
+            text = random_text(rng, terms)
+            found = matcher.find(text)
+            assert found == reference_find(weights, text), text
+            assert matcher.contains_any(text) == bool(found)
+
+def test_score_sums_one_field():
+    matcher = KeywordMatcher({"ai": (10, 5), "gis": (3, 1), "remote sensing ai": (5, 2)})
+    text = "AI: remote sensing ai for GIS"
+    assert matcher.score(text, field=0) == 18
+    assert matcher.score(text, field=1) == 8
+    assert matcher.score("nothing here", field=0) == 0
+
+def test_word_boundaries():
+    matcher = KeywordMatcher({"ai": 1, "gis": 1, "trend": 1, "ai gis": 1})
+    assert matcher.find("How teams maintain data") == {}
+    assert matcher.find("Mapping trends (AI)") == {"trend": 1, "ai": 1}
+    assert matcher.find("ai-gis") == {"ai": 1, "gis": 1}
+    assert matcher.find("said AI GIS") == {"ai": 1, "gis": 1, "ai gis": 1}
+    assert matcher.find("AI") == {"ai": 1}
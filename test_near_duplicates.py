@@ -0,0 +1,85 @@
+import random
+
+from digest_engine import near_duplicates
+from digest_engine.near_duplicates import SIGNATURE_BITS, clusters, collapse, simhash
+
+# ===== HELPERS =====
+def naive_simhash(hashes):
+    """Bit i is set when more than half of `hashes` have it set, counted bit by bit"""
+    result = 0
+    for bit in range(SIGNATURE_BITS):
+        if 2 * sum((h >> bit) & 1 for h in hashes) > len(hashes):
+            result |= 1 << bit
+    return result
+
+def naive_clusters(signatures, max_distance):
+    """Connected components of signatures within `max_distance` bits, comparing every pair"""
+    parent = list(range(len(signatures)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i, a in enumerate(signatures):
+        for j in range(i):
+            b = signatures[j]
+            if a is not None and b is not None and (a ^ b).bit_count() <= max_distance:
+                parent[max(find(i), find(j))] = min(find(i), find(j))
+    groups = {}
+    for i in range(len(signatures)):
+        groups.setdefault(find(i), []).append(i)
+    return sorted(groups.values())
+
+def candidate(title, summary, score):
+    return {"title": title, "summary": summary, "score": score}
+
+# ===== TESTS =====
+def test_simhash_matches_per_bit_count():
+    rng = random.Random(3)
+    for _ in range(300):
+        hashes = [rng.getrandbits(SIGNATURE_BITS) for _ in range(rng.randint(1, 80))]
+        hashes += hashes[:rng.randint(0, len(hashes))]    # repeated tokens weigh more
+        assert simhash(hashes) == naive_simhash(hashes)
+    assert simhash([]) == 0
+    assert simhash([5, 5, 0, 0]) == 0                     # a tie is not a majority
+
+def test_bands_find_every_close_pair(monkeypatch):
+    rng = random.Random(5)
+    signatures = []
+    for _ in range(150):
+        signature = rng.getrandbits(SIGNATURE_BITS)
+        signatures.append(signature)
+        for _ in range(rng.randint(0, 2)):               # copies a few bits apart
+            for bit in rng.sample(range(SIGNATURE_BITS), rng.randint(0, 7)):
+                signature ^= 1 << bit
+            signatures.append(signature)
+    signatures.append(None)
+    rng.shuffle(signatures)
+    monkeypatch.setattr(near_duplicates, "signatures", lambda entries: signatures)
+
+    for max_distance in (3, 5):
+        assert sorted(clusters(signatures, max_distance)) == naive_clusters(signatures, max_distance)
+
+def test_collapse_keeps_best_copy():
+    summary = "The agency released a <b>global</b> land cover map built with deep learning &amp; satellite imagery."
+    candidates = [
+        candidate("New AI land cover map released - Example News", summary, 3),
+        candidate("Cities adopt spatial digital twins", "Planners use 3D city models for flood risk.", 4),
+        candidate("New AI land cover map released | GIS Weekly", summary, 7),
+        candidate("New AI land cover map released", summary.replace("<b>", "").replace("</b>", ""), 7),
+        candidate("", "", 1),
+        candidate("", "", 1),
+    ]
+    kept, dropped = collapse(candidates, lambda c: c["score"])
+    assert kept == [candidates[1], candidates[2], candidates[4], candidates[5]]
+    assert dropped == [candidates[0], candidates[3]]
+
+def test_distinct_stories_stay_apart():
+    candidates = [
+        candidate("Satellite imagery maps flood damage", "Teams mapped flooded roads overnight.", 1),
+        candidate("Deep learning finds solar panels in aerial photos", "A model counts rooftop panels.", 1),
+        candidate("Open data portal adds street trees", "The city published a tree inventory.", 1),
+    ]
+    kept, dropped = collapse(candidates, lambda c: c["score"])
+    assert kept == candidates and dropped == []
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+from digest_engine import seen_filter
+from digest_engine.seen_filter import RotatingBloomFilter
+
+# ===== HELPERS =====
+def links(count, prefix="seen"):
+    return [f"https://news.example.com/{prefix}/{n}.html" for n in range(count)]
+
+class Clock:
+    """Stand-in for time.time() that only moves when told to"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+# ===== TESTS =====
+def test_no_false_negatives(tmp_path):
+    seen = RotatingBloomFilter(str(tmp_path / "seen.bloom"), capacity=1000, error_rate=0.01)
+    seen.add_many(links(1000))
+    assert all(link in seen for link in links(1000))
+    # Looked up by canonical URL, like every other cache
+    assert "http://www.news.example.com/seen/7.html/?utm_source=feed#top" in seen
+
+def test_false_positive_rate(tmp_path):
+    seen = RotatingBloomFilter(str(tmp_path / "seen.bloom"), capacity=1000, error_rate=0.01)
+    seen.add_many(links(1000))
+    false_positives = sum(link in seen for link in links(10000, prefix="new"))
+    assert false_positives / 10000 < 0.03
+    assert 0.002 < seen.false_positive_rate() < 0.03
+
+def test_links_expire_after_all_generations_rotate(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(seen_filter, "time", SimpleNamespace(time=clock.time))
+    seen = RotatingBloomFilter(str(tmp_path / "seen.bloom"), capacity=100, generations=4, expiry=400)
+    seen.add_many(["https://example.com/old"])
+    for _ in range(3):
+        clock.now += 100
+        seen.add_many([])
+    assert "https://example.com/old" in seen      # still within `expiry`
+    clock.now += 100
+    seen.add_many(["https://example.com/new"])
+    assert "https://example.com/old" not in seen
+    assert "https://example.com/new" in seen
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "filters" / "daily.bloom")
+    seen = RotatingBloomFilter(path, capacity=1000)
+    seen.add_many(links(500))
+    seen.save()
+    loaded = RotatingBloomFilter(path, capacity=1000)
+    assert all(link in loaded for link in links(500))
+    assert loaded.false_positive_rate() == seen.false_positive_rate()
+
+def test_truncated_file_starts_empty(tmp_path, capsys):
+    path = str(tmp_path / "seen.bloom")
+    seen = RotatingBloomFilter(path, capacity=1000)
+    seen.add_many(links(500))
+    seen.save()
+    with open(path, "rb+") as f:
+        f.truncate(len(f.read()) - 10)
+
+    loaded = RotatingBloomFilter(path, capacity=1000)
+    assert "Ignoring unreadable seen filter" in capsys.readouterr().out
+    assert not any(link in loaded for link in links(500))
+    loaded.add_many(["https://example.com/after"])
+    assert "https://example.com/after" in loaded
+
+def test_other_settings_start_empty(tmp_path):
+    path = str(tmp_path / "seen.bloom")
+    seen = RotatingBloomFilter(path, capacity=1000)
+    seen.add_many(links(10))
+    seen.save()
+    assert not any(link in RotatingBloomFilter(path, capacity=5000) for link in links(10))
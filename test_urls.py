@@ -0,0 +1,83 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import feedparser
+import pytest
+
+import ai_gis_digest
+import settings
+from digest_engine import http_client, urls
+from digest_engine.registry import Source
+from digest_engine.urls import RedirectCache, canonical_url
+
+# ===== HELPERS =====
+@pytest.fixture
+def server():
+    """Local server: /wrap/<n> redirects to /article/<n>, everything else is a page"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path.startswith("/wrap/"):
+                self.send_response(302)
+                self.send_header("Location", self.path.replace("/wrap/", "/article/"))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = b"<html><body>article</body></html>"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    http_client.reset_session()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", hits
+    httpd.shutdown()
+    httpd.server_close()
+    http_client.reset_session()
+
+def entry(title, link, summary="A summary long enough to be used without extracting the article page."):
+    return feedparser.FeedParserDict(title=title, link=link, summary=summary, published="3 hours ago")
+
+# ===== TESTS =====
+def test_canonical_url():
+    assert canonical_url("http://www.Example.com:80/a/?utm_source=x&b=2&a=1#top") == "https://example.com/a?a=1&b=2"
+    with pytest.raises(ValueError):
+        canonical_url("http://[::1")
+
+def test_wrappers_resolved_once_without_extraction(server, tmp_path, monkeypatch):
+    base, hits = server
+    monkeypatch.setattr(urls, "WRAPPER_HOSTS", {"127.0.0.1"})
+    redirects = RedirectCache(str(tmp_path / "redirects.sqlite"))
+    links = [f"{base}/wrap/1", f"{base}/plain", f"{base}/wrap/1", "http://[::1"]
+    assert redirects.resolve_wrappers(links) == 2
+    assert redirects.resolve(f"{base}/wrap/1") == f"{base}/article/1"
+    assert redirects.resolve(f"{base}/plain") == f"{base}/plain"
+    requests_made = len(hits)
+    assert redirects.resolve_wrappers(links) == 0
+    assert len(hits) == requests_made
+    redirects.close()
+
+def test_wrapper_and_publisher_link_dedup(server, tmp_path, monkeypatch):
+    base, _ = server
+    monkeypatch.setattr(urls, "WRAPPER_HOSTS", {"127.0.0.1"})
+    monkeypatch.setattr(settings, "REDIRECT_CACHE_PATH", str(tmp_path / "redirects.sqlite"))
+    monkeypatch.setattr(settings, "SEEN_FILTER_DIR", str(tmp_path / "seen"))
+    news = Source(f"{base}/news.xml", "News", type="news")
+    publisher = Source(f"{base}/blog.xml", "Blog", type="gis")
+    results = [
+        (news, feedparser.FeedParserDict(entries=[
+            entry("AI GIS maps floods", "http://[::1"),
+            entry("AI GIS maps floods", f"{base}/wrap/7"),
+        ]), None),
+        (publisher, feedparser.FeedParserDict(entries=[entry("AI GIS maps floods", f"{base}/article/7")]), None),
+    ]
+    candidates = ai_gis_digest.DIGEST.candidates(results)
+    assert [c['link'] for c in candidates] == [f"{base}/article/7"]
+    assert candidates[0]['source'] is news   # the malformed entry did not drop its feed
@@ -1,366 +1,266 @@
-import smtplib
-import schedule
-import time
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
-import feedparser
-import requests
-from bs4 import BeautifulSoup
+import sys
+from datetime import datetime
+from digest_engine import Digest, ScoringProfile
+from digest_engine.cli import main
+from digest_engine.keyword_matcher import KeywordMatcher
+from digest_engine.batch_scoring import TermMatrix, weight_vector, weighted_sum
+from digest_engine.renderer import DigestTemplate, plain_text
+import settings
+import sources
 
 # ===== CONFIGURATION =====
-EMAIL_ADDRESS = "your.email@gmail.com"  # Your Gmail address
-EMAIL_PASSWORD = "your.gmail.app.password"    # Your Gmail app password 
-SMTP_SERVER = "smtp.gmail.com"
-SMTP_PORT = 587
-RECIPIENT_EMAIL = "your.email@gmail.com"
-MAX_ARTICLES = 10  # Limit to top 10 articles
+# Shared settings (email, fetching, caches) are read from settings.py; a name set here overrides it
+MAX_TRENDS = 10  # Limit to top 10 trends
+EXTRACT_TIMEOUT = 15  # Seconds per article download
+EXTRACT_DEADLINE = 90  # Seconds allowed for all article extractions per run
+RUN_BUDGET = 15 * 60  # Seconds the whole run may take; past it extraction, then slow feeds are skipped (None: no limit)
+CONTENT_SCORE_BOUND = None  # Highest content score assumed before extraction (None: exact bound, never skips a winner); a lower number skips more extractions but is approximate and can drop an article that would have ranked
+OUTBOX_DIR = ".cache/outbox/weekly"  # Rendered messages are spooled here until delivered
+SCHEDULE = "monday at 08:00"  # Local run time: "daily at HH:MM" or "<weekday> at HH:MM"
 
-# ===== INDUSTRY TRENDS SOURCES =====
-TREND_SOURCES = [
-    {
-        "name": "Towards Data Science Trends",
-        "url": "https://towardsdatascience.com/feed",
-        "type": "blog"
-    },
-    {
-        "name": "MIT Technology Review AI",
-        "url": "https://www.technologyreview.com/topic/artificial-intelligence/feed/",
-        "type": "news"
-    },
-    {
-        "name": "Google AI Blog",
-        "url": "https://ai.googleblog.com/feeds/posts/default",
-        "type": "corporate"
-    },
-    {
-        "name": "AWS Machine Learning Blog",
-        "url": "https://aws.amazon.com/blogs/machine-learning/feed/",
-        "type": "corporate"
-    },
-    {
-        "name": "Esri Insights Blog",
-        "url": "https://www.esri.com/arcgis-blog/feed/",
-        "type": "gis"
-    },
-    {
-        "name": "Mapbox Blog",
-        "url": "https://blog.mapbox.com/rss",
-        "type": "gis"
-    },
-    {
-        "name": "KDnuggets News",
-        "url": "https://www.kdnuggets.com/feed",
-        "type": "news"
-    },
-    {
-        "name": "Analytics Vidhya",
-        "url": "https://www.analyticsvidhya.com/blog/feed/",
-        "type": "blog"
-    },
-    {
-        "name": "GIS Lounge",
-        "url": "https://www.gislounge.com/feed/",
-        "type": "gis"
-    },
-    {
-        "name": "Harvard Data Science Review",
-        "url": "https://hdsr.mitpress.mit.edu/rss_2.0",
-        "type": "academic"
-    }
+# ===== SCORING TERMS =====
+# Keywords that mark an article as being about trends/developments
+TREND_ARTICLE_KEYWORDS = [
+    "trend", "development", "advance", "innovation", "emerging",
+    "future", "2025", "2024", "outlook", "prediction",
+    "breakthrough", "new", "latest", "update", "release",
+    "survey", "report", "study", "analysis", "forecast"
 ]
+TREND_ARTICLE_MATCHER = KeywordMatcher(dict.fromkeys(TREND_ARTICLE_KEYWORDS, 1))
 
-# ===== FUNCTIONS =====
-def extract_trend_content(url):
-    """Extract content from trend articles"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
-            element.decompose()
-        
-        # Get text and clean it up
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = ' '.join(chunk for chunk in chunks if chunk)
-        
-        return text[:350] + "..." if len(text) > 350 else text
-    except Exception as e:
-        print(f"Error extracting content from {url}: {e}")
-        return "Content not available"
+# Source type weighting
+SOURCE_TYPE_WEIGHTS = {
+    "academic": 8,
+    "corporate": 7, 
+    "news": 6,
+    "blog": 5,
+    "gis": 6
+}
+
+# Trend keyword matches
+TREND_KEYWORDS = [
+    "trend", "development", "advance", "innovation", "emerging",
+    "future", "2025", "2024", "outlook", "prediction"
+]
+
+# Industry impact keywords
+IMPACT_KEYWORDS = [
+    "transform", "revolution", "disrupt", "change", "shift",
+    "growth", "market", "industry", "adoption", "implementation"
+]
+
+# term: (weight when in title, weight when in content)
+TREND_SCORE_WEIGHTS = {
+    **{term: (3, 2) for term in TREND_KEYWORDS},
+    **{term: (2, 1) for term in IMPACT_KEYWORDS},
+}
+TREND_SCORE_MATCHER = KeywordMatcher(TREND_SCORE_WEIGHTS)
+TREND_TITLE_WEIGHT_VECTOR = weight_vector(TREND_SCORE_MATCHER, field=0)
+TREND_CONTENT_WEIGHT_VECTOR = weight_vector(TREND_SCORE_MATCHER, field=1)
 
+# Content score if an article body contained every term
+MAX_TREND_CONTENT_SCORE = sum(TREND_CONTENT_WEIGHT_VECTOR)
+
+# ===== EMAIL TEMPLATES =====
+# Compiled once at import; ${name} placeholders are HTML-escaped, see renderer.py
+EMAIL_CSS = """\
+body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }
+.header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 25px; text-align: center; }
+.trend { margin-bottom: 30px; padding: 20px; border-radius: 8px; background-color: #f8f9fa; border-left: 5px solid #667eea; }
+.trend h3 { margin-top: 0; color: #2c3e50; }
+.trend a { color: #3498db; text-decoration: none; font-weight: bold; }
+.trend a:hover { text-decoration: underline; }
+.meta { font-size: 0.9em; color: #7f8c8d; margin-bottom: 12px; }
+.score { float: right; background-color: #667eea; color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; }
+.source-badge { display: inline-block; padding: 4px 10px; border-radius: 4px; font-size: 0.8em; margin-right: 10px; }
+.source-academic { background-color: #8e44ad; color: white; }
+.source-corporate { background-color: #3498db; color: white; }
+.source-news { background-color: #e74c3c; color: white; }
+.source-blog { background-color: #2ecc71; color: white; }
+.source-gis { background-color: #f39c12; color: white; }
+.footer { margin-top: 40px; padding: 20px; text-align: center; font-size: 0.9em; color: #7f8c8d; border-top: 1px solid #eee; }
+.insight { background-color: #fff3cd; border-left: 5px solid #ffc107; padding: 15px; margin: 20px 0; border-radius: 5px; }"""
+
+def email_item_values(index, trend):
+    """Placeholder values for one trend of the email"""
+    return {
+        "index": index,
+        "title": trend['title'],
+        "score": trend['score'],
+        "source_class": f"source-{trend['source_type']}",
+        "source_name": trend['source_type'].capitalize(),
+        "source": trend['source'],
+        "published": trend['published'],
+        "summary": plain_text(trend['summary']),
+        "link": trend['link'],
+    }
+
+EMAIL_TEMPLATE = DigestTemplate(
+    css=EMAIL_CSS,
+    header="""\
+<div class="header">
+<h1>🌐 GIS &amp; AI Weekly Trends Digest</h1>
+<p>Week of ${week}</p>
+<p>Top ${count} industry developments and emerging trends</p>
+</div>
+<div class="insight">
+<strong>📈 This Week's Focus:</strong> The most significant developments in geospatial AI,
+machine learning applications, and data science innovations that are shaping the industry.
+</div>
+""",
+    item="""\
+<div class="trend">
+<span class="score">Impact: ${score}</span>
+<h3>${index}. ${title}</h3>
+<div class="meta">
+<span class="source-badge ${source_class}">${source_name}</span>
+<strong>Source:</strong> ${source} |
+<strong>Published:</strong> ${published}
+</div>
+<p>${summary}</p>
+<p><a href="${link}">🔗 Read detailed analysis</a></p>
+</div>
+""",
+    footer="""\
+<div class="footer">
+<p>Curated from leading industry sources • ${date}</p>
+<p>This weekly digest was created for ${recipient_name}</p>
+</div>
+""",
+    empty="""\
+<html>
+<body>
+<h2>🌐 GIS &amp; AI Weekly Trends Digest</h2>
+<p>No significant trends identified this week. Check back next week!</p>
+</body>
+</html>
+""",
+    text_header="GIS & AI Weekly Trends Digest\nWeek of ${week}\n"
+                "Top ${count} industry developments and emerging trends\n\n",
+    text_item="${index}. ${title}\n   ${source_name} | Source: ${source} | Published: ${published} | Impact: ${score}\n"
+              "   ${summary}\n   ${link}\n\n",
+    text_footer="Curated from leading industry sources • ${date}\n"
+                "This weekly digest was created for ${recipient_name}\n",
+    text_empty="GIS & AI Weekly Trends Digest\nNo significant trends identified this week. Check back next week!\n",
+    item_values=email_item_values,
+)
+
+# ===== FUNCTIONS =====
 def is_trend_article(title, content):
     """Check if article is about trends/developments"""
-    trend_keywords = [
-        "trend", "development", "advance", "innovation", "emerging",
-        "future", "2025", "2024", "outlook", "prediction",
-        "breakthrough", "new", "latest", "update", "release",
-        "survey", "report", "study", "analysis", "forecast"
-    ]
-    
-    content = content.lower()
-    title = title.lower()
-    
     # Check for trend-related keywords
-    trend_score = sum(1 for keyword in trend_keywords if keyword in title or keyword in content)
+    found = TREND_ARTICLE_MATCHER.find(title).keys() | TREND_ARTICLE_MATCHER.find(content).keys()
     
-    return trend_score >= 2  # At least 2 trend keywords
+    return len(found) >= 2  # At least 2 trend keywords
 
 def calculate_trend_score(article, source_type):
     """Calculate relevance score for trend articles"""
-    title = article['title'].lower()
-    content = article.get('content', '').lower()
+    title = article['title']
+    content = article.get('content', '')
     
     score = 0
     
     # Source type weighting
-    source_weights = {
-        "academic": 8,
-        "corporate": 7, 
-        "news": 6,
-        "blog": 5,
-        "gis": 6
-    }
-    score += source_weights.get(source_type, 5)
+    score += SOURCE_TYPE_WEIGHTS.get(source_type, 5)
     
-    # Trend keyword matches
-    trend_keywords = [
-        "trend", "development", "advance", "innovation", "emerging",
-        "future", "2025", "2024", "outlook", "prediction"
-    ]
-    
-    for keyword in trend_keywords:
-        if keyword in title:
-            score += 3
-        if keyword in content:
-            score += 2
-    
-    # Industry impact keywords
-    impact_keywords = [
-        "transform", "revolution", "disrupt", "change", "shift",
-        "growth", "market", "industry", "adoption", "implementation"
-    ]
+    # Trend and industry impact keyword matches (see TREND_SCORE_WEIGHTS)
+    score += TREND_SCORE_MATCHER.score(title, field=0)
+    score += TREND_SCORE_MATCHER.score(content, field=1)
     
-    for keyword in impact_keywords:
-        if keyword in title:
-            score += 2
-        if keyword in content:
-            score += 1
-    
-    # Recency bonus (prefer articles from last 7 days)
-    try:
-        published_date = article.get('published', '')
-        if 'hour' in published_date or 'day' in published_date:
-            score += 5
-        elif 'week' in published_date:
-            score += 3
-    except:
-        pass
-    
-    # Length bonus (longer articles often have more substance)
-    if len(content) > 500:
-        score += 2
+    score += trend_recency_bonus(article.get('published', ''))
+    score += length_bonus(content)
     
     return score
 
-def get_industry_trends():
-    """Fetch industry trends and developments"""
-    trends = []
-    
-    print("Fetching industry trends...")
-    
-    for source in TREND_SOURCES:
-        try:
-            print(f"Checking {source['name']}...")
-            feed = feedparser.parse(source['url'])
-            
-            if not feed.entries:
-                continue
-                
-            for entry in feed.entries[:15]:  # Check first 15 entries per source
-                # Skip if too old (rough check)
-                published = entry.get('published', '')
-                if '2023' in published or '2022' in published:
-                    continue
-                
-                # Get content
-                content = entry.get('summary', '')
-                if not content or len(content) < 100:
-                    content = extract_trend_content(entry.link)
-                
-                # Check if this is a trend article
-                if is_trend_article(entry.title, content):
-                    trend_score = calculate_trend_score({
-                        'title': entry.title,
-                        'content': content,
-                        'published': published
-                    }, source['type'])
-                    
-                    trends.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'summary': content[:300] + "..." if len(content) > 300 else content,
-                        'source': source['name'],
-                        'source_type': source['type'],
-                        'published': published,
-                        'score': trend_score
-                    })
-                    print(f"  ✓ Trend found: {entry.title} (Score: {trend_score})")
-                    
-        except Exception as e:
-            print(f"Error processing {source['name']}: {e}")
-    
-    return trends
+def trend_recency_bonus(published_date):
+    """Recency bonus (prefer articles from last 7 days)"""
+    if 'hour' in published_date or 'day' in published_date:
+        return 5
+    elif 'week' in published_date:
+        return 3
+    return 0
 
-def select_top_trends(trends, max_trends=MAX_TRENDS):
-    """Select the top N most relevant trends"""
-    # Sort by trend score (descending)
-    sorted_trends = sorted(trends, key=lambda x: x['score'], reverse=True)
-    
-    # Return top N trends
-    return sorted_trends[:max_trends]
+def length_bonus(content):
+    """Length bonus (longer articles often have more substance)"""
+    return 2 if len(content) > 500 else 0
 
-def generate_trends_email_content(trends):
-    """Generate HTML email content for trends"""
-    if not trends:
-        return """
-        <html>
-        <body>
-            <h2>🌐 GIS & AI Weekly Trends Digest</h2>
-            <p>No significant trends identified this week. Check back next week!</p>
-        </body>
-        </html>
-        """
+def score_trends(candidates):
+    """Check and score a whole candidate set at once.
     
-    html_content = f"""
-    <html>
-    <head>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 25px; text-align: center; }}
-            .trend {{ margin-bottom: 30px; padding: 20px; border-radius: 8px; background-color: #f8f9fa; border-left: 5px solid #667eea; }}
-            .trend h3 {{ margin-top: 0; color: #2c3e50; }}
-            .trend a {{ color: #3498db; text-decoration: none; font-weight: bold; }}
-            .trend a:hover {{ text-decoration: underline; }}
-            .meta {{ font-size: 0.9em; color: #7f8c8d; margin-bottom: 12px; }}
-            .score {{ float: right; background-color: #667eea; color: white; padding: 4px 12px; border-radius: 15px; font-size: 0.85em; }}
-            .source-badge {{ display: inline-block; padding: 4px 10px; border-radius: 4px; font-size: 0.8em; margin-right: 10px; }}
-            .source-academic {{ background-color: #8e44ad; color: white; }}
-            .source-corporate {{ background-color: #3498db; color: white; }}
-            .source-news {{ background-color: #e74c3c; color: white; }}
-            .source-blog {{ background-color: #2ecc71; color: white; }}
-            .source-gis {{ background-color: #f39c12; color: white; }}
-            .footer {{ margin-top: 40px; padding: 20px; text-align: center; font-size: 0.9em; color: #7f8c8d; border-top: 1px solid #eee; }}
-            .insight {{ background-color: #fff3cd; border-left: 5px solid #ffc107; padding: 15px; margin: 20px 0; border-radius: 5px; }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>🌐 GIS & AI Weekly Trends Digest</h1>
-            <p>Week of {datetime.now().strftime('%B %d, %Y')}</p>
-            <p>Top {len(trends)} industry developments and emerging trends</p>
-        </div>
-        
-        <div class="insight">
-            <strong>📈 This Week's Focus:</strong> The most significant developments in geospatial AI, 
-            machine learning applications, and data science innovations that are shaping the industry.
-        </div>
+    Returns (is_trend, scores) lists matching is_trend_article() and
+    calculate_trend_score() for each candidate, computed from term
+    matrices instead of one article at a time.
     """
+    titles = [c['title'] for c in candidates]
+    contents = [c['content'] for c in candidates]
     
-    for i, trend in enumerate(trends, 1):
-        # Determine source type for styling
-        source_class = f"source-{trend['source_type']}"
-        source_name = trend['source_type'].capitalize()
-        
-        html_content += f"""
-        <div class="trend">
-            <span class="score">Impact: {trend['score']}</span>
-            <h3>{i}. {trend['title']}</h3>
-            <div class="meta">
-                <span class="source-badge {source_class}">{source_name}</span>
-                <strong>Source:</strong> {trend['source']} | 
-                <strong>Published:</strong> {trend['published']}
-            </div>
-            <p>{trend['summary']}</p>
-            <p><a href="{trend['link']}">🔗 Read detailed analysis</a></p>
-        </div>
-        """
+    trend_counts = TermMatrix(titles, TREND_ARTICLE_MATCHER).union_counts(
+        TermMatrix(contents, TREND_ARTICLE_MATCHER))
+    is_trend = [count >= 2 for count in trend_counts]
     
-    html_content += f"""
-        <div class="footer">
-            <p>Curated from leading industry sources • {datetime.now().strftime('%Y-%m-%d')}</p>
-            <p>This weekly digest was created for Giovanni Bwayo</p>
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
+    offsets = [
+        SOURCE_TYPE_WEIGHTS.get(c['source'].type, 5) + trend_recency_bonus(c['published'])
+        + length_bonus(c['content'])
+        for c in candidates
+    ]
+    scores = weighted_sum([
+        TermMatrix(titles, TREND_SCORE_MATCHER).dot(TREND_TITLE_WEIGHT_VECTOR),
+        TermMatrix(contents, TREND_SCORE_MATCHER).dot(TREND_CONTENT_WEIGHT_VECTOR),
+    ], offsets)
+    return is_trend, scores
 
-def send_trends_email(content):
-    """Send trends email using SMTP"""
-    msg = MIMEMultipart("alternative")
-    msg['Subject'] = f"🌐 GIS & AI Weekly Trends - {datetime.now().strftime('%Y-%m-%d')}"
-    msg['From'] = EMAIL_ADDRESS
-    msg['To'] = RECIPIENT_EMAIL
-    
-    msg.attach(MIMEText(content, "html"))
-    
-    try:
-        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-            server.starttls()
-            server.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-            server.send_message(msg)
-        print(f"{datetime.now()}: Trends email sent successfully!")
-        return True
-    except Exception as e:
-        print(f"{datetime.now()}: Error sending trends email: {e}")
-        return False
+def trend_score_upper_bound(candidate):
+    """Highest score an entry could get once its body is extracted"""
+    # Extracted text is cut to 350 characters, too short for length_bonus()
+    content_bound = MAX_TREND_CONTENT_SCORE if CONTENT_SCORE_BOUND is None else CONTENT_SCORE_BOUND
+    return (SOURCE_TYPE_WEIGHTS.get(candidate['source'].type, 5) + content_bound
+            + TREND_SCORE_MATCHER.score(candidate['title'], field=0)
+            + trend_recency_bonus(candidate['published']))
+
+# ===== DIGEST =====
+class TrendsProfile(ScoringProfile):
+    """Industry trends: recent entries with at least two trend keywords"""
+
+    entries_per_source = 15  # Check first 15 entries per source
+    min_summary_chars = 100
+    extract_chars = 350
+    summary_chars = 300
+    history_days = 7  # Articles the daily digest already ingested this week count too
+
+    @property
+    def max_items(self):
+        return MAX_TRENDS
+
+    def accept(self, entry, source):
+        # Skip if too old (rough check)
+        published = entry.get('published', '')
+        return not ('2023' in published or '2022' in published)
+
+    def score(self, candidates):
+        # Keep only trend articles
+        is_trend, scores = score_trends(candidates)
+        return [score if trend else None for trend, score in zip(is_trend, scores)]
+
+    def upper_bound(self, candidate):
+        return trend_score_upper_bound(candidate)
+
+def email_context(trends):
+    """Template values shared by every recipient"""
+    now = datetime.now()
+    return {"week": now.strftime('%B %d, %Y'), "date": now.strftime('%Y-%m-%d'), "count": len(trends)}
+
+DIGEST = Digest("weekly", sys.modules[__name__], TrendsProfile(), EMAIL_TEMPLATE,
+                "🌐 GIS & AI Weekly Trends - {date}", email_context, noun="trends",
+                shared=(settings, sources))
+
+def get_industry_trends():
+    """Fetch industry trends and developments"""
+    return DIGEST.collect()
 
 def send_weekly_trends_digest():
     """Main function to fetch trends and send weekly email"""
-    print(f"{datetime.now()}: Starting weekly trends collection...")
-    
-    # Get industry trends
-    trends = get_industry_trends()
-    print(f"{datetime.now()}: Found {len(trends)} potential trends")
-    
-    # Select top trends
-    top_trends = select_top_trends(trends)
-    print(f"{datetime.now()}: Selected top {len(top_trends)} trends")
-    
-    # Generate email content
-    email_content = generate_trends_email_content(top_trends)
-    
-    # Send email
-    success = send_trends_email(email_content)
-    
-    if success:
-        print(f"{datetime.now()}: Weekly trends digest sent with {len(top_trends)} trends")
-    else:
-        print(f"{datetime.now()}: Failed to send trends digest")
+    return DIGEST.run()
 
 # ===== MAIN EXECUTION =====
 if __name__ == "__main__":
-    print("GIS & AI Weekly Trends Digest System")
-    print("====================================")
-    
-    # Run once immediately for testing
-    print("Running initial trends test...")
-    send_weekly_trends_digest()
-    
-    # Schedule weekly on Monday at 8:00 AM
-    schedule.every().monday.at("08:00").do(send_weekly_trends_digest)
-    
-    print("Weekly trends scheduler started. Will run every Monday at 8:00 AM.")
-    print("Press Ctrl+C to exit.")
-    
-    # Keep the script running
-    while True:
-        schedule.run_pending()
-        time.sleep(3600)  # Check every hour
+    main([DIGEST], "GIS & AI Weekly Trends Digest System")